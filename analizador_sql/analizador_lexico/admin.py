@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AnalysisRun, AnalysisJob
+
+# Histórico de análisis y jobs en segundo plano en el admin (sólo lectura; errores y
+# símbolos se consultan mejor desde api/history/...).
+
+
+@admin.register(AnalysisRun)
+class AnalysisRunAdmin(admin.ModelAdmin):
+    list_display = ("filename", "created_at", "token_count", "symbol_count", "error_count", "version")
+    search_fields = ("filename", "digest")
+    readonly_fields = ("filename", "digest", "version", "created_at", "token_count",
+                       "error_count", "symbol_count", "stats")
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ("filename", "status", "size", "created_at", "started_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("filename", "digest", "id")
+    readonly_fields = ("id", "filename", "path", "size", "digest", "status", "cancel_requested", "progress",
+                       "error", "created_at", "updated_at", "started_at", "finished_at")
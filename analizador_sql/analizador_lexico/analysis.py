@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .lexer import LEXER_VERSION
+from .bytelexer import lexer_for
+from .parser import GRAMMAR_VERSION
+from .ll1 import LL1Parser
+from .parallel import parse_parallel, PARALLEL_MIN_CHARS, POOL_CONTEXT
+from .incremental import IncrementalAnalyzer
+from .symbols import SymbolTable, SymKind
+from .errors import ErrorLog
+from .semantic import SemanticChecker, facts, SEMANTIC_VERSION
+from .metrics import Stages, run_program
+from .lineindex import LineIndex
+
+# Pipeline completo de análisis (lexer -> parser -> tabla de símbolos) sin Django.
+#
+# Exporta:
+#  - analyze_source(data): ejecuta el análisis y devuelve un dict serializable con
+#    log, errors, tokens, symtab y stats (lo que necesita la plantilla index.html).
+#    `data` puede ser texto o bytes UTF-8 / mmap (se tokeniza con ByteLexer sin
+#    decodificar el archivo; no compatible con `incremental`).
+#    Con `incremental` (IncrementalAnalyzer) reutiliza resultados por sentencia;
+#    `parallel=False` evita lanzar procesos (p. ej. dentro de un worker).
+#    Tras el parser se valida el esquema (semantic.py: columnas, aridad de INSERT y
+#    tipos según los CREATE TABLE del propio archivo); los errores quedan ordenados
+#    por posición.
+#    `log` (lista o algo con append) recibe el progreso a medida que avanza y
+#    `on_statement(línea, última línea)` se llama tras cada sentencia parseada en este
+#    proceso (cola de jobs.py: avance y cancelación, lanzando una excepción).
+#    `stages` (metrics.Stages) recibe los tiempos de tokenize/parse/semantic/symtab y de
+#    parseo por tipo de sentencia; su resumen va en la clave "metrics" del resultado.
+#    `aggregate_literals` (por defecto, si `data` tiene AGGREGATE_MIN_BYTES o más): los
+#    literales de VALUES se resumen por columna en lugar de ir a la tabla de símbolos
+#    (ver Parser.rows); el resumen va en la clave "literal_stats". El análisis
+#    incremental (archivos pequeños) no agrega.
+#  - analyze_many(sources, workers): analiza varios textos a la vez en un ProcessPoolExecutor
+#  - ANALYSIS_VERSION: versión combinada de lexer, gramática y formato del resultado,
+#    usada en las claves de caché
+#  - AGGREGATE_MIN_BYTES: tamaño a partir del cual se agregan los literales de VALUES
+#  - TOKEN_PAGE_SIZE: tokens incluidos en el resultado (primera página); el resto se
+#    sirve paginado desde el texto fuente (ver api.result_tokens)
+#  - token_rows(tokens, indices): filas [tipo, valor, línea, col] de un TokenBuffer
+#  - parse_ast(tokens): lista de sentencias (ast_nodes) de un TokenBuffer, para
+#    herramientas que quieran reutilizar el parseo (ver api.result_ast)
+#
+# Formato del resultado: tokens y symtab son listas de filas (no dicts) para que
+# serializar, cachear y paginar resultados grandes sea barato:
+#  - format: RESULT_FORMAT con el que se generó (cache.py descarta los de otro formato)
+#  - tokens: [tipo, valor, línea, col]          (+ token_count con el total)
+#  - symtab: [hash, kind, valor, línea, col, refs]
+#  - errors: mensajes "L<línea>:C<col> - ..." y error_rows: [línea, col, mensaje]
+#  - error_snippets: [texto de la línea, marca "   ^"] por cada fila de error_rows
+#  - metrics: Stages.as_dict() del análisis que generó el resultado
+#  - literal_stats: [tabla, columna, nº, NULL, enteros, decimales, strings, menor, mayor,
+#    string más largo] por columna de cada INSERT agregado (vacío si no se agregó)
+#
+# No importa nada de Django, así que puede usarse desde scripts o procesos worker.
+
+# Versión del formato del dict de resultado: incrementar al cambiar sus claves.
+RESULT_FORMAT = 6
+ANALYSIS_VERSION = f"lex{LEXER_VERSION}-gram{GRAMMAR_VERSION}-sem{SEMANTIC_VERSION}-res{RESULT_FORMAT}"
+TOKEN_PAGE_SIZE = 100
+AGGREGATE_MIN_BYTES = 16 * 1024 * 1024
+
+
+def token_rows(tokens, indices):
+    return [[tokens.type(i).name, tokens.value(i), tokens.lines[i], tokens.cols[i]] for i in indices]
+
+
+def parse_ast(tokens):
+    parser = LL1Parser(tokens, SymbolTable(), ErrorLog(), [], build_ast=True)
+    parser.program()
+    return parser.ast
+
+
+def _literal_stats(stmt_facts):
+    out = []
+    for fact in stmt_facts:
+        if fact[0] != "INSERT" or fact[1] is None or not fact[5]:
+            continue
+        cols = fact[2]
+        for k, (nulls, ints, floats, strings, _, _, _, longest, lo, hi) in enumerate(fact[5]):
+            name = cols[k][1] if k < len(cols) else f"#{k + 1}"
+            out.append([fact[1][1], name, nulls + ints + floats + strings, nulls, ints, floats, strings,
+                        lo and lo[1], hi and hi[1], longest and longest[1]])
+    return out
+
+
+def analyze_source(data, incremental: IncrementalAnalyzer = None, parallel: bool = True, stages: Stages = None,
+                   log=None, on_statement=None, aggregate_literals=None):
+    log = log if log is not None else []
+    if aggregate_literals is None:
+        aggregate_literals = len(data) >= AGGREGATE_MIN_BYTES
+    log.append("Archivo recibido. Iniciando tokenización…")
+    stages = stages or Stages()
+
+    # SYMBOL TABLE + ERRORS
+    symtab = SymbolTable()
+    errlog = ErrorLog()
+
+    if incremental is not None:
+        # sólo se tokenizan/parsean las sentencias que no estén en la caché por sentencia
+        log.append("Iniciando parser/validación por gramática…")
+        tokens, token_count, stmt_facts = incremental.analyze(data, symtab, errlog, log, TOKEN_PAGE_SIZE, stages)
+        eof = incremental.eof(data)
+        index = None
+        first_page = [[t.type.name, t.value, t.line, t.col] for t in tokens]
+    else:
+        # LEXER (TokenBuffer compacto: los tokens se materializan al indexar)
+        with stages.stage("tokenize"):
+            tokens = lexer_for(data).tokenize_buffer()
+            eof = tokens[-1]
+            index = tokens.line_index
+            token_count = len(tokens)
+            first_page = token_rows(tokens, range(min(TOKEN_PAGE_SIZE, token_count)))
+
+        # PARSER (las inserciones en la tabla de símbolos van dentro de esta etapa)
+        log.append("Iniciando parser/validación por gramática…")
+        with stages.stage("parse"):
+            if parallel and len(data) >= PARALLEL_MIN_CHARS and (os.cpu_count() or 1) > 1:
+                stmt_facts, statements = parse_parallel(data, tokens, symtab, errlog, log,
+                                                        aggregate_literals=aggregate_literals)
+            else:
+                parser = LL1Parser(tokens, symtab, errlog, log, build_ast=True, aggregate_literals=aggregate_literals)
+                last_line = eof.line
+                statements = run_program(parser, {}, on_statement and (lambda tk: on_statement(tk.line, last_line)))
+                stmt_facts = facts(parser.ast, tokens, parser.failed)
+        stages.add_statements(statements)
+
+    # VALIDACIÓN SEMÁNTICA (esquema de los CREATE TABLE)
+    nparse = len(errlog.items)
+    with stages.stage("semantic"):
+        SemanticChecker(errlog).check(stmt_facts)
+    if len(errlog.items) > nparse:
+        log.append(f"Validación de esquema: {len(errlog.items) - nparse} errores semánticos.")
+        errlog.items.sort(key=lambda e: (e.line, e.col))
+
+    # Agregar EOF a tabla
+    symtab.add(eof, SymKind.EOF)
+
+    with stages.stage("symtab"):
+        rows = [[e.hash[:8], e.kind.value, e.value, e.line, e.col, e.refs] for e in symtab.entries()]
+        stats = symtab.stats()
+
+    with stages.stage("snippets"):
+        if index is None and errlog.items:
+            index = LineIndex.build(data)
+        snippets = errlog.snippets(index) if errlog.items else []
+
+    return {
+        "format": RESULT_FORMAT,
+        "log": list(log),
+        "errors": errlog.as_list(),
+        "error_rows": [[e.line, e.col, e.message] for e in errlog.items],
+        "error_snippets": snippets,
+        "tokens": first_page,
+        "token_count": token_count,
+        "symtab": rows,
+        "stats": stats,
+        "metrics": stages.as_dict(),
+        "literal_stats": _literal_stats(stmt_facts),
+    }
+
+
+def _analyze_one(data: str):
+    return analyze_source(data, parallel=False)
+
+
+def analyze_many(sources, workers=None):
+    # un archivo por tarea; resultados en el mismo orden que `sources`
+    sources = list(sources)
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    if workers <= 1:
+        return [analyze_source(s) for s in sources]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+        return list(pool.map(_analyze_one, sources))
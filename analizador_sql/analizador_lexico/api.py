@@ -0,0 +1,456 @@
+import json
+import tarfile
+import threading
+import time
+import zipfile
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .analysis import analyze_many, token_rows, parse_ast, ANALYSIS_VERSION
+from .ast_nodes import dumps_binary, dumps_json, loads_binary
+from .cache import result_cache
+from .history import record_run, runs_referencing, top_values
+from .metrics import REGISTRY
+from .models import AnalysisRun, AnalysisJob
+from .jobs import job_queue, file_digest, QueueFull
+from .lexer import Lexer, TokenStream, TokenType
+from .bytelexer import ByteLexer, lexer_for
+from .tokenbuffer import CODE_OF
+from .ll1 import LL1Parser
+from .symbols import SymbolTable, SymKind
+from .errors import ErrorLog
+
+# Endpoints JSON para clientes automáticos (CI, scripts).
+#
+# Vista `batch_analyze` (POST api/analyze/):
+#  - Acepta varios archivos en el campo multipart `files` y/o un archivo `archive`
+#    (.zip, .tar, .tar.gz) cuyos miembros regulares se analizan uno a uno.
+#  - Cada archivo se busca en la caché de resultados (cache.py); los que faltan se
+#    analizan a la vez en un ProcessPoolExecutor (analysis.analyze_many), directamente
+#    sobre los bytes (bytelexer.py), sin decodificar cada archivo completo. Los archivos
+#    idénticos (misma clave) se analizan y registran en el histórico una sola vez.
+#  - Respuesta compacta por archivo: errores, stats y `metrics` (tiempos por etapa del
+#    análisis que generó el resultado, ver metrics.py); `?tokens=1` añade todos los tokens
+#    como [tipo, valor, línea, col] y `?symbols=1` la tabla como [kind, valor, línea, col, refs].
+#    Si el análisis agregó literales de INSERT (archivos grandes) se añade `literal_stats`.
+#  - Límites: settings.ANALIZADOR_BATCH_MAX_FILES y ANALIZADOR_BATCH_MAX_BYTES (total
+#    descomprimido) para no aceptar archivos comprimidos desproporcionados.
+#
+# Vistas `analyze_stream` (POST api/stream/) y `analyze_stream_async` (POST
+# api/stream-async/, para servir con asgi.py):
+#  - Responden NDJSON (una línea JSON por evento) mientras se tokeniza y parsea:
+#    "start", "progress", "error", "statement" (una por sentencia), "stats" y "end".
+#  - El archivo `sqlfile` se tokeniza en streaming (Lexer.iter_tokens + TokenStream),
+#    así que ni el texto completo ni la lista de tokens se mantienen en memoria.
+#  - La versión async ejecuta el análisis en un hilo y envía los eventos por lotes con
+#    lo generado en STREAM_FLUSH_SECONDS (el primero, "start", sale solo): un evento se
+#    retrasa como mucho ese intervalo más lo que tarde en parsearse la sentencia siguiente.
+#
+# Vistas `result_tokens` y `result_symbols` (GET api/result/<id>/tokens|symbols/):
+#  - Paginan un resultado guardado en caché (id = digest del archivo, ver cache.py):
+#    `?page=&size=` y filtros `type`, `line_from`, `line_to` (tokens) o `kind` (símbolos).
+#  - Los tokens se recalculan del texto fuente guardado como TokenBuffer (LRU de unos
+#    pocos por proceso); el filtro por línea usa bisect porque las líneas no decrecen.
+#  - Devuelven {"page", "pages", "size", "total", "items"}; cada token es
+#    [nº, tipo, valor, línea, col] y cada símbolo [hash, kind, valor, línea, col, refs].
+#
+# Vista `result_ast` (GET api/result/<id>/ast/): AST de cada sentencia (ast_nodes.py)
+# parseado del mismo TokenBuffer; JSON con [índice, valor] por token (`?values=0` sólo
+# índices, que se corresponden con los `nº - 1` de result_tokens) o binario compacto
+# con `?format=bin`. El AST se parsea una vez por resultado y se guarda en binario junto
+# al TokenBuffer (mismo LRU); el JSON se genera desde ahí.
+#
+# Vistas `history_runs` (GET api/history/runs/?table=X | ?column=Y) y
+# `history_top_columns` (GET api/history/columns/top/?limit=N): consultas sobre el
+# histórico persistido (history.py, models.py).
+#
+# Vistas `job_submit` (POST api/jobs/), `job_status` (GET api/jobs/<id>/) y `job_cancel`
+# (POST api/jobs/<id>/cancel/): análisis en segundo plano (jobs.py).
+#  - job_submit responde 202 con el id y `status_url` en cuanto el archivo `sqlfile` está
+#    en cola (200 con `result_id` si ya estaba en caché, 503 + Retry-After si la cola está
+#    llena).
+#  - job_status devuelve estado, progreso {log, statements, percent}, posición en la cola
+#    y, al terminar, `result_id` para api/result/<id>/... o la página `/?job=<id>`.
+# Referencias:
+#  - analyze_many: analizador_sql/analizador_lexico/analysis.py
+#  - result_cache: analizador_sql/analizador_lexico/cache.py
+
+
+def _limits():
+    return (getattr(settings, "ANALIZADOR_BATCH_MAX_FILES", 1000),
+            getattr(settings, "ANALIZADOR_BATCH_MAX_BYTES", 200 * 1024 * 1024))
+
+
+def _extract(archive):
+    name = archive.name.lower()
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, lambda info=info: zf.read(info)
+    elif name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        with tarfile.open(fileobj=archive, mode="r:*") as tf:
+            for member in tf:
+                if member.isfile():
+                    yield member.name, member.size, lambda member=member: tf.extractfile(member).read()
+    else:
+        raise ValueError(f"Formato de archivo comprimido no soportado: {archive.name}")
+
+
+def _collect_files(request):
+    max_files, max_bytes = _limits()
+    out, total = [], 0
+
+    def take(name, size, read):
+        nonlocal total
+        if len(out) >= max_files:
+            raise ValueError(f"Demasiados archivos (máximo {max_files})")
+        total += size
+        if total > max_bytes:
+            raise ValueError(f"Tamaño total excedido (máximo {max_bytes} bytes)")
+        out.append((name, read()))
+
+    for f in request.FILES.getlist("files"):
+        take(f.name, f.size, f.read)
+    archive = request.FILES.get("archive")
+    if archive:
+        for name, size, read in _extract(archive):
+            take(name, size, read)
+    return out
+
+
+def _flag(request, name):
+    return request.GET.get(name, "").lower() in ("1", "true", "yes")
+
+
+def compact_result(name, result, cached, tokens=None, with_symbols=False):
+    out = {
+        "name": name,
+        "ok": not result["errors"],
+        "cached": cached,
+        "error_count": len(result["errors"]),
+        "errors": result["errors"],
+        "stats": result["stats"],
+        "metrics": result.get("metrics"),
+    }
+    if tokens is not None:
+        out["tokens"] = tokens
+    if with_symbols:
+        out["symbols"] = [row[1:] for row in result["symtab"]]
+    if result.get("literal_stats"):
+        out["literal_stats"] = result["literal_stats"]
+    return out
+
+
+@csrf_exempt
+@require_POST
+def batch_analyze(request):
+    try:
+        files = _collect_files(request)
+    except (ValueError, zipfile.BadZipFile, tarfile.TarError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    if not files:
+        return JsonResponse({"error": "Debes enviar archivos en `files` o un `archive`"}, status=400)
+
+    keys = [result_cache.key_for(raw) for _, raw in files]
+    results = [result_cache.get(k) for k in keys]
+    cached = [r is not None for r in results]
+    todo = {}  # clave -> posiciones de los archivos sin resultado (copias idénticas juntas)
+    for i, r in enumerate(results):
+        if r is None:
+            todo.setdefault(keys[i], []).append(i)
+    REGISTRY.inc("analizador_requests_total", view="batch_analyze", method=request.method)
+    REGISTRY.inc("analizador_analyses_total", len(todo), view="batch_analyze")
+    fresh = analyze_many(files[same[0]][1] for same in todo.values())
+    for (key, same), res in zip(todo.items(), fresh):
+        for i in same:
+            results[i] = res
+        REGISTRY.observe(res["metrics"])
+        result_cache.set(key, res)
+        if getattr(settings, "ANALIZADOR_HISTORY", True):
+            name, raw = files[same[0]]
+            record_run(name, result_cache.result_id(raw), res)
+
+    with_tokens, with_symbols = _flag(request, "tokens"), _flag(request, "symbols")
+    out = []
+    for (name, raw), res, hit in zip(files, results, cached):
+        tokens = None
+        if with_tokens:
+            buf = ByteLexer(raw).tokenize_buffer()
+            tokens = token_rows(buf, range(len(buf)))
+        out.append(compact_result(name, res, hit, tokens, with_symbols))
+    return JsonResponse({
+        "version": ANALYSIS_VERSION,
+        "summary": {
+            "files": len(out),
+            "with_errors": sum(1 for r in out if not r["ok"]),
+            "errors": sum(r["error_count"] for r in out),
+            "cached": sum(cached),
+        },
+        "files": out,
+    })
+
+
+def _ndjson(event, **data):
+    return (json.dumps({"event": event, **data}, ensure_ascii=False) + "\n").encode()
+
+
+STREAM_FLUSH_SECONDS = 0.05
+
+
+def _stream_events(file, chunk_size=64 * 1024):
+    yield _ndjson("start", name=file.name, size=file.size, version=ANALYSIS_VERSION)
+    progress, symtab, errlog = [], SymbolTable(), ErrorLog()
+    lexer = Lexer()
+    parser = LL1Parser(TokenStream(lexer.iter_tokens(file, chunk_size)), symtab, errlog, progress)
+    sent_progress = sent_errors = 0
+
+    def pending():
+        nonlocal sent_progress, sent_errors
+        for msg in progress[sent_progress:]:
+            yield _ndjson("progress", message=msg)
+        for e in errlog.items[sent_errors:]:
+            yield _ndjson("error", line=e.line, col=e.col, message=e.message)
+        sent_progress, sent_errors = len(progress), len(errlog.items)
+
+    n = 0
+    for n, start in enumerate(parser.iter_program(), 1):
+        errors_before = sent_errors
+        yield from pending()
+        yield _ndjson("statement", index=n, kind=start.value, line=start.line, col=start.col,
+                      errors=sent_errors - errors_before)
+    symtab.add(parser.t(), SymKind.EOF)
+    yield from pending()
+    yield _ndjson("stats", statements=n, **symtab.stats())
+    yield _ndjson("end", ok=not errlog.has_errors(), errors=len(errlog.items) + errlog.dropped)
+
+
+def _stream_file(request):
+    file = request.FILES.get("sqlfile")
+    if not file:
+        return None, JsonResponse({"error": "Debes enviar el archivo en `sqlfile`"}, status=400)
+    return file, None
+
+
+@csrf_exempt
+@require_POST
+def analyze_stream(request):
+    file, error = _stream_file(request)
+    if error:
+        return error
+    return StreamingHttpResponse(_stream_events(file), content_type="application/x-ndjson")
+
+
+@csrf_exempt
+@require_POST
+async def analyze_stream_async(request):
+    file, error = await sync_to_async(_stream_file)(request)
+    if error:
+        return error
+    events = _stream_events(file)
+
+    def next_batch(limit):
+        # lo generado en STREAM_FLUSH_SECONDS (al menos un evento, como mucho `limit`):
+        # un salto de hilo por lote sin esperar a llenarlo
+        out, deadline = [], time.monotonic() + STREAM_FLUSH_SECONDS
+        for line in events:
+            out.append(line)
+            if len(out) >= limit or time.monotonic() >= deadline:
+                break
+        return out
+
+    take = sync_to_async(next_batch, thread_sensitive=False)
+
+    async def agen():
+        limit = 1  # "start" sale antes de empezar a leer el archivo
+        while True:
+            batch = await take(limit)
+            if not batch:
+                return
+            for line in batch:
+                yield line
+            limit = 256
+
+    return StreamingHttpResponse(agen(), content_type="application/x-ndjson")
+
+
+MAX_PAGE_SIZE = 1000
+_buffers = OrderedDict()  # clave -> TokenBuffer
+_asts = OrderedDict()     # clave -> dumps_binary del AST de ese TokenBuffer
+_buffers_lock = threading.Lock()
+
+
+def _lru(cache, key, build, keep=4):
+    with _buffers_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    value = build()
+    if value is None:
+        return None
+    with _buffers_lock:
+        cache[key] = value
+        while len(cache) > keep:
+            cache.popitem(last=False)
+    return value
+
+
+def _token_buffer(key):
+    def build():
+        data = result_cache.get_source(key)
+        return None if data is None else lexer_for(data).tokenize_buffer()
+    return _lru(_buffers, key, build)
+
+
+def _ast_blob(key, buf):
+    return _lru(_asts, key, lambda: dumps_binary(parse_ast(buf)))
+
+
+def _int_param(request, name, default=None):
+    raw = request.GET.get(name, "")
+    if raw == "":
+        return default
+    return int(raw)
+
+
+def page_response(request, total_items, rows_for):
+    # rows_for(start, end) devuelve las filas de la página pedida
+    try:
+        page = max(1, _int_param(request, "page", 1))
+        size = min(MAX_PAGE_SIZE, max(1, _int_param(request, "size", 100)))
+    except ValueError:
+        return JsonResponse({"error": "page/size deben ser enteros"}, status=400)
+    pages = max(1, -(-total_items // size))
+    page = min(page, pages)
+    start = (page - 1) * size
+    return JsonResponse({"page": page, "pages": pages, "size": size, "total": total_items,
+                         "items": rows_for(start, min(start + size, total_items))})
+
+
+def _missing_result():
+    return JsonResponse({"error": "Resultado no disponible (expiró de la caché); vuelve a subir el archivo"},
+                        status=404)
+
+
+@require_GET
+def result_tokens(request, result_id):
+    buf = _token_buffer(result_cache.key(result_id))
+    if buf is None:
+        return _missing_result()
+    try:
+        line_from = _int_param(request, "line_from")
+        line_to = _int_param(request, "line_to")
+    except ValueError:
+        return JsonResponse({"error": "line_from/line_to deben ser enteros"}, status=400)
+    lo = 0 if line_from is None else bisect_left(buf.lines, line_from)
+    hi = len(buf) if line_to is None else bisect_right(buf.lines, line_to)
+    indices = range(lo, max(lo, hi))
+    ttype = request.GET.get("type", "")
+    if ttype:
+        if ttype not in TokenType.__members__:
+            return JsonResponse({"error": f"Tipo de token desconocido: {ttype}"}, status=400)
+        code, types = CODE_OF[TokenType[ttype]], buf.types
+        indices = [i for i in indices if types[i] == code]
+
+    def rows(start, end):
+        page = indices[start:end]
+        return [[i + 1, *row] for i, row in zip(page, token_rows(buf, page))]
+    return page_response(request, len(indices), rows)
+
+
+@require_GET
+def result_symbols(request, result_id):
+    result = result_cache.peek(result_cache.key(result_id))
+    if result is None:
+        return _missing_result()
+    rows = result["symtab"]
+    kind = request.GET.get("kind", "")
+    if kind:
+        rows = [r for r in rows if r[1] == kind]
+    return page_response(request, len(rows), lambda start, end: rows[start:end])
+
+
+@require_GET
+def result_ast(request, result_id):
+    key = result_cache.key(result_id)
+    buf = _token_buffer(key)
+    if buf is None:
+        return _missing_result()
+    blob = _ast_blob(key, buf)
+    if request.GET.get("format") == "bin":
+        return HttpResponse(blob, content_type="application/octet-stream")
+    tokens = None if request.GET.get("values") == "0" else buf
+    return HttpResponse(dumps_json(loads_binary(blob), tokens), content_type="application/json")
+
+
+def _limit(request, default, maximum=1000):
+    try:
+        return min(maximum, max(1, _int_param(request, "limit", default)))
+    except ValueError:
+        return default
+
+
+@require_GET
+def history_runs(request):
+    limit = _limit(request, 100)
+    if request.GET.get("table"):
+        runs = runs_referencing(request.GET["table"], "TABLE", limit)
+    elif request.GET.get("column"):
+        runs = runs_referencing(request.GET["column"], "COLUMN", limit)
+    else:
+        runs = AnalysisRun.objects.values("id", "filename", "digest", "created_at", "error_count")[:limit]
+    return JsonResponse({"runs": list(runs)})
+
+
+@require_GET
+def history_top_columns(request):
+    return JsonResponse({"columns": list(top_values("COLUMN", _limit(request, 20)))})
+
+
+def _job_response(job, status=200):
+    out = job_queue.status(job)
+    out["status_url"] = reverse("sql_api_job_status", args=[job.pk])
+    out["page_url"] = reverse("sql_index") + f"?job={job.pk}"
+    return JsonResponse(out, status=status)
+
+
+@csrf_exempt
+@require_POST
+def job_submit(request):
+    file, error = _stream_file(request)
+    if error:
+        return error
+    digest = file_digest(file)
+    if result_cache.peek(result_cache.key(digest)) is not None:
+        return JsonResponse({"status": AnalysisJob.DONE, "cached": True, "result_id": digest})
+    try:
+        job = job_queue.submit(file, digest)
+    except QueueFull as exc:
+        response = JsonResponse({"error": str(exc)}, status=503)
+        response["Retry-After"] = "5"
+        return response
+    return _job_response(job, status=202)
+
+
+@require_GET
+def job_status(request, job_id):
+    job = AnalysisJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({"error": "Job no encontrado"}, status=404)
+    return _job_response(job)
+
+
+@csrf_exempt
+@require_POST
+def job_cancel(request, job_id):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return JsonResponse({"error": "Job no encontrado"}, status=404)
+    return _job_response(job)
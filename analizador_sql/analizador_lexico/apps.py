@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def _sqlite_pragmas(sender, connection, **kwargs):
+    # WAL: los lectores no se bloquean mientras se guarda el histórico (history.py)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL;")
+            cursor.execute("PRAGMA synchronous=NORMAL;")
 
 
 class AnalizadorLexicoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "analizador_lexico"
+
+    def ready(self):
+        connection_created.connect(_sqlite_pragmas, dispatch_uid="analizador_lexico_sqlite_pragmas")
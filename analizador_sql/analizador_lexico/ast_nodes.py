@@ -0,0 +1,363 @@
+import json
+import struct
+from array import array
+
+# Nodos del AST de cada sentencia (construido por LL1Parser con `build_ast=True`).
+#
+# Exporta:
+#  - Node y subclases: SelectStmt, InsertStmt, UpdateStmt, CreateStmt, Join, Rows, RowRun,
+#    ColumnStats, Assign, ColDef y las de expresiones (expressions.py): Name, Literal, Unary, Chain, Compare, InList
+#  - NODE_TYPES: {nombre: clase}
+#  - to_dict(node, tokens=None) / dumps_json(stmts, tokens=None): forma JSON
+#  - dumps_binary(stmts) / loads_binary(data): forma binaria compacta (ida y vuelta)
+#
+# Notas:
+#  - Los nodos usan `__slots__` y guardan índices de token (posición en la lista /
+#    TokenBuffer que recibió el parser), no copias de los tokens. `start` es el índice del
+#    primer token del nodo. Un token que faltaba (error de sintaxis) queda como None.
+#  - `FIELDS` describe cada campo: "tok" (índice), "toks" (lista de índices), "tokarray"
+#    (array('i') de índices, para listas que pueden ser enormes), "int" (un entero que no
+#    es un token), "node" (nodo hijo) o "nodes" (lista de nodos; un operando que faltaba
+#    es None).
+#    Lo usan el constructor y los serializadores, así que un nodo nuevo sólo necesita
+#    declarar FIELDS.
+#  - Las cadenas de operadores del mismo nivel (AND, OR, + -, * /) son un solo nodo
+#    Chain con n operandos, así que `a = 1 AND b = 2 AND ...` no anida un nodo por
+#    operador. La profundidad sí crece con cada paréntesis, cada NOT o signo prefijo y
+#    cada cambio de nivel (`a * (b + c * (d + ...))`), así que no está acotada: `__eq__`,
+#    to_dict, dumps_json, dumps_binary y loads_binary recorren el árbol con una pila
+#    explícita, sin recursión (dumps_json tampoco usa json.dumps con el árbol anidado).
+#  - VALUES de un INSERT es un único nodo Rows: los literales de todas las filas en un
+#    array plano y las filas como tramos RowRun (filas seguidas con el mismo nº de
+#    valores), así que un INSERT de un millón de filas no crea un nodo por fila. En modo
+#    agregado (Parser `aggregate_literals`) en lugar de los literales guarda un
+#    ColumnStats por columna.
+#  - to_dict con `tokens` sustituye cada índice por [índice, valor] para consumidores
+#    que no tienen el TokenBuffer.
+#  - Formato binario: b"SQLA", versión (1 byte) y un array de int32 little-endian en
+#    preorden: código de nodo, start y los campos en orden; None = -1, listas = longitud
+#    seguida de los elementos.
+
+BINARY_MAGIC = b"SQLA"
+BINARY_VERSION = 3
+
+
+class Node:
+    __slots__ = ("start",)
+    FIELDS = ()
+
+    def __init__(self, start=None, *values):
+        # `values`: primeros campos en el orden de FIELDS; el resto vacíos
+        self.start = start
+        for k, (name, kind) in enumerate(self.FIELDS):
+            if k < len(values):
+                setattr(self, name, values[k])
+            else:
+                setattr(self, name, [] if kind in ("toks", "nodes") else array("i") if kind == "tokarray" else None)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, _ in self.FIELDS)
+        return f"{type(self).__name__}(start={self.start}, {fields})"
+
+    def __eq__(self, other):
+        stack = [(self, other)]
+        while stack:
+            a, b = stack.pop()
+            if type(a) is not type(b) or a.start != b.start:
+                return False
+            for name, kind in a.FIELDS:
+                x, y = getattr(a, name), getattr(b, name)
+                if kind == "node" or kind == "nodes":
+                    xs, ys = ([x], [y]) if kind == "node" else (x, y)
+                    if len(xs) != len(ys):
+                        return False
+                    for p, q in zip(xs, ys):
+                        if p is None or q is None:
+                            if p is not q:
+                                return False
+                        else:
+                            stack.append((p, q))
+                elif x != y:
+                    return False
+        return True
+
+
+# NAME → IDENT ('.' IDENT)?  (columna, con tabla o alias opcional)
+class Name(Node):
+    FIELDS = (("qualifier", "tok"), ("name", "tok"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# LITERAL → NUMBER | STRING | NULL
+class Literal(Node):
+    FIELDS = (("value", "tok"),)
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# NOT e | '-' e | '+' e
+class Unary(Node):
+    FIELDS = (("op", "tok"), ("operand", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# e op e op e ... con operadores del mismo nivel (len(ops) == len(operands) - 1)
+class Chain(Node):
+    FIELDS = (("ops", "toks"), ("operands", "nodes"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# e (= | <> | < | > | <= | >=) e
+class Compare(Node):
+    FIELDS = (("op", "tok"), ("left", "node"), ("right", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# e NOT? IN '(' e (',' e)* ')'
+class InList(Node):
+    FIELDS = (("operand", "node"), ("negated", "tok"), ("items", "nodes"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# ASSIGN → IDENT '=' EXPR
+class Assign(Node):
+    FIELDS = (("column", "tok"), ("value", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# COLDEF → IDENT TYPE ('(' NUMBER ')')? (PRIMARY KEY)?
+class ColDef(Node):
+    FIELDS = (("name", "tok"), ("type", "tok"), ("size", "tok"), ("primary", "tok"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# JOIN → (INNER | LEFT OUTER? | RIGHT OUTER?)? JOIN IDENT IDENT? ON EXPR
+class Join(Node):
+    FIELDS = (("kind", "tok"), ("table", "tok"), ("alias", "tok"), ("on", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# VALUES → ROW (',' ROW)*, ROW → '(' LITERAL (',' LITERAL)* ')'
+# `values`: literales de todas las filas seguidos; `runs`: RowRun en orden (reparten
+# `values` entre las filas); `stats`: ColumnStats por posición (sólo en modo agregado,
+# entonces `values` queda vacío)
+class Rows(Node):
+    FIELDS = (("values", "tokarray"), ("runs", "nodes"), ("stats", "nodes"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# `count` filas seguidas con `width` valores; start = primer literal del tramo
+class RowRun(Node):
+    FIELDS = (("width", "int"), ("count", "int"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+# Literales de una columna de VALUES: nº por clase, primer literal de cada clase, string
+# más largo y número menor/mayor; start = primer literal de la columna
+class ColumnStats(Node):
+    FIELDS = (("nulls", "int"), ("ints", "int"), ("floats", "int"), ("strings", "int"), ("first_int", "tok"),
+              ("first_float", "tok"), ("first_string", "tok"), ("longest", "tok"), ("min", "tok"), ("max", "tok"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class SelectStmt(Node):
+    FIELDS = (("star", "tok"), ("columns", "nodes"), ("table", "tok"), ("alias", "tok"), ("joins", "nodes"),
+              ("where", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class InsertStmt(Node):
+    FIELDS = (("table", "tok"), ("columns", "toks"), ("rows", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class UpdateStmt(Node):
+    FIELDS = (("table", "tok"), ("assigns", "nodes"), ("where", "node"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class CreateStmt(Node):
+    FIELDS = (("table", "tok"), ("coldefs", "nodes"))
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+NODE_TYPES = {cls.__name__: cls for cls in (SelectStmt, InsertStmt, UpdateStmt, CreateStmt, Join, Rows, RowRun,
+                                            ColumnStats, Assign, ColDef, Name, Literal, Unary, Chain, Compare,
+                                            InList)}
+_CODES = {cls: code for code, cls in enumerate(NODE_TYPES.values())}
+_CLASSES = list(NODE_TYPES.values())
+
+
+def _tok(i, tokens):
+    if i is None or tokens is None:
+        return i
+    return [i, tokens[i].value]
+
+
+def _scalar(value, kind, tokens):
+    # campo que no es un nodo, en su forma JSON
+    if kind == "int":
+        return value
+    if kind == "tok":
+        return _tok(value, tokens)
+    return [_tok(i, tokens) for i in value]
+
+
+def to_dict(node, tokens=None):
+    root = {}
+    stack = [(node, root)]
+    while stack:
+        node, out = stack.pop()
+        out["node"], out["start"] = type(node).__name__, node.start
+        for name, kind in node.FIELDS:
+            value = getattr(node, name)
+            if kind == "node":
+                out[name] = None if value is None else {}
+                if value is not None:
+                    stack.append((value, out[name]))
+            elif kind == "nodes":
+                out[name] = [None if n is None else {} for n in value]
+                stack.extend((n, d) for n, d in zip(value, out[name]) if n is not None)
+            else:
+                out[name] = _scalar(value, kind, tokens)
+    return root
+
+
+def _json_list(nodes):
+    # '[', nodos (o "null") separados por ',' y ']' para la pila de dumps_json
+    parts = ["["]
+    for k, n in enumerate(nodes):
+        if k:
+            parts.append(",")
+        parts.append("null" if n is None else n)
+    parts.append("]")
+    return parts
+
+
+def dumps_json(stmts, tokens=None):
+    # mismo texto que json.dumps de to_dict, escrito con una pila de trozos de texto y nodos
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    out, stack = [], _json_list(stmts)[::-1]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        parts = [f'{{"node":"{type(item).__name__}","start":{encode(item.start)}']
+        for name, kind in item.FIELDS:
+            value = getattr(item, name)
+            parts.append(f',"{name}":')
+            if kind == "node":
+                parts.append("null" if value is None else value)
+            elif kind == "nodes":
+                parts.extend(_json_list(value))
+            else:
+                parts.append(encode(_scalar(value, kind, tokens)))
+        parts.append("}")
+        stack.extend(reversed(parts))
+    return "".join(out)
+
+
+def _encode(node, out):
+    # la pila guarda nodos por codificar y trozos ya codificados (listas o arrays de int)
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, Node):
+            out.extend(item)
+            continue
+        parts, ints = [], [_CODES[type(item)], -1 if item.start is None else item.start]
+        for name, kind in item.FIELDS:
+            value = getattr(item, name)
+            if kind == "tok" or kind == "int":
+                ints.append(-1 if value is None else value)
+            elif kind == "toks" or kind == "tokarray":
+                ints.append(len(value))
+                parts += (ints, value)
+                ints = []
+            else:
+                children = [value] if kind == "node" else value
+                if kind == "nodes":
+                    ints.append(len(value))
+                for child in children:
+                    if child is None:
+                        ints.append(-1)
+                    else:
+                        parts += (ints, child)
+                        ints = []
+        parts.append(ints)
+        stack.extend(reversed(parts))
+
+
+def dumps_binary(stmts):
+    out = array("i")
+    out.append(len(stmts))
+    for stmt in stmts:
+        _encode(stmt, out)
+    if out.itemsize != 4:
+        raise ValueError("array('i') debe ser de 32 bits")
+    if struct.pack("=i", 1) != struct.pack("<i", 1):
+        out.byteswap()
+    return BINARY_MAGIC + bytes([BINARY_VERSION]) + out.tobytes()
+
+
+def _new_node(data, pos):
+    return _CLASSES[data[pos]](None if data[pos + 1] < 0 else data[pos + 1])
+
+
+def _decode(data, pos):
+    # pila de [nodo, nº de campo, hijos que faltan del campo "nodes" (-1: sin leer)]
+    top = _new_node(data, pos)
+    pos += 2
+    stack = [[top, 0, -1]]
+    while stack:
+        frame = stack[-1]
+        node, k, left = frame
+        if k == len(node.FIELDS):
+            stack.pop()
+            continue
+        name, kind = node.FIELDS[k]
+        if kind == "tok" or kind == "int":
+            setattr(node, name, None if data[pos] < 0 else data[pos])
+            pos += 1
+            frame[1] += 1
+        elif kind == "toks" or kind == "tokarray":
+            n = data[pos]
+            part = data[pos + 1:pos + 1 + n]
+            setattr(node, name, part if kind == "tokarray" else part.tolist())
+            pos += 1 + n
+            frame[1] += 1
+        else:
+            if kind == "node":
+                frame[1] += 1
+            else:
+                if left < 0:
+                    left, pos = data[pos], pos + 1
+                if left == 0:
+                    frame[1], frame[2] = k + 1, -1
+                    continue
+                frame[2] = left - 1
+            if data[pos] < 0:
+                child, pos = None, pos + 1
+            else:
+                child = _new_node(data, pos)
+                pos += 2
+                stack.append([child, 0, -1])
+            if kind == "node":
+                setattr(node, name, child)
+            else:
+                getattr(node, name).append(child)
+    return top, pos
+
+
+def loads_binary(blob):
+    if blob[:4] != BINARY_MAGIC or blob[4] != BINARY_VERSION:
+        raise ValueError("Formato binario de AST no reconocido")
+    data = array("i")
+    data.frombytes(blob[5:])
+    if struct.pack("=i", 1) != struct.pack("<i", 1):
+        data.byteswap()
+    stmts, pos = [], 1
+    for _ in range(data[0]):
+        stmt, pos = _decode(data, pos)
+        stmts.append(stmt)
+    return stmts
@@ -0,0 +1,185 @@
+import mmap
+import re
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+
+from .lexer import Lexer, TokenType, CODES, CODE_NAMES, WordPool
+from .tokenbuffer import TokenBuffer, TYPE_CODES, CODE_OF
+from .lineindex import UTF8_CHAR, char_count
+
+# Lexer sobre bytes UTF-8 (p. ej. un archivo subido mapeado con mmap) sin decodificar
+# el texto completo.
+#
+# Exporta:
+#  - ByteLexer(data, line=1, col=1).tokenize_buffer(): mismos tokens y posiciones que
+#    `Lexer(data.decode("utf-8", "replace")).tokenize_buffer()`, pero `data` puede ser
+#    bytes, bytearray o mmap
+#  - ByteTokenBuffer: TokenBuffer cuyos offsets son de bytes; `value(i)` decodifica sólo
+#    el lexema pedido (los identificadores pasan por el WordPool con la grafía en bytes)
+#  - lexer_for(data, line=, col=): Lexer si `data` es str, ByteLexer si son bytes
+#  - mapped(path): context manager que devuelve el archivo mapeado en memoria (sólo
+#    lectura; b"" si está vacío, porque mmap no admite longitud 0)
+#
+# Notas:
+#  - `token_regex` es el de Lexer traducido a bytes con los mismos grupos. `\s` y `\d`
+#    de un regex str son Unicode, así que se añaden las secuencias UTF-8 de los espacios
+#    y dígitos no ASCII para que p. ej. U+00A0 separe tokens y '١٢' sea NUMBER igual que
+#    en el lexer de texto. Esos caracteres están precalculados (_WS_RANGES, _DIGIT_RANGES)
+#    para la versión de Unicode de _UNICODE_VERSION; con otra se recalculan al importar.
+#  - La columna cuenta caracteres, no bytes: si el archivo tiene bytes no ASCII, el
+#    ancho de espacios, comentarios, números y strings se mide decodificando ese lexema.
+#    Un archivo ASCII (lo habitual) usa directamente los offsets.
+#  - Un carácter no reconocido se emite como SYMBOL de una secuencia UTF-8 completa o,
+#    si es inválida, del "máximo prefijo válido" que `decode(errors="replace")` convierte
+#    en un solo U+FFFD, así que incluso los bytes inválidos dan las mismas columnas.
+#  - Códigos de palabra/símbolo como en Lexer: las grafías en bytes se clasifican con el
+#    WordPool (comparten entrada con la misma grafía en texto) y símbolos y operadores
+#    con `_BYTE_CODES`, sin decodificar.
+
+
+def _utf8_alternatives(chars):
+    # secuencias UTF-8 de `chars` agrupadas por prefijo: (?:\xc2[\x85\xa0]|\xe2\x80[...]|...)
+    by_prefix = defaultdict(list)
+    for ch in chars:
+        enc = ch.encode("utf-8")
+        by_prefix[enc[:-1]].append(enc[-1])
+    alts = [re.escape(prefix) + b"[" + b"".join(b"\\x%02x" % b for b in sorted(last)) + b"]"
+            for prefix, last in sorted(by_prefix.items())]
+    return b"(?:" + b"|".join(alts) + b")"
+
+
+def _unicode_chars(ranges, pattern):
+    # caracteres no ASCII que reconoce `pattern` (\s o \d en un regex str): de la tabla
+    # si la base Unicode es la de _UNICODE_VERSION y, si no, recorriéndola
+    if unicodedata.unidata_version != _UNICODE_VERSION:
+        return re.findall(pattern, "".join(map(chr, range(0x80, 0x20000))))
+    return [chr(c) for lo, hi in ranges for c in range(lo, hi + 1)]
+
+
+# `\s` y `\d` no ASCII de la base Unicode de Python (str.isspace / str.isdecimal), como
+# rangos de puntos de código: recorrer los 130k caracteres al importar costaba decenas
+# de ms en cada proceso (workers, CLI).
+_UNICODE_VERSION = "14.0.0"
+_WS_RANGES = ((0x85, 0x85), (0xA0, 0xA0), (0x1680, 0x1680), (0x2000, 0x200A), (0x2028, 0x2029),
+              (0x202F, 0x202F), (0x205F, 0x205F), (0x3000, 0x3000))
+_DIGIT_RANGES = ((0x660, 0x669), (0x6F0, 0x6F9), (0x7C0, 0x7C9), (0x966, 0x96F), (0x9E6, 0x9EF),
+                 (0xA66, 0xA6F), (0xAE6, 0xAEF), (0xB66, 0xB6F), (0xBE6, 0xBEF), (0xC66, 0xC6F),
+                 (0xCE6, 0xCEF), (0xD66, 0xD6F), (0xDE6, 0xDEF), (0xE50, 0xE59), (0xED0, 0xED9),
+                 (0xF20, 0xF29), (0x1040, 0x1049), (0x1090, 0x1099), (0x17E0, 0x17E9),
+                 (0x1810, 0x1819), (0x1946, 0x194F), (0x19D0, 0x19D9), (0x1A80, 0x1A89),
+                 (0x1A90, 0x1A99), (0x1B50, 0x1B59), (0x1BB0, 0x1BB9), (0x1C40, 0x1C49),
+                 (0x1C50, 0x1C59), (0xA620, 0xA629), (0xA8D0, 0xA8D9), (0xA900, 0xA909),
+                 (0xA9D0, 0xA9D9), (0xA9F0, 0xA9F9), (0xAA50, 0xAA59), (0xABF0, 0xABF9),
+                 (0xFF10, 0xFF19), (0x104A0, 0x104A9), (0x10D30, 0x10D39), (0x11066, 0x1106F),
+                 (0x110F0, 0x110F9), (0x11136, 0x1113F), (0x111D0, 0x111D9), (0x112F0, 0x112F9),
+                 (0x11450, 0x11459), (0x114D0, 0x114D9), (0x11650, 0x11659), (0x116C0, 0x116C9),
+                 (0x11730, 0x11739), (0x118E0, 0x118E9), (0x11950, 0x11959), (0x11C50, 0x11C59),
+                 (0x11D50, 0x11D59), (0x11DA0, 0x11DA9), (0x16A60, 0x16A69), (0x16AC0, 0x16AC9),
+                 (0x16B50, 0x16B59), (0x1D7CE, 0x1D7FF), (0x1E140, 0x1E149), (0x1E2F0, 0x1E2F9),
+                 (0x1E950, 0x1E959), (0x1FBF0, 0x1FBF9))
+
+_WS = _utf8_alternatives(_unicode_chars(_WS_RANGES, r"\s"))
+_DIGIT = b"(?:[0-9]|" + _utf8_alternatives(_unicode_chars(_DIGIT_RANGES, r"\d")) + b")"
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_BYTE_CODES = {v.encode("ascii"): k for v, k in CODES.items()}
+
+
+class ByteTokenBuffer(TokenBuffer):
+    def value(self, i) -> str:
+        code = self.codes[i]
+        if code:
+            return CODE_NAMES[code]
+        tt = TYPE_CODES[self.types[i]]
+        if tt == TokenType.EOF:
+            return ""
+        raw = self.source[self.starts[i]:self.ends[i]]
+        if tt == TokenType.IDENT:
+            return self.pool[raw][1]
+        return raw.decode("utf-8", errors="replace")
+
+
+class ByteLexer:
+    token_regex = re.compile(
+        rb"(?:[ \t\n\r\x0b\x0c\x1c-\x1f]|" + _WS + rb")+|"   # espacios (también Unicode)
+        rb"(--[^\n]*)|"                                       # comentarios línea -- ...
+        rb"([A-Za-z_][A-Za-z0-9_]*)|"                         # ident o resword
+        rb"(" + _DIGIT + rb"+(?:\." + _DIGIT + rb"+)?)|"      # number
+        rb"('([^']*)')"                                       # 'string'
+        rb"|(\<=|\>=|<>|=|<|>)|"                              # operadores
+        rb"([,;\(\)\*\.\+\-/])"                               # símbolos
+    )
+
+    def __init__(self, data, line: int = 1, col: int = 1, pool=None):
+        self.data = data
+        self.line = line
+        self.col = col
+        self.pool = WordPool() if pool is None else pool
+
+    def tokenize_buffer(self):
+        data, n, i = self.data, len(self.data), 0
+        buf = ByteTokenBuffer(data, self.line, self.col, self.pool)
+        add_newlines = buf.line_index.add_newlines
+        rx, pool = self.token_regex, self.pool
+        ascii_only = _NON_ASCII.search(data) is None
+        c_res, c_ident, c_sym = CODE_OF[TokenType.RESWORD], CODE_OF[TokenType.IDENT], CODE_OF[TokenType.SYMBOL]
+        by_group = {3: CODE_OF[TokenType.NUMBER], 4: CODE_OF[TokenType.STRING],
+                    6: CODE_OF[TokenType.OP], 7: c_sym}
+        while i < n:
+            m = rx.match(data, i)
+            if not m:
+                # carácter no reconocido (una secuencia UTF-8)
+                j = UTF8_CHAR.match(data, i).end()
+                buf.append(c_sym, i, j, self.line, self.col)
+                i = j
+                self.col += 1
+                continue
+            j = m.end()
+            g = m.lastindex
+            if ascii_only or g == 2 or g == 6 or g == 7:
+                width = j - i
+                nl = data.rfind(b"\n", i, j) if g is None or g == 4 else -1
+                if nl >= 0:
+                    self.line += add_newlines(i, j)
+                    self.col = j - nl
+                else:
+                    self.col += width
+            else:
+                raw = data[i:j]
+                width = char_count(raw)
+                nl = raw.rfind(b"\n")
+                if nl >= 0:
+                    self.line += add_newlines(i, j)
+                    self.col = 1 + char_count(raw[nl + 1:])
+                else:
+                    self.col += width
+            if g is not None and g != 1:
+                if g == 2:
+                    word = pool[data[i:j]][0]
+                    buf.append(c_res if word else c_ident, i, j, self.line, self.col - width, word)
+                else:
+                    buf.append(by_group[g], i, j, self.line, self.col - width,
+                               _BYTE_CODES[data[i:j]] if g >= 6 else 0)
+            i = j
+        buf.append(CODE_OF[TokenType.EOF], n, n, self.line, self.col)
+        return buf
+
+
+def lexer_for(data, **kwargs):
+    # Lexer para texto, ByteLexer para bytes/mmap
+    return Lexer(data, **kwargs) if isinstance(data, str) else ByteLexer(data, **kwargs)
+
+
+@contextmanager
+def mapped(path):
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            yield b""
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
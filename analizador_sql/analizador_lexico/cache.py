@@ -0,0 +1,164 @@
+import hashlib
+import mmap
+import os
+import shutil
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+from .analysis import ANALYSIS_VERSION, RESULT_FORMAT
+
+# Caché de resultados de análisis indexada por contenido.
+#
+# Exporta:
+#  - ResultCache: get()/set() de resultados serializados (dict de analysis.analyze_source)
+#  - result_cache: instancia compartida usada por las vistas
+#
+# Notas:
+#  - Clave = blake2b(bytes subidos) + ANALYSIS_VERSION: al cambiar lexer o gramática
+#    las entradas antiguas dejan de coincidir. Además, un resultado cuyo `format` no es
+#    analysis.RESULT_FORMAT cuenta como fallo: una entrada antigua nunca llega a las
+#    vistas con claves que falten.
+#  - Niveles: los alias de `settings.ANALIZADOR_CACHE_ALIASES` en orden (p. ej. LocMem
+#    con LRU/TTL y luego FileBasedCache en disco). Un acierto en un nivel inferior se
+#    copia a los superiores. Sin alias configurados se usa un FileBasedCache local en
+#    `settings.ANALIZADOR_CACHE_DIR`.
+#  - `result_id` (el digest) identifica un resultado en las URLs de paginación;
+#    el archivo fuente se guarda aparte (`set_source`) tal cual en
+#    `settings.ANALIZADOR_SOURCE_DIR`, uno por clave: los bytes de una subida pequeña se
+#    escriben y un archivo que ya está en disco se enlaza (subida temporal de Django) o
+#    se mueve (archivo de un job), sin leerlo en memoria ni serializarlo. `get_source`
+#    lo devuelve mapeado con mmap. Se conservan los ANALIZADOR_SOURCE_MAX_FILES usados
+#    más recientemente.
+#  - Los contadores de aciertos/fallos son por proceso.
+
+
+class ResultCache:
+    def __init__(self, aliases=None):
+        self._aliases = aliases
+        self._backends = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backends(self):
+        if self._backends is None:
+            aliases = self._aliases
+            if aliases is None:
+                aliases = getattr(settings, "ANALIZADOR_CACHE_ALIASES", [])
+            backends = [caches[a] for a in aliases if a in settings.CACHES]
+            if not backends:
+                location = getattr(settings, "ANALIZADOR_CACHE_DIR", settings.BASE_DIR / ".cache_analisis")
+                backends = [FileBasedCache(str(location), {"TIMEOUT": 24 * 3600, "OPTIONS": {"MAX_ENTRIES": 500}})]
+            self._backends = backends
+        return self._backends
+
+    @staticmethod
+    def result_id(raw: bytes) -> str:
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    @staticmethod
+    def key(result_id: str) -> str:
+        return f"analisis:{ANALYSIS_VERSION}:{result_id}"
+
+    def key_for(self, raw: bytes) -> str:
+        return self.key(self.result_id(raw))
+
+    @staticmethod
+    def _current(result):
+        return result if isinstance(result, dict) and result.get("format") == RESULT_FORMAT else None
+
+    def peek(self, key):
+        # como get() pero sin tocar los contadores (consultas de paginación)
+        for backend in self.backends:
+            result = self._current(backend.get(key))
+            if result is not None:
+                return result
+        return None
+
+    @staticmethod
+    def _source_path(key):
+        directory = getattr(settings, "ANALIZADOR_SOURCE_DIR", settings.BASE_DIR / ".cache_fuentes")
+        return os.path.join(str(directory), key.replace(":", "-") + ".sql")
+
+    def set_source(self, key, data=None, path=None, move=False):
+        # `data`: str o bytes; `path`: archivo en disco que se enlaza (o mueve con `move`)
+        dest = self._source_path(key)
+        if os.path.exists(dest):
+            return
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+        if path is None:
+            with open(tmp, "wb") as f:
+                f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        elif move:
+            shutil.move(path, tmp)
+        else:
+            try:
+                os.link(path, tmp)
+            except OSError:  # otro sistema de archivos
+                shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+        self._prune(os.path.dirname(dest))
+
+    @staticmethod
+    def _prune(directory):
+        keep = getattr(settings, "ANALIZADOR_SOURCE_MAX_FILES", 500)
+        entries = [e for e in os.scandir(directory) if e.name.endswith(".sql")]
+        if len(entries) <= keep:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:len(entries) - keep]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+
+    def get_source(self, key):
+        # mmap de sólo lectura (b"" si está vacío) o None si ya no está
+        path = self._source_path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            os.utime(f.fileno())  # usado recientemente: _prune lo conserva
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return b""
+
+    def get(self, key):
+        for level, backend in enumerate(self.backends):
+            result = self._current(backend.get(key))
+            if result is not None:
+                for upper in self.backends[:level]:
+                    upper.set(key, result)
+                with self._lock:
+                    self.hits += 1
+                return result
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, result):
+        for backend in self.backends:
+            backend.set(key, result)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "backends": [type(b).__name__ for b in self.backends],
+        }
+
+
+result_cache = ResultCache()
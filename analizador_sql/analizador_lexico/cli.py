@@ -0,0 +1,185 @@
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+from .analysis import analyze_source, ANALYSIS_VERSION
+from .bytelexer import mapped
+
+# Análisis por lotes desde la línea de comandos, sin Django (pre-commit, CI).
+#
+# Uso (desde analizador_sql/):
+#   python -m analizador_lexico.cli RUTA... [--pattern '*.sql'] [--workers N]
+#                                   [--format ndjson|junit] [-o salida]
+#   python manage.py analyze_sql RUTA... (mismas opciones, ver management/commands)
+#
+# Exporta:
+#  - add_arguments(parser): opciones comunes (también las usa el comando de manage.py)
+#  - collect(paths, pattern): archivos a analizar a partir de archivos, directorios y globs
+#  - run(args, out): analiza y escribe el informe en `out` (o en `args.output`); devuelve
+#    el código de salida
+#  - main(argv): punto de entrada de `python -m analizador_lexico.cli`
+#
+# Notas:
+#  - Los directorios se recorren recursivamente buscando `--pattern` (por defecto *.sql)
+#    y se saltan los ocultos (.git, .jobs, ...). Los globs admiten `**`. El orden es el
+#    de los argumentos y, dentro de cada uno, alfabético (en un directorio, sus archivos
+#    antes que los subdirectorios); una ruta repetida se analiza una vez.
+#  - Cada archivo se analiza mapeado en memoria (bytelexer.mapped) con
+#    analysis.analyze_source en un ProcessPoolExecutor de `--workers` procesos (por
+#    defecto, uno por CPU; con 1 no se lanzan procesos). Los resultados salen en el orden
+#    de entrada a medida que terminan.
+#  - NDJSON: una línea {"event": "file", ...} por archivo (path, ok, error_count, errors
+#    como [línea, col, mensaje], truncated si se alcanzó errors.MAX_ERRORS, statements,
+#    ms) y al final {"event": "summary", ...}. JUnit XML: un testcase por archivo con un
+#    <failure> que lista los errores; la cabecera lleva los totales, así que se escribe
+#    al terminar.
+#  - Código de salida: 0 sin errores, 1 si algún archivo tiene errores, 2 si no se
+#    encontró ningún archivo o alguno no se pudo leer (y uso incorrecto, vía argparse).
+
+EXIT_OK, EXIT_ERRORS, EXIT_FAILURE = 0, 1, 2
+
+
+def add_arguments(ap):
+    ap.add_argument("paths", nargs="+", metavar="RUTA", help="archivos, directorios o globs")
+    ap.add_argument("--pattern", default="*.sql", help="archivos a buscar en los directorios (por defecto *.sql)")
+    ap.add_argument("--workers", type=int, default=None, help="procesos en paralelo (por defecto, nº de CPUs)")
+    ap.add_argument("--format", choices=("ndjson", "junit"), default="ndjson", help="formato de salida")
+    ap.add_argument("-o", "--output", help="archivo de salida (por defecto stdout)")
+
+
+def _walk(root, pattern):
+    for base, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                yield os.path.join(base, name)
+
+
+def collect(paths, pattern="*.sql"):
+    # -> (archivos, rutas que no existen o globs sin coincidencias)
+    found, missing, seen = [], [], set()
+    for path in paths:
+        if any(c in path for c in "*?["):
+            matches = sorted(glob.glob(path, recursive=True))
+        else:
+            matches = [path] if os.path.exists(path) else []
+        if not matches:
+            missing.append(path)
+        for m in matches:
+            for f in (_walk(m, pattern) if os.path.isdir(m) else (m,)):
+                key = os.path.normpath(f)
+                if key not in seen:
+                    seen.add(key)
+                    found.append(f)
+    return found, missing
+
+
+def _analyze_path(path):
+    t = time.perf_counter()
+    try:
+        with mapped(path) as data:
+            result = analyze_source(data, parallel=False)
+    except OSError as exc:
+        return {"path": path, "ok": False, "failure": f"{type(exc).__name__}: {exc.strerror or exc}"}
+    rows = result["error_rows"]
+    return {
+        "path": path,
+        "ok": not rows,
+        "error_count": len(rows),
+        "errors": rows,
+        "truncated": len(result["errors"]) > len(rows),
+        "statements": sum(s["count"] for s in result["metrics"]["statements"].values()),
+        "ms": round((time.perf_counter() - t) * 1000, 3),
+    }
+
+
+def _results(paths, workers):
+    if workers <= 1 or len(paths) <= 1:
+        yield from map(_analyze_path, paths)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        yield from pool.map(_analyze_path, paths)
+
+
+def _junit(results, totals):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield (f'<testsuites name="analizador_sql" tests="{totals["files"]}" failures="{totals["with_errors"]}" '
+           f'errors="{totals["failed"]}" time="{totals["ms"] / 1000:.3f}">\n')
+    yield (f'  <testsuite name="analizador_sql" tests="{totals["files"]}" failures="{totals["with_errors"]}" '
+           f'errors="{totals["failed"]}" time="{totals["ms"] / 1000:.3f}">\n')
+    yield f'    <properties><property name="version" value={quoteattr(ANALYSIS_VERSION)}/></properties>\n'
+    for r in results:
+        seconds = r.get("ms", 0) / 1000
+        head = f'    <testcase classname="analizador_sql" name={quoteattr(r["path"])} time="{seconds:.3f}"'
+        if "failure" in r:
+            yield f'{head}>\n      <error message={quoteattr(r["failure"])}/>\n    </testcase>\n'
+        elif r["errors"]:
+            text = "\n".join(f"L{line}:C{col} - {message}" for line, col, message in r["errors"])
+            if r["truncated"]:
+                text += "\n(se omitieron errores: límite por archivo)"
+            yield (f'{head}>\n      <failure message={quoteattr(str(r["error_count"]) + " errores")} type="SQLError">'
+                   f'{escape(text)}</failure>\n    </testcase>\n')
+        else:
+            yield f'{head}/>\n'
+    yield '  </testsuite>\n</testsuites>\n'
+
+
+def run(args, out):
+    paths, missing = collect(args.paths, args.pattern)
+    for path in missing:
+        print(f"No existe o no hay coincidencias: {path}", file=sys.stderr)
+    if not paths:
+        print("No se encontraron archivos que analizar.", file=sys.stderr)
+        return EXIT_FAILURE
+
+    own = args.output is not None
+    if own:
+        out = open(args.output, "w", encoding="utf-8")
+    totals = {"files": 0, "with_errors": 0, "failed": 0, "errors": 0, "ms": 0.0}
+    kept = []  # JUnit: resultados hasta conocer los totales
+    try:
+        for r in _results(paths, args.workers or os.cpu_count() or 1):
+            totals["files"] += 1
+            totals["ms"] += r.get("ms", 0)
+            if "failure" in r:
+                totals["failed"] += 1
+            elif r["errors"]:
+                totals["with_errors"] += 1
+                totals["errors"] += r["error_count"]
+            if args.format == "junit":
+                kept.append(r)
+            else:
+                out.write(json.dumps({"event": "file", **r}, ensure_ascii=False) + "\n")
+                out.flush()
+        if args.format == "junit":
+            out.writelines(_junit(kept, totals))
+        else:
+            out.write(json.dumps({"event": "summary", "version": ANALYSIS_VERSION, "missing": missing,
+                                  **totals, "ms": round(totals["ms"], 3)}, ensure_ascii=False) + "\n")
+        out.flush()
+    finally:
+        if own:
+            out.close()
+
+    print(f"{totals['files']} archivos, {totals['with_errors']} con errores ({totals['errors']} errores), "
+          f"{totals['failed']} sin leer", file=sys.stderr)
+    if totals["failed"] or missing:
+        return EXIT_FAILURE
+    return EXIT_ERRORS if totals["with_errors"] else EXIT_OK
+
+
+def main(argv):
+    ap = argparse.ArgumentParser(prog="python -m analizador_lexico.cli",
+                                 description="Analiza archivos .sql sin Django y sale con 1 si hay errores")
+    add_arguments(ap)
+    return run(ap.parse_args(argv[1:]), sys.stdout)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,241 @@
+from .lexer import Token, TokenType, RESWORDS, SYMBOLS, OPS, CODES, CODE_NAMES
+
+# Backend del lexer basado en un AFD (autómata finito determinista) por tablas.
+#
+# Exporta:
+#  - DFA: autómata compilado a partir de las clases de token del lexer
+#    (RESWORDS, SYMBOLS, OPS, números, strings, comentarios y espacios)
+#  - scan(lexer, text, i, final): generador con el mismo contrato que `Lexer._scan`
+#
+# Construcción:
+#  1. Cada carácter relevante tiene una clase "cruda" (cada letra, cada símbolo,
+#     cada carácter de operador, dígito, comilla, guion, espacio, salto de línea...).
+#  2. Se crean los estados: trie case-insensitive de RESWORDS (acepta RESWORD con
+#     su código de lexer.CODES, sin `.upper()`), identificador genérico, número con parte
+#     decimal opcional, string, comentario `--`, espacios y trie de OPS/SYMBOLS.
+#  3. Se fusionan las clases cuyas columnas son idénticas en toda la tabla y se
+#     genera la tabla de clases de byte (ASCII) usada con `str.translate`.
+#
+# El escaneo es "maximal munch": se avanza hasta el estado muerto y se retrocede al
+# último estado de aceptación. Si no hay ninguno el carácter se emite como SYMBOL,
+# igual que el backend regex. Línea/columna se calculan con los saltos de línea
+# vistos dentro del lexema aceptado, replicando exactamente las posiciones del regex.
+# Los estados que aceptan una palabra reservada, un operador o un símbolo guardan su
+# código (`code`) y el valor es el de CODE_NAMES; los identificadores se internan en el
+# WordPool del lexer, como en el backend regex.
+
+SKIP = "SKIP"
+
+# caracteres de símbolo con clase propia; '-' tiene la clase DASH (también empieza `--`)
+SYMBOL_CHARS = sorted(SYMBOLS - {'-'})
+
+
+def _raw_classes():
+    raw = {}
+    names = ["OTHER", "NL", "WS", "ADIGIT", "UDIGIT", "QUOTE", "DASH", "UNDERSCORE"]
+    names += [f"L_{c}" for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+    names += [f"C_{c}" for c in sorted(set("".join(OPS)) | set(SYMBOL_CHARS))]
+    for k, n in enumerate(names):
+        raw[n] = k
+    return raw
+
+
+class DFA:
+    def __init__(self):
+        raw = self._raw = _raw_classes()
+        self.delta = []         # delta[estado] = {clase_cruda: siguiente}
+        self.accept = []        # TokenType, SKIP o None
+        self.code = []          # código (lexer.CODES) de RESWORD/OP/SYMBOL o 0
+        start = self._state()
+
+        letters = [f"L_{c}" for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+        ident_cont = letters + ["UNDERSCORE", "ADIGIT"]
+
+        # identificador genérico
+        s_id = self._state(TokenType.IDENT)
+        for c in ident_cont:
+            self.delta[s_id][raw[c]] = s_id
+        self.delta[start][raw["UNDERSCORE"]] = s_id
+
+        # trie de palabras reservadas
+        nodes = {"": start}
+        for kw in sorted(RESWORDS):
+            for k in range(1, len(kw) + 1):
+                prefix = kw[:k]
+                if prefix not in nodes:
+                    acc = TokenType.RESWORD if prefix in RESWORDS else TokenType.IDENT
+                    nodes[prefix] = self._state(acc, CODES[prefix] if prefix in RESWORDS else 0)
+                    for c in ident_cont:
+                        self.delta[nodes[prefix]][raw[c]] = s_id
+                self.delta[nodes[kw[:k - 1]]][raw[f"L_{kw[k - 1]}"]] = nodes[prefix]
+        for c in letters:
+            self.delta[start].setdefault(raw[c], s_id)
+
+        # números: \d+(\.\d+)?
+        s_int = self._state(TokenType.NUMBER)
+        s_dot = self._state()
+        s_frac = self._state(TokenType.NUMBER)
+        for d in ("ADIGIT", "UDIGIT"):
+            self.delta[start][raw[d]] = s_int
+            self.delta[s_int][raw[d]] = s_int
+            self.delta[s_dot][raw[d]] = s_frac
+            self.delta[s_frac][raw[d]] = s_frac
+        self.delta[s_int][raw["C_."]] = s_dot
+
+        # strings: '[^']*'
+        s_str = self._state()
+        s_str_end = self._state(TokenType.STRING)
+        self.delta[start][raw["QUOTE"]] = s_str
+        for k in raw.values():
+            self.delta[s_str][k] = s_str_end if k == raw["QUOTE"] else s_str
+
+        # comentarios: --[^\n]* ('-' solo es un símbolo)
+        s_dash = self._state(TokenType.SYMBOL, CODES['-'])
+        s_com = self._state(SKIP)
+        self.delta[start][raw["DASH"]] = s_dash
+        self.delta[s_dash][raw["DASH"]] = s_com
+        for k in raw.values():
+            if k != raw["NL"]:
+                self.delta[s_com][k] = s_com
+
+        # espacios: \s+
+        s_ws = self._state(SKIP)
+        for c in ("WS", "NL"):
+            self.delta[start][raw[c]] = s_ws
+            self.delta[s_ws][raw[c]] = s_ws
+
+        # operadores (trie) y símbolos de un carácter
+        ops = {"": start}
+        for op in sorted(OPS, key=len):
+            for k in range(1, len(op) + 1):
+                prefix = op[:k]
+                if prefix not in ops:
+                    ops[prefix] = self._state(*((TokenType.OP, CODES[prefix]) if prefix in OPS else ()))
+                self.delta[ops[op[:k - 1]]][raw[f"C_{op[k - 1]}"]] = ops[prefix]
+        for c in SYMBOL_CHARS:
+            self.delta[start].setdefault(raw[f"C_{c}"], self._state(TokenType.SYMBOL, CODES[c]))
+
+        self._compile()
+
+    def _state(self, accept=None, code=0):
+        self.delta.append({})
+        self.accept.append(accept)
+        self.code.append(code)
+        return len(self.delta) - 1
+
+    def _compile(self):
+        # fusiona clases crudas con columnas idénticas y aplana la tabla
+        nraw = len(self._raw)
+        cols = {}
+        self.raw_to_class = []
+        for k in range(nraw):
+            col = tuple(d.get(k, -1) for d in self.delta)
+            self.raw_to_class.append(cols.setdefault(col, len(cols)))
+        self.nclasses = len(cols)
+        self.table = [-1] * (len(self.delta) * self.nclasses)
+        for s, d in enumerate(self.delta):
+            for k, nxt in d.items():
+                self.table[s * self.nclasses + self.raw_to_class[k]] = nxt
+        raw = self._raw
+        self.nl_class = self.raw_to_class[raw["NL"]]
+        self.byte_class = [self._classify(chr(o)) for o in range(128)]
+        self.translation = _ClassMap(self)
+
+    def _classify(self, ch):
+        raw = self._raw
+        if ch == "\n":
+            k = raw["NL"]
+        elif ch.isspace():
+            k = raw["WS"]
+        elif "0" <= ch <= "9":
+            k = raw["ADIGIT"]
+        elif ch.isdecimal():
+            k = raw["UDIGIT"]
+        elif ch == "'":
+            k = raw["QUOTE"]
+        elif ch == "-":
+            k = raw["DASH"]
+        elif ch == "_":
+            k = raw["UNDERSCORE"]
+        elif ch.isascii() and ch.isalpha():
+            k = raw[f"L_{ch.upper()}"]
+        elif f"C_{ch}" in raw:
+            k = raw[f"C_{ch}"]
+        else:
+            k = raw["OTHER"]
+        return self.raw_to_class[k]
+
+
+class _ClassMap(dict):
+    # tabla para `str.translate`: ASCII precalculado, resto bajo demanda
+    def __init__(self, dfa):
+        super().__init__((o, chr(c)) for o, c in enumerate(dfa.byte_class))
+        self._dfa = dfa
+
+    def __missing__(self, o):
+        v = self[o] = chr(self._dfa._classify(chr(o)))
+        return v
+
+
+_DFA = None
+
+
+def get_dfa():
+    global _DFA
+    if _DFA is None:
+        _DFA = DFA()
+    return _DFA
+
+
+def scan(lexer, text, i, final):
+    # Mismo contrato que `Lexer._scan`: emite tokens y devuelve la posición del
+    # primer carácter no consumido cuando falta texto (`final` False).
+    dfa = get_dfa()
+    table, ncls, accept, codes, nl = dfa.table, dfa.nclasses, dfa.accept, dfa.code, dfa.nl_class
+    pool = lexer.pool
+    cls = text.translate(dfa.translation)
+    n = len(text)
+    line, col = lexer.line, lexer.col
+    while i < n:
+        state, j = 0, i
+        acc_end, acc_state, acc_nl, acc_last = -1, -1, 0, -1
+        nls, last_nl = 0, -1
+        while j < n:
+            c = ord(cls[j])
+            state = table[state * ncls + c]
+            if state < 0:
+                break
+            if c == nl:
+                nls += 1
+                last_nl = j
+            j += 1
+            if accept[state] is not None:
+                acc_end, acc_state, acc_nl, acc_last = j, state, nls, last_nl
+        if j == n and state >= 0 and not final:
+            # el lexema podría continuar en el siguiente bloque
+            break
+        if acc_end < 0:
+            # carácter no reconocido
+            yield Token(TokenType.SYMBOL, text[i], line, col)
+            i += 1
+            col += 1
+            continue
+        length = acc_end - i
+        if acc_nl:
+            line += acc_nl
+            col = acc_end - acc_last
+        else:
+            col += length
+        kind = accept[acc_state]
+        if kind is not SKIP:
+            code = codes[acc_state]
+            if code:
+                val = CODE_NAMES[code]
+            elif kind is TokenType.IDENT:
+                val = pool[text[i:acc_end]][1]
+            else:
+                val = text[i:acc_end]
+            yield Token(kind, val, line, col - length, code)
+        i = acc_end
+    lexer.line, lexer.col = line, col
+    return i
@@ -3,25 +3,49 @@ from dataclasses import dataclass
 # Definición simple de errores de parsing.
 #
 # - ParseError: dataclass con message, line, col
-# - ErrorLog: acumulador con `add()`, `as_list()`, `has_errors()`
+# - SemanticError: ParseError de la validación contra el esquema (semantic.py); mismo
+#   formato en as_list()/error_rows, distinguible con isinstance
+# - ErrorLog: acumulador con `add()`, `as_list()`, `has_errors()` y `snippets(index)`:
+#   [texto de la línea, marca "   ^"] de cada error a partir de un LineIndex (lineindex.py),
+#   sin necesidad de devolver el archivo completo
+# - MAX_ERRORS: tope de errores guardados por archivo; los siguientes sólo se cuentan
+#   (`dropped`) y `as_list()` termina con un aviso de cuántos se omitieron.
 #
 # Uso: el Parser agrega ParseError a ErrorLog; la vista transforma a lista con as_list().
 
+MAX_ERRORS = 1000
+
 @dataclass
 class ParseError:
     message: str
     line: int
     col: int
 
+@dataclass
+class SemanticError(ParseError):
+    pass
+
 class ErrorLog:
-    def __init__(self):
+    def __init__(self, limit=MAX_ERRORS):
         self.items = []
+        self.limit = limit
+        self.dropped = 0
 
     def add(self, err: ParseError):
+        if len(self.items) >= self.limit:
+            self.dropped += 1
+            return False
         self.items.append(err)
+        return True
 
     def as_list(self):
-        return [f"L{e.line}:C{e.col} - {e.message}" for e in self.items]
+        out = [f"L{e.line}:C{e.col} - {e.message}" for e in self.items]
+        if self.dropped:
+            out.append(f"Se omitieron {self.dropped} errores más (límite de {self.limit} por archivo).")
+        return out
+
+    def snippets(self, index):
+        return [list(index.snippet(e.line, e.col)) for e in self.items]
 
     def has_errors(self):
         return len(self.items) > 0
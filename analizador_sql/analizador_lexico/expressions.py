@@ -0,0 +1,166 @@
+from .lexer import TokenType, CODES
+from .symbols import SymKind
+from .ast_nodes import Name, Literal, Unary, Chain, Compare, InList
+
+# Expresiones (WHERE, ON, lista de SELECT, valor de SET) con precedencia por niveles.
+#
+# Exporta:
+#  - parse_expr(parser): analiza una expresión desde `parser.i` y devuelve su nodo
+#    (ast_nodes) si `parser.ast` no es None, o None; lo usan Parser.expr() y LL1Parser
+#    (no terminal externo `expr` de grammar.py)
+#  - FIRST: claves de predicción (código o TokenType) con las que empieza una expresión
+#  - BINDING: {código: nivel} de los operadores infijos
+#
+# Gramática (de menor a mayor precedencia):
+#   expr → expr OR expr | expr AND expr | NOT expr
+#        | expr (= | <> | < | > | <= | >=) expr | expr NOT? IN '(' expr (',' expr)* ')'
+#        | expr ('+' | '-') expr | expr ('*' | '/') expr | ('-' | '+') expr
+#        | IDENT ('.' IDENT)? | NUMBER | STRING | NULL | '(' expr ')'
+#
+# Notas:
+#  - Precedence climbing iterativo: una pila explícita de marcos (prefijo, operador
+#    infijo, paréntesis, lista de IN) sustituye a la recursión, así que ni un anidamiento
+#    profundo de paréntesis ni una cadena larga de AND/OR dependen del límite de
+#    recursión. Cada vuelta consume un token o desapila un marco: tiempo lineal.
+#  - Asociatividad por la izquierda. Los operadores del mismo nivel de AND, OR, + - y * /
+#    se acumulan en un único marco (nodo Chain); las comparaciones no se encadenan.
+#  - Tabla de símbolos: columnas (COLUMN), tabla o alias de `t.col` (IDENT), literales
+#    (LITERAL), operadores de comparación y aritméticos (OP) y AND/OR/NOT/IN (RESWORD).
+#  - Errores con la recuperación del Parser: un operando que falta registra "Se esperaba
+#    una expresión" sin avanzar y un ')' que falta lo registra `eat()`.
+
+OR, AND, NOT, IN, NULL = (CODES[w] for w in ("OR", "AND", "NOT", "IN", "NULL"))
+LPAREN, RPAREN, COMMA, DOT, MINUS, PLUS = (CODES[c] for c in ("(", ")", ",", ".", "-", "+"))
+
+# niveles de precedencia
+_OR, _AND, _NOT, _CMP, _ADD, _MUL, _SIGN = 1, 2, 3, 4, 5, 6, 7
+CHAINED = frozenset({_OR, _AND, _ADD, _MUL})
+
+BINDING = {OR: _OR, AND: _AND, IN: _CMP, PLUS: _ADD, MINUS: _ADD, CODES["*"]: _MUL, CODES["/"]: _MUL}
+BINDING.update({CODES[op]: _CMP for op in ("=", "<>", "<", ">", "<=", ">=")})
+
+FIRST = frozenset({NOT, LPAREN, MINUS, PLUS, NULL, TokenType.IDENT, TokenType.NUMBER, TokenType.STRING})
+
+# tipos de marco
+_PREFIX, _INFIX, _PAREN, _IN = range(4)
+
+
+def _operand(p, build):
+    # NAME | LITERAL; sin operando registra el error y no avanza
+    tk = p.t()
+    at = p.i
+    if tk.type is TokenType.IDENT:
+        p.i += 1
+        if p.t().code != DOT:
+            p.symtab.add(tk, SymKind.COLUMN)
+            return Name(at, None, at) if build else None
+        p.i += 1
+        name_at = p.i
+        name = p.eat(TokenType.IDENT)
+        p.symtab.add(tk, SymKind.IDENT)
+        p.symtab.add(name, SymKind.COLUMN)
+        return Name(at, at, name_at if name is not None else None) if build else None
+    if tk.type is TokenType.NUMBER or tk.type is TokenType.STRING or tk.code == NULL:
+        p.i += 1
+        p.symtab.add(tk, SymKind.LITERAL)
+        return Literal(at, at) if build else None
+    if not p.muted():
+        p.error(f"Se esperaba una expresión, se encontró '{tk.value}'", tk)
+    return None
+
+
+def _start(node, at):
+    return at if node is None else node.start
+
+
+def _reduce(frame, right, build):
+    if not build:
+        return None
+    if frame[0] == _PREFIX:
+        return Unary(frame[2], frame[2], right)
+    ops, operands = frame[2], frame[3]
+    operands.append(right)
+    if frame[1] == _CMP:
+        return Compare(_start(operands[0], ops[0]), ops[0], operands[0], right)
+    return Chain(_start(operands[0], ops[0]), ops, operands)
+
+
+def parse_expr(p):
+    build = p.ast is not None
+    symtab, toks = p.symtab, p.toks
+    stack = []
+    push = stack.append
+    while True:
+        # prefijos y operando
+        tk = p.t()
+        code = tk.code
+        if code == NOT or code == MINUS or code == PLUS:
+            symtab.add(tk, SymKind.RESWORD if code == NOT else SymKind.OP)
+            push((_PREFIX, _NOT if code == NOT else _SIGN, p.i))
+            p.i += 1
+            continue
+        if code == LPAREN:
+            push((_PAREN, 0))
+            p.i += 1
+            continue
+        left = _operand(p, build)
+
+        # operadores infijos y cierres
+        while True:
+            tk = p.t()
+            code = tk.code
+            level = BINDING.get(code, 0) if code else 0
+            if code == NOT:
+                try:
+                    nxt = toks[p.i + 1]
+                except IndexError:
+                    nxt = None
+                if nxt is not None and nxt.code == IN:
+                    level = _CMP
+            while stack:
+                top = stack[-1]
+                if top[0] > _INFIX or top[1] < level or (top[1] == level and level in CHAINED):
+                    break
+                left = _reduce(stack.pop(), left, build)
+
+            if level:
+                if level == _CMP and (code == NOT or code == IN):
+                    negated = None
+                    if code == NOT:
+                        symtab.add(tk, SymKind.RESWORD)
+                        negated = p.i
+                        p.i += 1
+                        tk = p.t()
+                    symtab.add(tk, SymKind.RESWORD)
+                    at = p.i
+                    p.i += 1
+                    if p.eat(TokenType.SYMBOL, {'('}, LPAREN) is None:
+                        left = InList(_start(left, at), left, negated) if build else None
+                        continue
+                    push([_IN, 0, left, negated, at, []])
+                    break
+                symtab.add(tk, SymKind.RESWORD if tk.type is TokenType.RESWORD else SymKind.OP)
+                top = stack[-1] if stack else None
+                if top is not None and top[0] == _INFIX and top[1] == level:
+                    top[2].append(p.i)
+                    top[3].append(left)
+                else:
+                    push([_INFIX, level, [p.i], [left]])
+                p.i += 1
+                break
+
+            top = stack[-1] if stack else None
+            if top is None:
+                return left
+            if top[0] == _PAREN:
+                stack.pop()
+                p.eat(TokenType.SYMBOL, {')'}, RPAREN)
+                continue
+            # lista de IN
+            top[5].append(left)
+            if code == COMMA:
+                p.i += 1
+                break
+            stack.pop()
+            p.eat(TokenType.SYMBOL, {')'}, RPAREN)
+            left = InList(_start(top[2], top[4]), top[2], top[3], top[5]) if build else None
@@ -0,0 +1,295 @@
+from .lexer import TokenType, RESWORDS, OPS, CODES, CODE_NAMES
+from .symbols import SymKind
+from .expressions import FIRST as EXPR_FIRST
+from . import ast_nodes
+
+# Gramática del subconjunto de SQL como datos + tablas LL(1) calculadas al importar.
+#
+# Exporta:
+#  - BNF: la gramática (misma que documentan los comentarios de parser.py)
+#  - START: símbolo inicial de una sentencia ("stmt")
+#  - PREDICT: {no terminal: {código | TokenType: alternativa}} (tabla de predicción; la
+#    clave es el código de lexer.CODES del token o, para "cualquier valor", su tipo)
+#  - DEFAULT: {no terminal: alternativa | None} cuando ningún token predice (None = ON_ERROR)
+#  - ON_ERROR: {no terminal: (mensaje, sincronizar)} para los que no tienen alternativa por defecto
+#  - AST_PREDICT / AST_DEFAULT: las mismas tablas con las acciones que construyen el AST
+#  - Begin / End / PushField / PopField: acciones (marcadores de pila) del AST
+#  - Call / EXTERNAL: no terminales que analiza un método del Parser (`expr`, ver
+#    expressions.py, y `rows`, la lista de VALUES) en lugar de la tabla
+#  - FIRST / FOLLOW / NULLABLE: conjuntos calculados sobre BNF
+#  - GrammarError: la gramática no es LL(1) o le falta una alternativa por defecto
+#
+# Notación de BNF:
+#  - `nt → alt | alt | ε`; los no terminales van en minúsculas.
+#  - Terminales: IDENT/NUMBER/STRING/OP/SYMBOL (cualquier valor de ese tipo), una palabra
+#    reservada en mayúsculas (SELECT) o un símbolo/operador entre comillas (',' '=').
+#  - `TERMINAL:KIND` registra el token en la tabla de símbolos con SymKind.KIND.
+#  - AST (ver ast_nodes.py): `regla<Nodo>` crea un nodo al expandir la regla;
+#    `TERMINAL@campo` guarda el índice del token en ese campo del nodo actual
+#    (`@campo+` lo añade a una lista) y `regla@campo` hace lo mismo con el nodo hijo o
+#    con los terminales `@` (sin nombre) de una regla sin nodo.
+#
+# Notas:
+#  - Un terminal es (TokenType, valores | None, código, SymKind | None, campo | None, añadir);
+#    se compara por `código` (0 = cualquier valor del tipo) y `valores` es un set sólo
+#    para que el mensaje de error coincida con el de Parser.eat().
+#  - Las tablas sin AST no llevan campos ni acciones, así que construir el AST no
+#    cuesta nada cuando no se pide.
+#  - Las alternativas se guardan invertidas, listas para apilarse en LL1Parser, y con
+#    los no terminales de una sola alternativa ya expandidos.
+#  - Si ningún token predice: los no terminales anulables toman ε, los de una sola
+#    alternativa la expanden (el error lo da el primer terminal) y el resto usa
+#    DEFAULT_ALT u ON_ERROR; así los errores son los mismos que los del Parser recursivo.
+#  - `expr` no tiene reglas aquí: la tabla sólo necesita su FIRST (expressions.FIRST) y
+#    en la pila queda un Call("expr"); LL1Parser llama a `self.expr()` y guarda el nodo
+#    devuelto en el campo de la referencia (`expr@where`). Así la precedencia de
+#    operadores no tiene que codificarse como reglas LL(1).
+#  - `rows` (las filas de VALUES) también es externo: Parser.rows() tiene una vía rápida
+#    sobre los arrays del TokenBuffer y devuelve un único nodo Rows para todas las filas.
+#  - Para añadir una sentencia basta con añadir sus reglas aquí y su palabra inicial a
+#    `stmt` (y a parser.STMT_START para la sincronización).
+
+BNF = r"""
+stmt                     → select_stmt | insert_stmt | update_stmt | create_stmt
+select_stmt<SelectStmt>  → SELECT:RESWORD column_list FROM IDENT:TABLE@table alias_opt join_list where_opt
+alias_opt                → IDENT:IDENT@alias | ε
+join_list                → join@joins+ join_list | ε
+join<Join>               → join_kind JOIN:RESWORD IDENT:TABLE@table alias_opt ON:RESWORD expr@on
+join_kind                → INNER@kind | LEFT@kind outer_opt | RIGHT@kind outer_opt | ε
+outer_opt                → OUTER | ε
+where_opt                → WHERE:RESWORD expr@where | ε
+column_list              → '*'@star | expr@columns+ column_rest
+column_rest              → ',' expr@columns+ column_rest | ε
+insert_stmt<InsertStmt>  → INSERT:RESWORD INTO IDENT:TABLE@table '(' ident_list ')' VALUES rows@rows
+ident_list               → IDENT:COLUMN@columns+ ident_rest
+ident_rest               → ',' IDENT:COLUMN@columns+ ident_rest | ε
+update_stmt<UpdateStmt>  → UPDATE:RESWORD IDENT:TABLE@table SET assign_list where_opt
+assign_list              → assign@assigns+ assign_rest
+assign_rest              → ',' assign@assigns+ assign_rest | ε
+assign<Assign>           → IDENT:COLUMN@column '=' expr@value
+create_stmt<CreateStmt>  → CREATE:RESWORD TABLE IDENT:TABLE@table '(' coldef_list ')'
+coldef_list              → coldef@coldefs+ coldef_rest
+coldef_rest              → ',' coldef@coldefs+ coldef_rest | ε
+coldef<ColDef>           → IDENT:COLUMN@name type_spec pk_opt
+pk_opt                   → PRIMARY@primary KEY | ε
+type_spec                → INT:TYPE@type | FLOAT:TYPE@type | VARCHAR:TYPE@type '(' NUMBER:TYPEARG@size ')'
+"""
+
+START = "stmt"
+
+# alternativa que se expande aunque el token no la prediga (índice en la regla)
+DEFAULT_ALT = {
+    "column_list": 1,   # si no es '*' se espera una expresión
+}
+
+# error cuando ningún token predice (mensaje con {value} = valor del token, sincronizar)
+ON_ERROR = {
+    "stmt": ("Sentencia no reconocida: {value}", True),
+    "type_spec": ("Tipo de dato inválido (INT|FLOAT|VARCHAR(n))", False),
+}
+
+
+class GrammarError(Exception):
+    pass
+
+
+class Begin:
+    __slots__ = ("cls",)
+
+    def __init__(self, cls):
+        self.cls = cls
+
+
+class End:
+    __slots__ = ()
+
+
+class PushField:
+    __slots__ = ("name", "append")
+
+    def __init__(self, name, append):
+        self.name, self.append = name, append
+
+
+class PopField:
+    __slots__ = ()
+
+
+class Call:
+    __slots__ = ("method",)
+
+    def __init__(self, method):
+        self.method = method
+
+
+_END, _POP = End(), PopField()
+
+# no terminal -> (marcador de pila, FIRST)
+EXTERNAL = {"expr": (Call("expr"), EXPR_FIRST), "rows": (Call("rows"), frozenset({CODES["("]}))}
+
+
+def _label(word):
+    word, _, field = word.partition("@")
+    if not _:
+        return word, None, False
+    return word, field.rstrip("+"), field.endswith("+")
+
+
+def _terminal(word):
+    word, field, append = _label(word)
+    word, _, kind = word.partition(":")
+    kind = SymKind[kind] if kind else None
+    if word.startswith("'"):
+        value = word[1:-1]
+        return (TokenType.OP if value in OPS else TokenType.SYMBOL, {value}, CODES[value], kind, field, append)
+    if word in RESWORDS:
+        return (TokenType.RESWORD, {word}, CODES[word], kind, field, append)
+    return (TokenType[word], None, 0, kind, field, append)
+
+
+def parse_bnf(text):
+    # devuelve ({regla: [alternativas]}, {regla: clase de nodo}, {(regla, i, pos): (campo, añadir)})
+    rules, nodes, refs = {}, {}, {}
+    for line in text.strip().splitlines():
+        name, _, body = line.partition("→")
+        name, _, node = name.strip().rstrip(">").partition("<")
+        if node:
+            nodes[name] = getattr(ast_nodes, node)
+        alts = []
+        for i, alt in enumerate(body.split("|")):
+            seq = []
+            for w in alt.split():
+                if w == "ε":
+                    continue
+                if w[0].islower():
+                    w, field, append = _label(w)
+                    if field is not None:
+                        refs[name, i, len(seq)] = (field, append)
+                    seq.append(w)
+                else:
+                    seq.append(_terminal(w))
+            alts.append(tuple(seq))
+        rules[name] = alts
+    return rules, nodes, refs
+
+
+def _keys(term):
+    return {term[2] or term[0]}
+
+
+def _key_name(key):
+    return CODE_NAMES[key] if key.__class__ is int else key.name
+
+
+def _first_of(seq, first, nullable):
+    out = set()
+    for sym in seq:
+        if isinstance(sym, str):
+            out |= first[sym]
+            if sym not in nullable:
+                return out, False
+        else:
+            return out | _keys(sym), False
+    return out, True
+
+
+def compute_sets(rules):
+    nullable, first = set(), {nt: set() for nt in rules}
+    first.update((nt, set(keys)) for nt, (_, keys) in EXTERNAL.items())
+    changed = True
+    while changed:
+        changed = False
+        for nt, alts in rules.items():
+            for alt in alts:
+                f, eps = _first_of(alt, first, nullable)
+                if not f <= first[nt]:
+                    first[nt] |= f; changed = True
+                if eps and nt not in nullable:
+                    nullable.add(nt); changed = True
+
+    follow = {nt: set() for nt in first}
+    # una sentencia va seguida de ';', de otra sentencia o del EOF
+    follow[START] |= {CODES[';'], TokenType.EOF} | first[START]
+    changed = True
+    while changed:
+        changed = False
+        for nt, alts in rules.items():
+            for alt in alts:
+                for k, sym in enumerate(alt):
+                    if not isinstance(sym, str):
+                        continue
+                    f, eps = _first_of(alt[k + 1:], first, nullable)
+                    if eps:
+                        f = f | follow[nt]
+                    if not f <= follow[sym]:
+                        follow[sym] |= f; changed = True
+    return first, follow, nullable
+
+
+class _Builder:
+    # expande alternativas a la secuencia que se apila (con o sin acciones del AST)
+    def __init__(self, rules, nodes, refs, nullable, ast):
+        self.rules, self.nodes, self.refs = rules, nodes, refs
+        self.nullable, self.ast = nullable, ast
+
+    def body(self, nt, i):
+        return tuple(self._expand(nt, i)[::-1])  # invertida: lista para apilar
+
+    def _expand(self, nt, i, depth=8):
+        out = [Begin(self.nodes[nt])] if self.ast and nt in self.nodes else []
+        for pos, sym in enumerate(self.rules[nt][i]):
+            if not isinstance(sym, str):
+                out.append(sym if self.ast else sym[:4] + (None, False))
+                continue
+            ref = self.refs.get((nt, i, pos)) if self.ast else None
+            if ref:
+                out.append(PushField(*ref))
+            if sym in EXTERNAL:
+                out.append(EXTERNAL[sym][0])
+                if ref:
+                    out.append(_POP)
+                continue
+            # los no terminales de una sola alternativa no anulable se sustituyen por su
+            # cuerpo: no necesitan predicción y así la pila hace menos pasos
+            if sym != START and len(self.rules[sym]) == 1 and sym not in self.nullable and depth:
+                out.extend(self._expand(sym, 0, depth - 1))
+            else:
+                out.append(sym)
+            if ref:
+                out.append(_POP)
+        if self.ast and nt in self.nodes:
+            out.append(_END)
+        return out
+
+
+def build_tables(rules, nodes, refs, ast=False):
+    first, follow, nullable = compute_sets(rules)
+    build = _Builder(rules, nodes, refs, nullable, ast)
+    predict, default = {}, {}
+    for nt, alts in rules.items():
+        row = {}
+        for i, alt in enumerate(alts):
+            f, eps = _first_of(alt, first, nullable)
+            keys = f | follow[nt] if eps else f
+            for key in keys:
+                if key in row and row[key] != i:
+                    raise GrammarError(f"Conflicto LL(1) en {nt} con {_key_name(key)}")
+                row[key] = i
+        predict[nt] = {key: build.body(nt, i) for key, i in row.items()}
+
+        if nt in nullable:
+            default[nt] = ()
+        elif nt in DEFAULT_ALT:
+            default[nt] = build.body(nt, DEFAULT_ALT[nt])
+        elif len(alts) == 1:
+            default[nt] = build.body(nt, 0)
+        elif nt in ON_ERROR:
+            default[nt] = None
+        else:
+            raise GrammarError(f"{nt} no tiene alternativa por defecto ni mensaje de error")
+    return predict, default, first, follow, nullable
+
+
+RULES, NODES, REFS = parse_bnf(BNF)
+PREDICT, DEFAULT, FIRST, FOLLOW, NULLABLE = build_tables(RULES, NODES, REFS)
+AST_PREDICT, AST_DEFAULT = build_tables(RULES, NODES, REFS, ast=True)[:2]
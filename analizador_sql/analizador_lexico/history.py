@@ -0,0 +1,78 @@
+import logging
+from itertools import islice
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Sum
+
+from .analysis import ANALYSIS_VERSION
+from .models import AnalysisRun, RunError, RunSymbol
+
+# Persistencia y consultas del histórico de análisis (ver models.py).
+#
+# Exporta:
+#  - record_run(filename, digest, result): guarda un resultado de analysis.analyze_source
+#    (ejecución + errores + símbolos) por lotes en una sola transacción;
+#    si la base de datos falla (p. ej. sin `manage.py migrate`) lo registra en el log y
+#    devuelve None: el análisis ya está hecho y la petición no debe fallar por el histórico
+#  - runs_referencing(value, kind): ejecuciones que referencian una tabla/columna
+#  - top_values(kind, limit): valores más frecuentes (refs sumadas) entre ejecuciones
+#
+# Notas:
+#  - Errores y símbolos se insertan con executemany sobre la tabla del modelo en lugar
+#    de bulk_create: construir 100k instancias y preparar cada campo con el ORM costaba
+#    ~5 s; así quedan en el coste del INSERT (ver benchmarks/bench_history.py).
+#    BATCH_SIZE acota las filas por executemany.
+#  - En SQLite la conexión usa WAL y synchronous=NORMAL (ver apps.py), de modo que
+#    las escrituras del histórico no bloquean a los lectores.
+
+BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def record_run(filename, digest, result):
+    try:
+        with transaction.atomic():
+            run = AnalysisRun.objects.create(
+                filename=filename[:255],
+                digest=digest,
+                version=ANALYSIS_VERSION,
+                token_count=result["token_count"],
+                error_count=len(result["error_rows"]),
+                symbol_count=len(result["symtab"]),
+                stats=result["stats"],
+            )
+            pk = run.pk
+            _insert_rows(RunError, ("run", "line", "col", "message"),
+                         ((pk, line, col, msg) for line, col, msg in result["error_rows"]))
+            _insert_rows(RunSymbol, ("run", "kind", "value", "line", "col", "refs"),
+                         ((pk, kind, value, line, col, refs) for _, kind, value, line, col, refs in result["symtab"]))
+    except DatabaseError:
+        logger.exception("No se pudo guardar el análisis %s en el histórico", digest)
+        return None
+    return run
+
+
+def _insert_rows(model, fields, rows):
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+    with connection.cursor() as cursor:
+        while batch := list(islice(rows, BATCH_SIZE)):
+            cursor.executemany(sql, batch)
+
+
+def runs_referencing(value, kind="TABLE", limit=100):
+    return (AnalysisRun.objects
+            .filter(symbols__kind=kind, symbols__value=value)
+            .annotate(refs=Sum("symbols__refs"))
+            .values("id", "filename", "digest", "created_at", "refs")
+            .order_by("-created_at")[:limit])
+
+
+def top_values(kind="COLUMN", limit=20):
+    return (RunSymbol.objects
+            .filter(kind=kind)
+            .values("value")
+            .annotate(refs=Sum("refs"), runs=Count("run", distinct=True))
+            .order_by("-refs", "value")[:limit])
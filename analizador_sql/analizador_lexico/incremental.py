@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from .lexer import Lexer, Token, TokenType
+from .ll1 import LL1Parser
+from .parallel import PARALLEL_MIN_CHARS, POOL_CONTEXT
+from .symbols import SymbolTable, SymEntry
+from .errors import ErrorLog, ParseError
+from .semantic import facts, shift_facts
+from .metrics import Stages, run_program
+
+# Re-análisis incremental por sentencia.
+#
+# Exporta:
+#  - split_source(text): [(inicio, fin, línea, col)] de cada sentencia de nivel superior
+#  - IncrementalAnalyzer: caché LRU de resultados por sentencia (huella = blake2b del
+#    texto) con `analyze(text, symtab, errlog, progress, token_limit)`, que devuelve
+#    (primeros tokens, nº total de tokens, hechos para la pasada semántica)
+#
+# Notas:
+#  - El corte en ';' fuera de paréntesis se hace con un regex que sólo reconoce strings,
+#    comentarios `--`, ';', '(' y ')' (mismas reglas que el lexer), sin tokenizar todo.
+#  - Cada sentencia se analiza con posiciones relativas (línea 1, col 1) y al reutilizarla
+#    se desplaza: línea + (inicio - 1) y, sólo en su primera línea, col + (col_inicio - 1).
+#    Así una edición sólo invalida las sentencias cuyo texto cambió.
+#  - La tabla se reconstruye con `SymbolTable.merge` en orden de sentencias (refs
+#    sumadas, primera posición conservada), igual que parallel.py.
+#  - Si las sentencias nuevas suman más de PARALLEL_MIN_CHARS se analizan en procesos.
+#  - Para mostrar tokens sólo se tokenizan las primeras sentencias hasta `token_limit`.
+#  - Con `stages` (metrics.Stages) se miden "split", "parse" (lexer + parser de las
+#    sentencias nuevas, con tiempo por tipo), "symtab" (fusión) y "tokenize" (tokens a mostrar).
+
+_SPLIT_RE = re.compile(r"'[^']*'|--[^\n]*|[;()]")
+
+
+def split_source(text):
+    bounds = []
+    start, line, col = 0, 1, 1
+    depth = 0
+    for m in _SPLIT_RE.finditer(text):
+        ch = m.group(0)
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth = max(0, depth - 1)
+        elif ch == ';' and depth == 0:
+            end = m.end()
+            bounds.append((start, end, line, col))
+            newlines = text.count("\n", start, end)
+            if newlines:
+                line += newlines
+                col = end - text.rfind("\n", start, end)
+            else:
+                col += end - start
+            start = end
+    if start < len(text):
+        bounds.append((start, len(text), line, col))
+    return bounds
+
+
+def _analyze_statement(text, statements):
+    symtab, errlog = SymbolTable(), ErrorLog()
+    tokens = Lexer(text).tokenize_buffer()
+    parser = LL1Parser(tokens, symtab, errlog, [], build_ast=True)
+    run_program(parser, statements)
+    entries = [(e.kind, e.value, e.line, e.col, e.refs) for e in symtab.entries()]
+    errors = [(e.line, e.col, e.message) for e in errlog.items]
+    return entries, errors, len(tokens) - 1, facts(parser.ast, tokens, parser.failed)
+
+
+def _analyze_batch(texts):
+    # devuelve (resultados, {tipo: [nº, segundos]}) para poder medir también en los procesos
+    statements = {}
+    return [_analyze_statement(t, statements) for t in texts], statements
+
+
+def _shift(line, col, sl, sc):
+    return line + sl - 1, (col + sc - 1 if line == 1 else col)
+
+
+class IncrementalAnalyzer:
+    def __init__(self, max_statements=50_000, workers=None):
+        self.max_statements = max_statements
+        self.workers = workers or os.cpu_count() or 1
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(stmt: str) -> bytes:
+        return hashlib.blake2b(stmt.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def analyze(self, text, symtab: SymbolTable, errlog: ErrorLog, progress, token_limit=0, stages=None):
+        stages = stages or Stages()
+        with stages.stage("split"):
+            bounds = split_source(text)
+            keys = [self.fingerprint(text[s:e]) for s, e, _, _ in bounds]
+
+            missing, cached = {}, {}
+            with self._lock:
+                for k, (s, e, _, _) in zip(keys, bounds):
+                    if k in self._cache:
+                        self._cache.move_to_end(k)
+                        cached[k] = self._cache[k]
+                    elif k not in missing:
+                        missing[k] = text[s:e]
+        progress.append(f"Análisis incremental: {len(bounds) - len(missing)} de {len(bounds)} "
+                        f"sentencias reutilizadas, {len(missing)} por analizar…")
+
+        with stages.stage("parse"):
+            results, statements = self._run(list(missing.values()))
+            fresh = dict(zip(missing, results))
+        stages.add_statements(statements)
+
+        with stages.stage("symtab"):
+            errors, ntokens, stmt_facts = [], 1, []
+            for k, (_, _, sl, sc) in zip(keys, bounds):
+                entries, errs, ntok, fcts = fresh[k] if k in fresh else cached[k]
+                ntokens += ntok
+                if fcts:
+                    stmt_facts.extend(shift_facts(fcts, lambda line, col: _shift(line, col, sl, sc)))
+                symtab.merge(SymEntry(kind, value, *_shift(line, col, sl, sc), refs)
+                             for kind, value, line, col, refs in entries)
+                for line, col, msg in errs:
+                    errors.append(ParseError(msg, *_shift(line, col, sl, sc)))
+            errors.sort(key=lambda e: (e.line, e.col))
+            for e in errors:
+                errlog.add(e)
+
+        with self._lock:
+            self._cache.update(fresh)
+            while len(self._cache) > self.max_statements:
+                self._cache.popitem(last=False)
+        progress.append("Análisis finalizado.")
+        with stages.stage("tokenize"):
+            tokens = self._tokens(text, bounds, token_limit)
+        return tokens, ntokens, stmt_facts
+
+    def _run(self, texts):
+        if self.workers > 1 and sum(map(len, texts)) >= PARALLEL_MIN_CHARS:
+            per = max(1, len(texts) // (self.workers * 4))
+            batches = [texts[k:k + per] for k in range(0, len(texts), per)]
+            results, statements = [], Stages()
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=POOL_CONTEXT) as pool:
+                for batch, stmts in pool.map(_analyze_batch, batches):
+                    results.extend(batch)
+                    statements.add_statements(stmts)
+            return results, statements.statements
+        return _analyze_batch(texts)
+
+    def _tokens(self, text, bounds, limit):
+        # tokens para mostrar: sólo se tokenizan las sentencias necesarias
+        out = []
+        for s, e, line, col in bounds:
+            if len(out) >= limit:
+                break
+            toks = Lexer(text[s:e], line=line, col=col).tokenize()
+            out.extend(toks[:-1])
+        out = out[:limit]
+        if len(out) < limit:
+            out.append(self.eof(text))
+        return out
+
+    @staticmethod
+    def eof(text):
+        # posición del EOF que emitiría el lexer sobre el texto completo
+        nl = text.rfind("\n")
+        return Token(TokenType.EOF, "", text.count("\n") + 1, len(text) - nl)
@@ -0,0 +1,250 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .analysis import analyze_source
+from .bytelexer import mapped
+from .cache import result_cache
+from .history import record_run
+from .metrics import Stages, REGISTRY
+from .models import AnalysisJob
+
+# Cola de análisis en segundo plano para archivos grandes, sin broker externo.
+#
+# Exporta:
+#  - JobQueue: cola persistida en la base de datos (modelo AnalysisJob) con un pool
+#    local de hilos
+#      * submit(file, digest) -> AnalysisJob: guarda el archivo en ANALIZADOR_JOB_DIR y
+#        lo deja en cola; QueueFull si ya hay ANALIZADOR_JOB_MAX_QUEUED activos
+#      * cancel(job_id): cancela un job en cola o pide parar uno en curso
+#      * status(job): dict para la API (estado, progreso, posición en la cola, resultado)
+#  - job_queue: instancia compartida usada por las vistas
+#  - file_digest(file): result_id (cache.py) de un archivo subido sin leerlo entero
+#  - QueueFull, Cancelled
+#
+# Notas:
+#  - Los hilos (ANALIZADOR_JOB_WORKERS) se arrancan con el primer uso. Cada uno reclama
+#    el job en cola más antiguo con un UPDATE condicionado al estado, así que varios
+#    procesos de WSGI pueden compartir la misma cola sin repartir dos veces un job.
+#  - El análisis usa el archivo mapeado (bytelexer.py) y analysis.analyze_source; el
+#    resultado queda en la caché de resultados y, si está activo, en el histórico. El
+#    archivo se mueve al almacén de fuentes de cache.py para la paginación.
+#  - Progreso: el log del Parser y el nº de sentencias / porcentaje de líneas se vuelcan
+#    a la base de datos cada ANALIZADOR_JOB_PROGRESS_INTERVAL segundos; en el proceso que
+#    ejecuta el job `status` usa el progreso en memoria.
+#  - El job se analiza en secuencia (`parallel=False`): parallel.parse_parallel no avisa
+#    por sentencia, así que no habría progreso ni forma de cancelar. El paralelismo está
+#    en los ANALIZADOR_JOB_WORKERS hilos, uno por job.
+#  - Cancelar un job en curso marca `cancel_requested`; el hilo lo comprueba tras cada
+#    sentencia (el lexer no se interrumpe a mitad).
+#  - Un job "running" sin progreso en ANALIZADOR_JOB_STALE_SECONDS (proceso caído) se
+#    vuelve a poner en cola al arrancar los hilos.
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def file_digest(file):
+    if hasattr(file, "temporary_file_path"):
+        with mapped(file.temporary_file_path()) as mm:
+            return result_cache.result_id(mm)
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in file.chunks():
+        h.update(chunk)
+    return h.hexdigest()
+
+
+class _Progress(list):
+    # log del análisis (el Parser sólo hace append) + avance por sentencia
+    def __init__(self, job_id, interval, cancel):
+        super().__init__()
+        self.job_id = job_id
+        self.interval = interval
+        self.cancel = cancel
+        self.statements = 0
+        self.percent = 0.0
+        self._flushed = 0.0
+
+    def append(self, message):
+        super().append(message)
+        self.flush()
+
+    def statement(self, line, last_line):
+        self.statements += 1
+        self.percent = round(100 * line / max(1, last_line), 1)
+        if self.cancel.is_set():
+            raise Cancelled()
+        self.flush()
+
+    def as_dict(self):
+        return {"log": list(self), "statements": self.statements, "percent": self.percent}
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._flushed < self.interval:
+            return
+        self._flushed = now
+        jobs = AnalysisJob.objects.filter(pk=self.job_id)
+        jobs.update(progress=self.as_dict(), updated_at=timezone.now())
+        if jobs.filter(cancel_requested=True).exists():
+            self.cancel.set()
+
+
+class JobQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._running = {}  # job_id -> _Progress de los jobs de este proceso
+
+    @property
+    def directory(self):
+        return str(_setting("ANALIZADOR_JOB_DIR", settings.BASE_DIR / ".jobs"))
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            stale = timezone.now() - timedelta(seconds=_setting("ANALIZADOR_JOB_STALE_SECONDS", 300))
+            AnalysisJob.objects.filter(status=AnalysisJob.RUNNING, updated_at__lt=stale).update(
+                status=AnalysisJob.QUEUED, started_at=None, updated_at=timezone.now())
+            for n in range(_setting("ANALIZADOR_JOB_WORKERS", 2)):
+                t = threading.Thread(target=self._worker, name=f"analizador-job-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, file, digest):
+        self.start()
+        active = AnalysisJob.objects.filter(status__in=AnalysisJob.ACTIVE).count()
+        if active >= _setting("ANALIZADOR_JOB_MAX_QUEUED", 16):
+            raise QueueFull("Hay demasiados análisis en cola; inténtalo de nuevo más tarde.")
+        os.makedirs(self.directory, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, f"{job_id}.sql")
+        if hasattr(file, "temporary_file_path"):
+            file_move_safe(file.temporary_file_path(), path)
+        else:
+            with open(path, "wb") as out:
+                for chunk in file.chunks():
+                    out.write(chunk)
+        job = AnalysisJob.objects.create(id=job_id, filename=file.name[:255], path=path, size=file.size,
+                                         digest=digest, progress={"log": [], "statements": 0, "percent": 0.0})
+        REGISTRY.inc("analizador_jobs_total", status="submitted")
+        self._wake.set()
+        return job
+
+    def cancel(self, job_id):
+        now = timezone.now()
+        jobs = AnalysisJob.objects.filter(pk=job_id)
+        if jobs.filter(status=AnalysisJob.QUEUED).update(status=AnalysisJob.CANCELLED, finished_at=now):
+            job = jobs.first()
+            self._remove(job.path)
+            REGISTRY.inc("analizador_jobs_total", status=AnalysisJob.CANCELLED)
+            return job
+        jobs.filter(status=AnalysisJob.RUNNING).update(cancel_requested=True)
+        progress = self._running.get(job_id)
+        if progress is not None:
+            progress.cancel.set()
+        return jobs.first()
+
+    def status(self, job):
+        progress = self._running.get(job.pk)
+        out = {
+            "id": job.pk,
+            "filename": job.filename,
+            "size": job.size,
+            "status": job.status,
+            "cancel_requested": job.cancel_requested,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "progress": progress.as_dict() if progress is not None else job.progress,
+        }
+        if job.status == AnalysisJob.QUEUED:
+            out["queue_position"] = AnalysisJob.objects.filter(
+                status=AnalysisJob.QUEUED, created_at__lt=job.created_at).count() + 1
+        if job.status == AnalysisJob.DONE:
+            out["result_id"] = job.digest
+        if job.error:
+            out["error"] = job.error
+        return out
+
+    def _claim(self):
+        queued = AnalysisJob.objects.filter(status=AnalysisJob.QUEUED).order_by("created_at")
+        for job in queued[:len(self._threads) + 1]:
+            claimed = AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.QUEUED).update(
+                status=AnalysisJob.RUNNING, started_at=timezone.now())
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def _worker(self):
+        poll = _setting("ANALIZADOR_JOB_POLL_SECONDS", 2)
+        while True:
+            try:
+                job = self._claim()
+                if job is None:
+                    self._wake.wait(poll)
+                    self._wake.clear()
+                    continue
+                self._run(job)
+            except Exception:
+                time.sleep(poll)  # p. ej. base de datos bloqueada: reintentar más tarde
+            finally:
+                close_old_connections()
+
+    def _run(self, job):
+        progress = _Progress(job.pk, _setting("ANALIZADOR_JOB_PROGRESS_INTERVAL", 0.5), threading.Event())
+        self._running[job.pk] = progress
+        status, error = AnalysisJob.DONE, ""
+        try:
+            if job.cancel_requested:
+                raise Cancelled()
+            with mapped(job.path) as data:
+                result = analyze_source(data, parallel=False, stages=Stages(), log=progress,
+                                        on_statement=progress.statement)
+            key = result_cache.key(job.digest)
+            result_cache.set(key, result)
+            result_cache.set_source(key, path=job.path, move=True)
+            REGISTRY.observe(result["metrics"])
+            if _setting("ANALIZADOR_HISTORY", True):
+                record_run(job.filename, job.digest, result)
+        except Cancelled:
+            status = AnalysisJob.CANCELLED
+            progress.append("Análisis cancelado.")
+        except Exception as exc:
+            status, error = AnalysisJob.FAILED, f"{type(exc).__name__}: {exc}"
+        finally:
+            progress.flush(force=True)
+            AnalysisJob.objects.filter(pk=job.pk).update(status=status, error=error, finished_at=timezone.now())
+            self._running.pop(job.pk, None)
+            self._remove(job.path)
+            REGISTRY.inc("analizador_jobs_total", status=status)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+job_queue = JobQueue()
@@ -1,4 +1,5 @@
 import re
+import codecs
 from enum import Enum
 from dataclasses import dataclass
 
@@ -6,14 +7,38 @@ from dataclasses import dataclass
 #
 # Exporta:
 #  - TokenType: Enum de tipos de token (RESWORD, IDENT, NUMBER, STRING, SYMBOL, OP, EOF)
-#  - Token: dataclass con {type, value, line, col}
-#  - Lexer: clase que tokeniza una cadena SQL con `tokenize()`
+#  - Token: dataclass con {type, value, line, col, code}
+#  - CODES / CODE_NAMES: código entero de cada palabra reservada, símbolo y operador
+#    (0 = sin código: IDENT, NUMBER, STRING, EOF o carácter no reconocido)
+#  - WordPool: clasificación e internado de identificadores por análisis
+#  - Lexer: clase que tokeniza una cadena SQL con `tokenize()` o, en modo streaming,
+#    un archivo por bloques con `iter_tokens(fobj)` (generador perezoso)
+#  - `backend="dfa"` usa el autómata por tablas de dfa.py en lugar de `token_regex`
+#    (mismos tokens; `tokenize_buffer()` usa siempre el regex)
+#  - `tokenize_buffer()` devuelve un TokenBuffer compacto (ver tokenbuffer.py)
+#  - TokenStream: ventana deslizante sobre un iterador de tokens para el Parser
 #
 # Notas de implementación:
 #  - `RESWORDS` contiene palabras reservadas soportadas (se comparan en uppercase).
+#  - `Token.code` es el código de CODES: el Parser compara enteros en lugar de cadenas.
+#    Los códigos no se repiten entre tipos, así que el código solo identifica el token.
+#  - Cada Lexer usa un WordPool (`pool=`, uno nuevo por defecto): la primera vez que
+#    aparece una grafía se pasa a mayúsculas y se busca en RESWORDS; las siguientes son
+#    una búsqueda en el diccionario. Los identificadores repetidos comparten la misma
+#    cadena y las palabras reservadas usan la de CODE_NAMES.
 #  - `token_regex` captura espacios, comentarios (--), identificadores, números, strings, operadores y símbolos.
 #  - El lexer emite tokens con posición (línea/columna) y añade un EOF final.
 #  - Revisar patrones y grupos de captura si se añaden nuevos símbolos/operadores.
+#  - bytelexer.ByteLexer replica `token_regex` sobre bytes (mismos grupos): cambiar ambos.
+#  - En streaming, un match que toca el final del bloque (o a 1 carácter de él) se
+#    pospone hasta leer el siguiente bloque: así strings, comentarios `--`, `<=`/`<>`
+#    o `12.5` partidos entre bloques se reconocen igual que con el texto completo.
+#    Si un bloque no avanza nada (string sin cerrar, comentario o string más largo que
+#    el bloque) la siguiente lectura duplica el tamaño, así el coste total es lineal.
+
+# Versión de las reglas léxicas: incrementar al cambiar RESWORDS/SYMBOLS/OPS o
+# `token_regex` (invalida resultados cacheados, ver cache.py).
+LEXER_VERSION = 2
 
 class TokenType(Enum):
     RESWORD = "RESWORD"
@@ -27,18 +52,35 @@ class TokenType(Enum):
 RESWORDS = {
     "SELECT","FROM","WHERE","INSERT","INTO","VALUES",
     "UPDATE","SET","CREATE","TABLE","PRIMARY","KEY",
-    "NULL","INT","VARCHAR","FLOAT"
+    "NULL","INT","VARCHAR","FLOAT",
+    "AND","OR","NOT","IN","JOIN","ON","INNER","LEFT","RIGHT","OUTER"
 }
 
-SYMBOLS = {',',';','(',')','*','.'}
+SYMBOLS = {',',';','(',')','*','.','+','-','/'}
 OPS     = {'=','<','>','<=','>=','<>'}
 
+CODE_NAMES = ("",) + tuple(sorted(RESWORDS)) + tuple(sorted(SYMBOLS)) + tuple(sorted(OPS))
+CODES = {v: k for k, v in enumerate(CODE_NAMES) if k}
+
 @dataclass
 class Token:
     type: TokenType
     value: str
     line: int
     col: int
+    code: int = 0
+
+class WordPool(dict):
+    # grafía (str, o bytes ASCII en bytelexer.py) -> (código, valor): palabra reservada
+    # con su valor canónico o identificador (código 0) internado
+    def __missing__(self, word):
+        if word.__class__ is not str:
+            entry = self[word.decode("ascii")]  # misma cadena que la grafía en texto
+        else:
+            code = CODES.get(word.upper(), 0)
+            entry = (code, CODE_NAMES[code]) if code else (0, word)
+        self[word] = entry
+        return entry
 
 class Lexer:
     token_regex = re.compile(
@@ -48,27 +90,115 @@ class Lexer:
         r"(\d+(?:\.\d+)?)|"                      # number
         r"('([^']*)')"                           # 'string'
         r"|(\<=|\>=|<>|=|<|>)|"                  # operadores
-        r"([,;\(\)\*\.\+])"                      # símbolos
+        r"([,;\(\)\*\.\+\-/])"                   # símbolos ('-' solo; '--' es comentario)
     )
 
-    def __init__(self, text: str):
+    BACKENDS = ("regex", "dfa")
+
+    def __init__(self, text: str = "", backend: str = "regex", line: int = 1, col: int = 1, pool=None):
+        # `line`/`col` permiten tokenizar un fragmento conservando posiciones absolutas
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend de lexer desconocido: {backend} (opciones: {', '.join(self.BACKENDS)})")
         self.text = text
+        self.backend = backend
         self.pos = 0
-        self.line = 1
-        self.col = 1
+        self.line = line
+        self.col = col
+        self.pool = WordPool() if pool is None else pool
         self.tokens = []
 
     def _emit(self, t: Token):
         self.tokens.append(t)
 
     def tokenize(self):
-        i = 0
-        while i < len(self.text):
-            m = self.token_regex.match(self.text, i)
+        for tk in self.iter_tokens():
+            self._emit(tk)
+        return self.tokens
+
+    def tokenize_buffer(self):
+        # Variante compacta de `tokenize()`: devuelve un TokenBuffer (columnas en
+        # `array` + offsets al texto) sin crear un `Token` por cada token.
+        from .tokenbuffer import TokenBuffer, CODE_OF
+        buf = TokenBuffer(self.text, self.line, self.col, self.pool)
+        add_newlines = buf.line_index.add_newlines
+        text, n, i = self.text, len(self.text), 0
+        rx, pool, codes = self.token_regex, self.pool, CODES
+        c_res, c_ident, c_sym = CODE_OF[TokenType.RESWORD], CODE_OF[TokenType.IDENT], CODE_OF[TokenType.SYMBOL]
+        by_group = {3: CODE_OF[TokenType.NUMBER], 4: CODE_OF[TokenType.STRING],
+                    6: CODE_OF[TokenType.OP], 7: c_sym}
+        while i < n:
+            m = rx.match(text, i)
+            if not m:
+                # carácter no reconocido
+                buf.append(c_sym, i, i + 1, self.line, self.col)
+                i += 1
+                self.col += 1
+                continue
+            j = m.end()
+            nl = text.rfind("\n", i, j)
+            if nl >= 0:
+                self.line += add_newlines(i, j)
+                self.col = j - nl
+            else:
+                self.col += j - i
+            g = m.lastindex
+            if g is not None and g != 1:
+                if g == 2:
+                    word = pool[m.group(2)][0]
+                    buf.append(c_res if word else c_ident, i, j, self.line, self.col - (j - i), word)
+                else:
+                    buf.append(by_group[g], i, j, self.line, self.col - (j - i), codes[m.group(g)] if g >= 6 else 0)
+            i = j
+        buf.append(CODE_OF[TokenType.EOF], n, n, self.line, self.col)
+        return buf
+
+    def iter_tokens(self, fobj=None, chunk_size=64 * 1024):
+        # Generador de tokens. Sin `fobj` recorre `self.text`; con `fobj` lee por
+        # bloques de `chunk_size` (texto o bytes UTF-8) y conserva sólo el resto
+        # no consumido del bloque anterior.
+        if self.backend == "dfa":
+            from . import dfa
+            scan = lambda text, i, final: dfa.scan(self, text, i, final)
+        else:
+            scan = self._scan
+        if fobj is None:
+            yield from scan(self.text, 0, True)
+        else:
+            decoder = None
+            buf, i = "", 0
+            size = chunk_size
+            while True:
+                chunk = fobj.read(size)
+                final = not chunk
+                if isinstance(chunk, bytes):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                    chunk = decoder.decode(chunk, final)
+                buf = buf[i:] + chunk
+                i = yield from scan(buf, 0, final)
+                if final:
+                    break
+                # sin avance: el token pendiente no cabe en el bloque; se lee al menos
+                # lo ya acumulado para que reescanearlo no sea cuadrático
+                size = chunk_size if i else max(size * 2, len(buf))
+        yield Token(TokenType.EOF, "", self.line, self.col)
+
+    def _scan(self, text, i, final):
+        # Emite tokens de `text` desde `i`. Si `final` es False se detiene antes de
+        # un token que podría continuar en el siguiente bloque y devuelve su posición.
+        n = len(text)
+        pool = self.pool
+        while i < n:
+            m = self.token_regex.match(text, i)
+            if not final:
+                if m is None and (text[i] == "'" or i + 1 >= n):
+                    return i
+                if m is not None and m.end() >= n - 1:
+                    return i
             if not m:
                 # carácter no reconocido
-                val = self.text[i]
-                self._emit(Token(TokenType.SYMBOL, val, self.line, self.col))
+                val = text[i]
+                yield Token(TokenType.SYMBOL, val, self.line, self.col)
                 i += 1
                 self.col += 1
                 continue
@@ -87,28 +217,61 @@ class Lexer:
             if m.group(1):   # comentario
                 continue
             if m.group(2):   # ident
-                up = m.group(2).upper()
-                if up in RESWORDS:
-                    self._emit(Token(TokenType.RESWORD, up, self.line, self.col - len(val)))
+                code, word = pool[m.group(2)]
+                if code:
+                    yield Token(TokenType.RESWORD, word, self.line, self.col - len(val), code)
                 else:
-                    self._emit(Token(TokenType.IDENT, m.group(2), self.line, self.col - len(val)))
+                    yield Token(TokenType.IDENT, word, self.line, self.col - len(val))
                 continue
             if m.group(3):   # number
-                self._emit(Token(TokenType.NUMBER, m.group(3), self.line, self.col - len(val)))
+                yield Token(TokenType.NUMBER, m.group(3), self.line, self.col - len(val))
                 continue
             if m.group(4):   # string
-                self._emit(Token(TokenType.STRING, m.group(4), self.line, self.col - len(val)))
+                yield Token(TokenType.STRING, m.group(4), self.line, self.col - len(val))
                 continue
             if m.group(6):   # op
-                self._emit(Token(TokenType.OP, m.group(6), self.line, self.col - len(val)))
+                code = CODES[m.group(6)]
+                yield Token(TokenType.OP, CODE_NAMES[code], self.line, self.col - len(val), code)
                 continue
             if m.group(7):   # symbol
-                sym = m.group(7)
-                if sym in SYMBOLS:
-                    self._emit(Token(TokenType.SYMBOL, sym, self.line, self.col - len(val)))
-                else:
-                    self._emit(Token(TokenType.SYMBOL, sym, self.line, self.col - len(val)))
+                code = CODES[m.group(7)]
+                yield Token(TokenType.SYMBOL, CODE_NAMES[code], self.line, self.col - len(val), code)
                 continue
+        return i
 
-        self._emit(Token(TokenType.EOF, "", self.line, self.col))
-        return self.tokens
+
+class TokenStream:
+    # Ventana deslizante sobre un iterador de tokens (p. ej. `Lexer.iter_tokens`).
+    # El Parser sólo indexa hacia delante (`toks[i]`), así que basta con conservar
+    # `keep` tokens por detrás del índice más alto pedido. Pasado el final devuelve
+    # siempre el EOF, de modo que la memoria queda acotada por la ventana.
+    def __init__(self, tokens, keep=64):
+        self._it = iter(tokens)
+        self._buf = []
+        self._base = 0
+        self._keep = keep
+        self._last = None
+
+    def __getitem__(self, i):
+        if i < self._base:
+            raise IndexError(f"token {i} ya descartado de la ventana")
+        while i >= self._base + len(self._buf):
+            tk = next(self._it, None)
+            if tk is None:
+                return self._last
+            self._buf.append(tk)
+            self._last = tk
+        if i - self._base > 2 * self._keep:
+            drop = i - self._base - self._keep
+            del self._buf[:drop]
+            self._base += drop
+        return self._buf[i - self._base]
+
+    def __iter__(self):
+        i = self._base
+        while True:
+            tk = self[i]
+            yield tk
+            if tk.type == TokenType.EOF:
+                return
+            i += 1
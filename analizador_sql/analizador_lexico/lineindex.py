@@ -0,0 +1,107 @@
+import re
+from array import array
+from bisect import bisect_right
+
+# Índice de inicios de línea de un texto fuente (str o bytes UTF-8 / mmap).
+#
+# Exporta:
+#  - LineIndex(source, line=1, col=1): offsets donde empieza cada línea; lo rellenan los
+#    lexers mientras tokenizan (`add_newlines(i, j)`, ver TokenBuffer.line_index) o
+#    `LineIndex.build(source)` de una pasada
+#      * position(offset) -> (línea, col) y offset(línea, col) -> offset, con bisect
+#      * line_text(línea): sólo esa línea (sin el salto)
+#      * snippet(línea, col): (texto de la línea, marca "   ^") para mostrar un error
+#  - UTF8_CHAR / char_count(raw): utilidades de columnas sobre bytes (también bytelexer.py)
+#
+# Notas:
+#  - Las columnas son de caracteres, como las del lexer: en bytes se cuenta decodificando
+#    sólo el trozo de línea necesario. Los offsets son del mismo tipo que `source`.
+#  - `line`/`col` son la posición del offset 0 (fragmentos tokenizados con posiciones
+#    absolutas, ver parallel.py).
+#  - snippet recorta líneas muy largas alrededor de la columna (`context` caracteres a
+#    cada lado) y conserva los tabuladores en la marca para que el ^ quede alineado.
+
+# un carácter UTF-8 o el prefijo inválido más largo que decode() sustituye por un U+FFFD
+UTF8_CHAR = re.compile(
+    rb"[\xc2-\xdf][\x80-\xbf]?|\xe0(?:[\xa0-\xbf][\x80-\xbf]?)?|[\xe1-\xec\xee\xef](?:[\x80-\xbf]{1,2})?"
+    rb"|\xed(?:[\x80-\x9f][\x80-\xbf]?)?|\xf0(?:[\x90-\xbf][\x80-\xbf]{0,2})?"
+    rb"|[\xf1-\xf3](?:[\x80-\xbf]{1,3})?|\xf4(?:[\x80-\x8f][\x80-\xbf]{0,2})?|.", re.S)
+
+
+def char_count(raw):
+    return len(raw) if raw.isascii() else len(raw.decode("utf-8", errors="replace"))
+
+
+class LineIndex:
+    def __init__(self, source, line=1, col=1):
+        self.source = source
+        self.is_text = isinstance(source, str)
+        self.starts = array('I', [0])
+        self.line = line
+        self.col = col
+
+    @classmethod
+    def build(cls, source, line=1, col=1):
+        index = cls(source, line, col)
+        index.add_newlines(0, len(source))
+        return index
+
+    def add_newlines(self, i, j):
+        # registra los saltos de línea de source[i:j] (en orden, sin repetir tramos);
+        # devuelve cuántos había
+        nl = "\n" if self.is_text else b"\n"
+        find, starts = self.source.find, self.starts
+        n = len(starts)
+        k = find(nl, i, j)
+        while k >= 0:
+            starts.append(k + 1)
+            k = find(nl, k + 1, j)
+        return len(starts) - n
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _bounds(self, line):
+        k = min(max(line - self.line, 0), len(self.starts) - 1)
+        start = self.starts[k]
+        end = self.starts[k + 1] - 1 if k + 1 < len(self.starts) else len(self.source)
+        return k, start, end
+
+    def position(self, offset):
+        k = bisect_right(self.starts, offset) - 1
+        start = self.starts[k]
+        width = offset - start if self.is_text else char_count(self.source[start:offset])
+        return self.line + k, width + (self.col if k == 0 else 1)
+
+    def offset(self, line, col):
+        k, start, end = self._bounds(line)
+        n = max(0, col - (self.col if k == 0 else 1))
+        if self.is_text:
+            return min(start + n, end)
+        raw = self.source[start:end]
+        if raw.isascii():
+            return start + min(n, len(raw))
+        pos = 0
+        for _ in range(n):
+            if pos >= len(raw):
+                break
+            pos = UTF8_CHAR.match(raw, pos).end()
+        return start + pos
+
+    def line_text(self, line):
+        _, start, end = self._bounds(line)
+        text = self.source[start:end]
+        if not self.is_text:
+            text = text.decode("utf-8", errors="replace")
+        return text[:-1] if text.endswith("\r") else text
+
+    def snippet(self, line, col, context=60):
+        k = min(max(line - self.line, 0), len(self.starts) - 1)
+        text = self.line_text(line)
+        pos = min(max(0, col - (self.col if k == 0 else 1)), len(text))
+        left = max(0, pos - context)
+        right = min(len(text), pos + context)
+        clipped = ("…" if left else "") + text[left:right] + ("…" if right < len(text) else "")
+        pad = (1 if left else 0) + pos - left
+        caret = "".join(c if c == "\t" else " " for c in clipped[:pad]) + "^"
+        return clipped, caret
@@ -0,0 +1,102 @@
+from .parser import Parser
+from .grammar import PREDICT, DEFAULT, AST_PREDICT, AST_DEFAULT, ON_ERROR, START, Begin, End, PushField, Call
+
+# Parser LL(1) dirigido por tablas (alternativa a las producciones escritas a mano).
+#
+# Exporta:
+#  - LL1Parser: subclase de Parser cuya `stmt()` recorre la tabla PREDICT de grammar.py
+#    con una pila explícita en lugar de llamar a un método por producción.
+#
+# Notas:
+#  - Mismo constructor, `program()`/`iter_program()`, recuperación en modo pánico y
+#    mensajes de error que Parser: produce la misma tabla de símbolos y los mismos errores.
+#  - La pila contiene no terminales (str) y terminales (TokenType, valores, código,
+#    SymKind, campo, añadir); no hay recursión, así que el anidamiento no depende del
+#    límite de recursión.
+#  - Con `build_ast=True` se usan AST_PREDICT/AST_DEFAULT, cuyas alternativas incluyen
+#    acciones Begin/End (abrir/cerrar nodo) y PushField/PopField (campo destino del hijo);
+#    cada sentencia terminada se añade a `self.ast` (ver ast_nodes.py).
+#  - Las expresiones (Call("expr") en la pila) las analiza `Parser.expr()` con su propia
+#    pila (expressions.py) y las filas de VALUES (Call("rows")) `Parser.rows()`; el nodo
+#    devuelto va al campo de la referencia.
+#  - El token actual sólo se vuelve a leer cuando cambia `self.i` (con TokenBuffer cada
+#    lectura materializa un Token).
+#  - La predicción es un acceso a diccionario por el código del token (lexer.CODES) y,
+#    si no tiene o no hay entrada, por su tipo; sin coincidencia se usa DEFAULT /
+#    ON_ERROR (ver grammar.py). Los terminales también se comparan por código.
+# Referencias:
+#  - Gramática y tablas: analizador_sql/analizador_lexico/grammar.py
+
+
+class LL1Parser(Parser):
+    def __init__(self, tokens, symtab, errlog, progress, build_ast=False, **kwargs):
+        super().__init__(tokens, symtab, errlog, progress, **kwargs)
+        self.ast = [] if build_ast else None  # sentencias (nodos de ast_nodes.py)
+
+    def stmt(self):
+        toks, symtab = self.toks, self.symtab
+        predict, default = (PREDICT, DEFAULT) if self.ast is None else (AST_PREDICT, AST_DEFAULT)
+        nodes, fields = [], []  # nodo en construcción y campo destino (sólo con AST)
+        stack = [START]
+        pop, extend = stack.pop, stack.extend
+        at = -1  # índice del token cacheado en `tk`
+        while stack:
+            top = pop()
+            if at != self.i:
+                at = self.i
+                try:
+                    tk = toks[at]
+                except IndexError:
+                    tk = toks[-1]
+
+            cls = top.__class__
+            if cls is str:
+                row = predict[top]
+                alt = row.get(tk.code) if tk.code else None
+                if alt is None:
+                    alt = row.get(tk.type)
+                if alt is None:
+                    alt = default[top]
+                if alt is None:
+                    message, sync = ON_ERROR[top]
+                    self.error(message.format(value=tk.value), tk)
+                    if sync:
+                        self.sync()
+                    continue
+                extend(alt)
+            elif cls is tuple:
+                kind, values, code, symkind, field, append = top
+                if tk.type is kind and (not code or tk.code == code):
+                    self.i += 1
+                    if symkind is not None:
+                        symtab.add(tk, symkind)
+                    if field is not None:
+                        self._set(nodes[-1], field, append, at, fields)
+                else:
+                    self.eat(kind, values, code)  # error (o silencio en pánico); no avanza
+            elif cls is Begin:
+                nodes.append(top.cls(self.i))
+            elif cls is End:
+                node = nodes.pop()
+                if nodes:
+                    self._set(nodes[-1], "", False, node, fields)
+                else:
+                    self.ast.append(node)
+            elif cls is PushField:
+                fields.append(top)
+            elif cls is Call:
+                node = getattr(self, top.method)()
+                if node is not None:
+                    self._set(nodes[-1], "", False, node, fields)
+            else:
+                fields.pop()
+
+    @staticmethod
+    def _set(node, field, append, value, fields):
+        # campo "" = el que indica la referencia `regla@campo` más interna
+        if not field:
+            field, append = fields[-1].name, fields[-1].append
+        if append:
+            getattr(node, field).append(value)
+        else:
+            setattr(node, field, value)
@@ -0,0 +1,27 @@
+import sys
+from argparse import Namespace
+
+from django.core.management.base import BaseCommand
+
+from analizador_lexico import cli
+
+# `python manage.py analyze_sql RUTA...`: el análisis por lotes de cli.py (mismas opciones,
+# formatos y códigos de salida) como comando de Django.
+#
+# Notas:
+#  - No usa la base de datos ni la caché de resultados: cada ejecución analiza los archivos.
+#  - Sin comprobaciones del sistema de Django para arrancar más rápido en pre-commit/CI.
+
+
+class Command(BaseCommand):
+    help = "Analiza archivos .sql (directorios y globs) y sale con 1 si hay errores"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        cli.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        code = cli.run(Namespace(**options), sys.stdout)
+        if code:
+            sys.exit(code)
+
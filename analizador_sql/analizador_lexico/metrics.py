@@ -0,0 +1,215 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+
+from .lexer import CODES
+from .parser import STMT_START
+
+# Instrumentación: tiempos y asignaciones por etapa, tiempo de parseo por tipo de
+# sentencia, métricas acumuladas en formato Prometheus y perfiles bajo demanda.
+#
+# Exporta:
+#  - Stages(trace_memory=False): medidas de un análisis/petición
+#      * `with stages.stage("tokenize"): ...` acumula ms y la variación neta de bloques
+#        vivos (sys.getallocatedblocks antes/después: lo liberado resta, así que no es un
+#        nº de asignaciones y puede ser negativa) y, con trace_memory, KB y pico (tracemalloc)
+#      * `statements`: {tipo: [nº, segundos]} del parser (ver run_program)
+#      * `as_dict()`: forma serializable que va en el resultado (clave "metrics")
+#  - run_program(parser, statements, on_statement=None): parser.program() midiendo cada
+#    sentencia por tipo; `on_statement(token inicial)` se llama al terminar cada una
+#  - REGISTRY / Registry: acumulados del proceso; `observe(metrics_dict)`, `inc()` y
+#    `render()` en formato de texto de Prometheus (vista views.metrics)
+#  - profiled(enabled): context manager con cProfile; al salir `.text` tiene el top de
+#    funciones por tiempo acumulado
+#  - memory_traced(enabled): arranca/para tracemalloc; al salir `.text` tiene las líneas
+#    que más memoria asignaron
+#
+# Notas:
+#  - No importa Django (se usa desde analysis.py y desde procesos worker).
+#  - Los tipos de sentencia son SELECT/INSERT/UPDATE/CREATE y OTRA (sentencia no
+#    reconocida), así la cardinalidad de las etiquetas de Prometheus está acotada.
+#  - tracemalloc es global al proceso: con varias peticiones a la vez, las medidas de
+#    una incluyen lo que asignen las otras. Sirve para diagnosticar, no para producción
+#    continua; por eso sólo se activa por petición.
+#  - REGISTRY es por proceso: con varios workers de WSGI cada uno expone lo suyo.
+#  - `analizador_stage_net_blocks` es un gauge con la variación neta de la última
+#    ejecución de cada etapa, no un contador: no es monótona ni cuenta asignaciones
+#    (para eso, `?tracemalloc=1`).
+
+
+class Stages:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory and tracemalloc.is_tracing()
+        self.stages = {}      # nombre -> [segundos, bloques, bytes, pico]
+        self.statements = {}  # tipo -> [nº, segundos]
+
+    @contextmanager
+    def stage(self, name):
+        blocks = sys.getallocatedblocks()
+        if self.trace_memory:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t0 = perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = perf_counter() - t0
+            rec = self.stages.setdefault(name, [0.0, 0, 0, 0])
+            rec[0] += elapsed
+            rec[1] += sys.getallocatedblocks() - blocks
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                rec[2] += current - before
+                rec[3] = max(rec[3], peak - before)
+
+    def add_statements(self, statements):
+        for kind, (n, secs) in statements.items():
+            rec = self.statements.setdefault(kind, [0, 0.0])
+            rec[0] += n
+            rec[1] += secs
+
+    def as_dict(self):
+        out = {"stages": {}, "statements": {}}
+        for name, (secs, blocks, nbytes, peak) in self.stages.items():
+            row = {"ms": round(secs * 1000, 3), "blocks": blocks}
+            if self.trace_memory:
+                row["alloc_kb"] = round(nbytes / 1024, 1)
+                row["peak_kb"] = round(peak / 1024, 1)
+            out["stages"][name] = row
+        for kind, (n, secs) in self.statements.items():
+            out["statements"][kind] = {"count": n, "ms": round(secs * 1000, 3)}
+        out["total_ms"] = round(sum(r["ms"] for r in out["stages"].values()), 3)
+        return out
+
+
+_STMT_KINDS = {CODES[kind]: kind for kind in STMT_START}
+
+
+def run_program(parser, statements, on_statement=None):
+    kinds = _STMT_KINDS
+    t = perf_counter()
+    for start in parser.iter_program():
+        if on_statement is not None:
+            on_statement(start)
+        now = perf_counter()
+        kind = kinds.get(start.code, "OTRA")
+        rec = statements.get(kind)
+        if rec is None:
+            statements[kind] = [1, now - t]
+        else:
+            rec[0] += 1
+            rec[1] += now - t
+        t = now
+    return statements
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = {}      # etapa -> [suma, nº]
+        self.stage_blocks = {}       # etapa -> variación neta de bloques de la última ejecución
+        self.statement_seconds = {}  # tipo -> [suma, nº]
+        self.counters = {}           # (nombre, etiquetas) -> valor
+        self.help = {
+            "analizador_requests_total": "Peticiones atendidas por vista",
+            "analizador_analyses_total": "Análisis ejecutados (no servidos desde caché)",
+            "analizador_jobs_total": "Jobs en segundo plano por estado (jobs.py)",
+        }
+
+    def observe(self, metrics):
+        with self._lock:
+            for name, row in metrics.get("stages", {}).items():
+                rec = self.stage_seconds.setdefault(name, [0.0, 0])
+                rec[0] += row["ms"] / 1000
+                rec[1] += 1
+                self.stage_blocks[name] = row["blocks"]
+            for kind, row in metrics.get("statements", {}).items():
+                rec = self.statement_seconds.setdefault(kind, [0.0, 0])
+                rec[0] += row["ms"] / 1000
+                rec[1] += row["count"]
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self, extra=None):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lab = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{suffix}{{{lab}}} {value}" if lab else f"{name}{suffix} {value}")
+
+        with self._lock:
+            metric("analizador_stage_seconds", "summary", "Tiempo por etapa del análisis",
+                   [s for name, (total, n) in sorted(self.stage_seconds.items())
+                    for s in (("_sum", [("stage", name)], round(total, 6)), ("_count", [("stage", name)], n))])
+            metric("analizador_stage_net_blocks", "gauge",
+                   "Variación neta de bloques de memoria vivos en la última ejecución de cada etapa",
+                   [("", [("stage", name)], n) for name, n in sorted(self.stage_blocks.items())])
+            metric("analizador_statement_parse_seconds", "summary", "Tiempo de parseo por tipo de sentencia",
+                   [s for kind, (total, n) in sorted(self.statement_seconds.items())
+                    for s in (("_sum", [("type", kind)], round(total, 6)), ("_count", [("type", kind)], n))])
+            by_name = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name.setdefault(name, []).append(("", list(labels), value))
+            for name, samples in by_name.items():
+                metric(name, "counter", self.help.get(name, name), samples)
+        for name, (kind, help_text, value) in (extra or {}).items():
+            metric(name, kind, help_text, [("", [], value)])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Hook:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.text = ""
+
+
+@contextmanager
+def profiled(enabled, limit=30):
+    hook = _Hook(enabled)
+    if not enabled:
+        yield hook
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield hook
+    finally:
+        prof.disable()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(limit)
+        hook.text = out.getvalue()
+
+
+@contextmanager
+def memory_traced(enabled, limit=15):
+    hook = _Hook(enabled)
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield hook
+    finally:
+        if enabled:
+            snap = tracemalloc.take_snapshot()
+            top = snap.statistics("lineno")[:limit]
+            hook.text = "\n".join(str(s) for s in top)
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('digest', models.CharField(db_index=True, max_length=32)),
+                ('version', models.CharField(max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('token_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('symbol_count', models.PositiveIntegerField(default=0)),
+                ('stats', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RunError',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('col', models.IntegerField()),
+                ('message', models.TextField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='errors', to='analizador_lexico.analysisrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'line'], name='analizador__run_id_ed8bb5_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RunSymbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('value', models.TextField()),
+                ('line', models.PositiveIntegerField()),
+                ('col', models.IntegerField()),
+                ('refs', models.PositiveIntegerField(default=1)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='symbols', to='analizador_lexico.analysisrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'kind'], name='analizador__run_id_32a361_idx'), models.Index(fields=['run', 'value'], name='analizador__run_id_86b47a_idx'), models.Index(fields=['run', 'line'], name='analizador__run_id_d708ea_idx'), models.Index(fields=['kind', 'value'], name='analizador__kind_3d2ef2_idx')],
+            },
+        ),
+    ]
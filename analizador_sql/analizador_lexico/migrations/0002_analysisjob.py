@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analizador_lexico', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('digest', models.CharField(max_length=32)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En curso'), ('done', 'Terminado'), ('failed', 'Fallido'), ('cancelled', 'Cancelado')], default='queued', max_length=10)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('progress', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='analizador__status_5cfead_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analizador_lexico', '0002_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='runsymbol',
+            name='run',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='symbols', to='analizador_lexico.analysisrun'),
+        ),
+    ]
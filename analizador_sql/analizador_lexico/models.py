@@ -1,3 +1,92 @@
 from django.db import models
 
-# Create your models here.
+# Histórico de análisis persistido en la base de datos.
+#
+# - AnalysisRun: una ejecución del análisis (archivo, digest, versión, totales, stats)
+# - RunError: errores de la ejecución (línea, columna, mensaje)
+# - RunSymbol: entradas de la tabla de símbolos de la ejecución
+# - AnalysisJob: análisis en segundo plano de un archivo grande (cola de jobs.py);
+#   estado, progreso (log del Parser y sentencias analizadas) y digest del resultado
+#
+# Índices pensados para las consultas de history.py / api.py: por ejecución
+# (run, kind), (run, value), (run, line) y entre ejecuciones (kind, value), p. ej.
+# "qué ejecuciones referencian la tabla X" o "columnas más frecuentes".
+# Las filas se insertan por lotes dentro de una transacción (history.record_run).
+
+
+class AnalysisRun(models.Model):
+    filename = models.CharField(max_length=255)
+    digest = models.CharField(max_length=32, db_index=True)
+    version = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    token_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    symbol_count = models.PositiveIntegerField(default=0)
+    stats = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.filename} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class RunError(models.Model):
+    run = models.ForeignKey(AnalysisRun, on_delete=models.CASCADE, related_name="errors")
+    line = models.PositiveIntegerField()
+    col = models.IntegerField()
+    message = models.TextField()
+
+    class Meta:
+        indexes = [models.Index(fields=["run", "line"])]
+
+
+class RunSymbol(models.Model):
+    # sin índice propio: (run, kind) ya cubre las búsquedas por ejecución
+    run = models.ForeignKey(AnalysisRun, on_delete=models.CASCADE, related_name="symbols", db_index=False)
+    kind = models.CharField(max_length=10)
+    value = models.TextField()
+    line = models.PositiveIntegerField()
+    col = models.IntegerField()
+    refs = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["run", "kind"]),
+            models.Index(fields=["run", "value"]),
+            models.Index(fields=["run", "line"]),
+            models.Index(fields=["kind", "value"]),
+        ]
+
+
+class AnalysisJob(models.Model):
+    QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+    STATUS_CHOICES = [
+        (QUEUED, "En cola"),
+        (RUNNING, "En curso"),
+        (DONE, "Terminado"),
+        (FAILED, "Fallido"),
+        (CANCELLED, "Cancelado"),
+    ]
+    ACTIVE = (QUEUED, RUNNING)
+
+    id = models.CharField(max_length=32, primary_key=True)
+    filename = models.CharField(max_length=255)
+    path = models.CharField(max_length=500)
+    size = models.PositiveBigIntegerField(default=0)
+    digest = models.CharField(max_length=32)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    cancel_requested = models.BooleanField(default=False)
+    progress = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.filename} [{self.status}]"
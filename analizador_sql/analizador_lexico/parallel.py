@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .lexer import CODES
+from .bytelexer import lexer_for
+from .ll1 import LL1Parser
+from .symbols import SymbolTable
+from .errors import ErrorLog
+from .semantic import facts
+from .metrics import run_program
+
+# Análisis en paralelo de scripts con muchas sentencias.
+#
+# Exporta:
+#  - split_statements(tokens): offsets de inicio de cada sentencia de nivel superior
+#  - parse_parallel(text, tokens, symtab, errlog, progress, workers=None,
+#    aggregate_literals=False): reparte el
+#    texto en bloques de sentencias completas y los parsea en un ProcessPoolExecutor;
+#    devuelve los hechos de cada sentencia para la pasada semántica (semantic.facts) y
+#    el tiempo de parseo por tipo de sentencia ({tipo: [nº, segundos]}, ver metrics.py)
+#  - PARALLEL_MIN_CHARS: tamaño a partir del cual compensa lanzar procesos
+#  - POOL_CONTEXT: contexto de multiprocessing de todos los ProcessPoolExecutor del análisis
+#
+# Notas:
+#  - Se corta en ';' fuera de paréntesis, usando el TokenBuffer ya calculado (no se
+#    vuelve a tokenizar en el proceso principal).
+#  - Cada proceso recibe (texto, línea, columna) del bloque, tokeniza con posiciones
+#    absolutas y usa su propio SymbolTable/ErrorLog. Si el texto son bytes (archivo
+#    mapeado, ver bytelexer.py) los offsets y bloques son de bytes y se usa ByteLexer.
+#  - La fusión es determinista: bloques en orden de aparición, refs sumadas con
+#    `SymbolTable.merge` (se conserva la primera línea/col) y errores ordenados por posición.
+#    Cada bloque guarda como mucho MAX_ERRORS y cuenta el resto en `dropped`; al fusionar
+#    se suman esos contadores y los que sobran del tope global también se cuentan
+#    (`ErrorLog.add`), así el total coincide con el secuencial. Los guardados también:
+#    los primeros MAX_ERRORS globales están entre los primeros de su bloque.
+#  - Los procesos se crean con "spawn", no con fork: los pools se abren desde hilos de
+#    WSGI o de jobs.py y un fork copiaría el proceso con locks tomados por otros hilos
+#    (logging, conexiones a la base de datos). Los workers sólo importan módulos sin Django.
+#  - Cada bloque se parsea de forma independiente: si una sentencia mal formada
+#    "consumía" el ';' en modo secuencial, los errores pueden diferir ligeramente.
+
+PARALLEL_MIN_CHARS = 1_000_000
+POOL_CONTEXT = get_context("spawn")
+
+
+def split_statements(tokens):
+    lparen, rparen, semi = CODES["("], CODES[")"], CODES[";"]
+    codes, starts = tokens.codes, tokens.starts
+    bounds = [(0, 1, 1)]
+    depth = 0
+    for k in range(len(codes)):
+        code = codes[k]
+        if code == lparen:
+            depth += 1
+        elif code == rparen:
+            depth = max(0, depth - 1)
+        elif code == semi and depth == 0:
+            bounds.append((starts[k] + 1, tokens.lines[k], tokens.cols[k] + 1))
+    return bounds
+
+
+def _chunks(text, bounds, target):
+    # agrupa sentencias consecutivas en bloques de ~`target` caracteres
+    out = []
+    start = bounds[0]
+    for b in bounds[1:]:
+        if b[0] - start[0] >= target:
+            out.append((text[start[0]:b[0]], start[1], start[2]))
+            start = b
+    if start[0] < len(text):
+        out.append((text[start[0]:], start[1], start[2]))
+    return out
+
+
+def _analyze_chunk(chunk):
+    text, line, col, aggregate_literals = chunk
+    tokens = lexer_for(text, line=line, col=col).tokenize_buffer()
+    symtab, errlog = SymbolTable(), ErrorLog()
+    parser = LL1Parser(tokens, symtab, errlog, [], build_ast=True, aggregate_literals=aggregate_literals)
+    statements = run_program(parser, {})
+    return list(symtab.entries()), errlog.items, errlog.dropped, facts(parser.ast, tokens, parser.failed), statements
+
+
+def parse_parallel(text, tokens, symtab: SymbolTable, errlog: ErrorLog, progress, workers=None,
+                   aggregate_literals=False):
+    workers = workers or os.cpu_count() or 1
+    bounds = split_statements(tokens)
+    chunks = [(*c, aggregate_literals) for c in _chunks(text, bounds, max(1, len(text) // (workers * 4)))]
+    progress.append(f"Análisis en paralelo: {len(bounds)} sentencias en {len(chunks)} bloques, {workers} procesos…")
+    if workers == 1 or len(chunks) <= 1:
+        results = map(_analyze_chunk, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+            results = list(pool.map(_analyze_chunk, chunks))
+    errors, dropped, stmt_facts, statements = [], 0, [], {}
+    for entries, errs, chunk_dropped, chunk_facts, chunk_statements in results:
+        symtab.merge(entries)
+        errors.extend(errs)
+        dropped += chunk_dropped
+        stmt_facts.extend(chunk_facts)
+        for kind, (n, secs) in chunk_statements.items():
+            rec = statements.setdefault(kind, [0, 0.0])
+            rec[0] += n
+            rec[1] += secs
+    errors.sort(key=lambda e: (e.line, e.col))
+    for e in errors:
+        errlog.add(e)
+    errlog.dropped += dropped
+    progress.append("Análisis finalizado.")
+    return stmt_facts, statements
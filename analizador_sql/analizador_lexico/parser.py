@@ -1,14 +1,46 @@
-from .lexer import TokenType
+from .lexer import TokenType, CODES
 from .symbols import SymbolTable, SymKind
 from .errors import ErrorLog, ParseError
+from .expressions import parse_expr
+from .tokenbuffer import TokenBuffer, TYPE_CODES
+from .ast_nodes import Rows, RowRun, ColumnStats
 
 # Parser ascendente/recursivo predictivo para un subconjunto de SQL.
 #
 # Clase Parser:
 #  - Constructor recibe lista de tokens, instancia de SymbolTable, ErrorLog y lista `progress` para mensajes.
-#  - `program()` itera sentencias hasta EOF.
-#  - Soporta producciones: SELECT, INSERT, UPDATE, CREATE (con gramática reducida).
+#    En lugar de la lista puede recibir un `TokenStream` (lexer en streaming): sólo se indexa hacia delante.
+#  - `program()` itera sentencias hasta EOF; `iter_program()` es la versión generadora.
+#  - Soporta producciones: SELECT (con JOIN ... ON), INSERT (varias filas en VALUES),
+#    UPDATE, CREATE (con gramática reducida).
+#  - VALUES lo analiza `rows()` también desde LL1Parser: con un TokenBuffer cada fila bien
+#    formada se reconoce sobre los arrays de tipos y códigos, sin materializar tokens ni
+#    pasar por eat(); una fila que no encaja se vuelve a analizar con `row()`, que da los
+#    mismos errores que la gramática. Con `aggregate_literals=True` los literales de
+#    VALUES no van a la tabla de símbolos uno a uno: se resumen por columna (ColumnStats:
+#    nº de NULL/enteros/decimales/strings, primero de cada clase, string más largo,
+#    menor y mayor número), así que la memoria de un INSERT enorme no crece con el nº de
+#    valores distintos.
+#  - Las expresiones de WHERE, ON, la lista de SELECT y los valores de SET las analiza
+#    `expr()` (expressions.py): AND/OR/NOT, comparaciones, IN, aritmética y paréntesis,
+#    sin recursión.
 #  - Registra símbolos en SymbolTable y errores en ErrorLog.
+#  - Recuperación de errores en modo pánico:
+#    * `eat()` fallido registra el error, NO avanza y devuelve None (SymbolTable.add
+#      ignora None); así un token que falta no desalinea el resto de la sentencia.
+#    * Un segundo error sobre el mismo token se descarta (errores en cascada).
+#    * Tras `max_stmt_errors` errores en una sentencia, o si la sentencia no se reconoce
+#      o no termina en ';', se salta hasta un token de sincronización (';', SELECT,
+#      INSERT, UPDATE, CREATE o EOF) y se ignoran el resto de errores de la sentencia.
+#    * El tope por archivo lo aplica ErrorLog (MAX_ERRORS en errors.py).
+#    * Con AST, `failed` lista las sentencias de `ast` que tuvieron algún error: su nodo
+#      es parcial y semantic.facts no las valida contra el esquema.
+#  - Las decisiones comparan `tk.code` (lexer.CODES) con las constantes de abajo en lugar
+#    del valor del token; `eat()` recibe el conjunto de valores sólo para el mensaje.
+#
+# LL1Parser (ll1.py) reutiliza esta clase (eat, recuperación, iter_program) pero sustituye
+# `stmt()` por un recorrido de la tabla LL(1) generada desde grammar.BNF; es el que usa
+# el análisis. Al cambiar una producción aquí hay que cambiar también grammar.BNF.
 #
 # Recomendación: documentar cada producción con la forma BNF en comentarios (ya está parcialmente).
 # Referencias:
@@ -16,175 +48,354 @@ from .errors import ErrorLog, ParseError
 #  - SymbolTable/SymKind: analizador_sql/analizador_lexico/symbols.py
 #  - ErrorLog/ParseError: analizador_sql/analizador_lexico/errors.py
 
+# Versión de la gramática: incrementar al cambiar producciones o mensajes de error
+# (invalida resultados cacheados, ver cache.py).
+GRAMMAR_VERSION = 4
+
+# Errores registrados por sentencia antes de saltar al siguiente punto de sincronización
+MAX_STMT_ERRORS = 3
+STMT_START = frozenset({'SELECT', 'INSERT', 'UPDATE', 'CREATE'})
+SYNC_VALUES = STMT_START | {';'}
+SYNC_CODES = frozenset(CODES[v] for v in SYNC_VALUES)
+
+# códigos de lexer.CODES usados por las producciones
+(SELECT, INSERT, UPDATE, CREATE, FROM, WHERE, INTO, VALUES, SET, TABLE, PRIMARY, KEY, NULL,
+ INT, FLOAT, VARCHAR, JOIN, ON, INNER, LEFT, RIGHT, OUTER) = (
+    CODES[w] for w in ('SELECT', 'INSERT', 'UPDATE', 'CREATE', 'FROM', 'WHERE', 'INTO', 'VALUES', 'SET', 'TABLE',
+                       'PRIMARY', 'KEY', 'NULL', 'INT', 'FLOAT', 'VARCHAR', 'JOIN', 'ON', 'INNER', 'LEFT',
+                       'RIGHT', 'OUTER'))
+COMMA, SEMI, STAR, LPAREN, RPAREN, EQ = (CODES[c] for c in (',', ';', '*', '(', ')', '='))
+
 class Parser:
-    def __init__(self, tokens, symtab: SymbolTable, errlog: ErrorLog, progress):
+    def __init__(self, tokens, symtab: SymbolTable, errlog: ErrorLog, progress, max_stmt_errors=MAX_STMT_ERRORS,
+                 aggregate_literals=False):
         self.toks = tokens
         self.i = 0
         self.symtab = symtab
         self.errlog = errlog
         self.progress = progress  # lista de strings para “log en vivo”
+        self.max_stmt_errors = max_stmt_errors
+        self.stmt_errors = 0
+        self.panic = False        # sentencia abandonada: no se registran más errores
+        self.last_error = -1      # índice del último token con error (evita repetirlo)
+        self.ast = None           # sólo LL1Parser construye el AST
+        self.failed = []          # índices de `ast` de sentencias con errores de sintaxis
+        self.aggregate_literals = aggregate_literals
 
-    def t(self):  # token actual
-        return self.toks[self.i]
+    def t(self):  # token actual (el EOF si la sincronización avanzó más allá del final)
+        try:
+            return self.toks[self.i]
+        except IndexError:
+            return self.toks[-1]
 
-    def eat(self, kind, values=None):
+    def eat(self, kind, values=None, code=0):
+        # `code`: el token debe tener ese código (los valores de `values` van en el mensaje)
         tk = self.t()
-        if tk.type == kind and (values is None or tk.value in values):
+        if tk.type == kind and (values is None or (tk.code == code if code else tk.value in values)):
             self.i += 1
             return tk
-        exp = f"{kind.name}" + (f" {values}" if values else "")
-        self.errlog.add(ParseError(f"Se esperaba {exp}, se encontró '{tk.value}'", tk.line, tk.col))
-        # intento de sincronización: avanzar uno
-        self.i += 1
-        return tk
+        if not self.muted():
+            exp = f"{kind.name}" + (f" {values}" if values else "")
+            self.error(f"Se esperaba {exp}, se encontró '{tk.value}'", tk)
+        return None
+
+    def muted(self):
+        # el error actual no se registraría (pánico o repetido): evita formatear el mensaje
+        return self.panic or self.i == self.last_error
+
+    def error(self, message, tk):
+        if self.muted():
+            return
+        self.last_error = self.i
+        self.errlog.add(ParseError(message, tk.line, tk.col))
+        self.stmt_errors += 1
+        if self.stmt_errors >= self.max_stmt_errors:
+            self.sync()
+
+    def sync(self):
+        # modo pánico: saltar hasta ';', inicio de sentencia o EOF
+        self.panic = True
+        tk = self.t()
+        while tk.type != TokenType.EOF and tk.code not in SYNC_CODES:
+            self.i += 1
+            tk = self.t()
 
     def program(self):
+        for _ in self.iter_program():
+            pass
+
+    def iter_program(self):
+        # igual que program() pero cede el primer token de cada sentencia al terminarla,
+        # para poder informar del avance mientras se analiza (ver api.analyze_stream)
         self.progress.append("Iniciando análisis del programa…")
         while self.t().type != TokenType.EOF:
+            start = self.t()
+            self.stmt_errors, self.panic = 0, False
+            nodes = len(self.ast) if self.ast is not None else 0
             self.stmt()
-            # opcionalmente comer ';' si existe
-            if self.t().value == ';':
-                self.eat(TokenType.SYMBOL, {';'})
+            # ';' opcional; cualquier otra cosa que no empiece sentencia es un error
+            tk = self.t()
+            if tk.code not in SYNC_CODES and tk.type != TokenType.EOF:
+                self.error(f"Se esperaba ';', se encontró '{tk.value}'", tk)
+                self.sync()
+            if self.t().code == SEMI:
+                self.eat(TokenType.SYMBOL, {';'}, SEMI)
+            if self.stmt_errors and self.ast is not None:
+                self.failed.extend(range(nodes, len(self.ast)))
+            yield start
         self.progress.append("Análisis finalizado.")
 
     # STMT → SELECT | INSERT | UPDATE | CREATE
     def stmt(self):
-        tk = self.t()
-        if tk.value == 'SELECT':
+        code = self.t().code
+        if code == SELECT:
             self.select_stmt()
-        elif tk.value == 'INSERT':
+        elif code == INSERT:
             self.insert_stmt()
-        elif tk.value == 'UPDATE':
+        elif code == UPDATE:
             self.update_stmt()
-        elif tk.value == 'CREATE':
+        elif code == CREATE:
             self.create_stmt()
         else:
-            self.errlog.add(ParseError(f"Sentencia no reconocida: {tk.value}", tk.line, tk.col))
-            self.i += 1
+            tk = self.t()
+            self.error(f"Sentencia no reconocida: {tk.value}", tk)
+            self.sync()
 
-    # SELECT_STMT → SELECT COLUMN_LIST FROM IDENT (WHERE COND)?
+    # SELECT_STMT → SELECT COLUMN_LIST FROM IDENT IDENT? JOIN* (WHERE EXPR)?
     def select_stmt(self):
-        sel = self.eat(TokenType.RESWORD, {'SELECT'})
+        sel = self.eat(TokenType.RESWORD, {'SELECT'}, SELECT)
         self.symtab.add(sel, SymKind.RESWORD)
         self.column_list()
-        self.eat(TokenType.RESWORD, {'FROM'})
+        self.eat(TokenType.RESWORD, {'FROM'}, FROM)
         table = self.eat(TokenType.IDENT)
         self.symtab.add(table, SymKind.TABLE)
-        if self.t().value == 'WHERE':
-            w = self.eat(TokenType.RESWORD, {'WHERE'})
+        self.alias_opt()
+        while self.t().code in (INNER, LEFT, RIGHT, JOIN):
+            self.join()
+        self.where_opt()
+
+    def alias_opt(self):
+        if self.t().type == TokenType.IDENT:
+            self.symtab.add(self.eat(TokenType.IDENT), SymKind.IDENT)
+
+    # JOIN → (INNER | LEFT OUTER? | RIGHT OUTER?)? JOIN IDENT IDENT? ON EXPR
+    def join(self):
+        code = self.t().code
+        if code == INNER:
+            self.i += 1
+        elif code == LEFT or code == RIGHT:
+            self.i += 1
+            if self.t().code == OUTER:
+                self.i += 1
+        j = self.eat(TokenType.RESWORD, {'JOIN'}, JOIN); self.symtab.add(j, SymKind.RESWORD)
+        table = self.eat(TokenType.IDENT); self.symtab.add(table, SymKind.TABLE)
+        self.alias_opt()
+        on = self.eat(TokenType.RESWORD, {'ON'}, ON); self.symtab.add(on, SymKind.RESWORD)
+        self.expr()
+
+    def where_opt(self):
+        if self.t().code == WHERE:
+            w = self.eat(TokenType.RESWORD, {'WHERE'}, WHERE)
             self.symtab.add(w, SymKind.RESWORD)
-            self.cond()
+            self.expr()
 
-    # COLUMN_LIST → * | IDENT (',' IDENT)*
+    # COLUMN_LIST → * | EXPR (',' EXPR)*
     def column_list(self):
-        if self.t().value == '*':
-            self.eat(TokenType.SYMBOL, {'*'})
+        if self.t().code == STAR:
+            self.eat(TokenType.SYMBOL, {'*'}, STAR)
         else:
-            col = self.eat(TokenType.IDENT)
-            self.symtab.add(col, SymKind.COLUMN)
-            while self.t().value == ',':
-                self.eat(TokenType.SYMBOL, {','})
-                col = self.eat(TokenType.IDENT)
-                self.symtab.add(col, SymKind.COLUMN)
-
-    # COND → IDENT OP (NUMBER | STRING | IDENT)
-    def cond(self):
-        left = self.eat(TokenType.IDENT)
-        self.symtab.add(left, SymKind.COLUMN)
-        op = self.eat(TokenType.OP)
-        self.symtab.add(op, SymKind.OP)
-        if self.t().type in (TokenType.NUMBER, TokenType.STRING):
-            lit = self.t(); self.i += 1
-            self.symtab.add(lit, SymKind.LITERAL)
-        elif self.t().type == TokenType.IDENT:
-            idt = self.eat(TokenType.IDENT)
-            self.symtab.add(idt, SymKind.IDENT)
-        else:
-            tk = self.t()
-            self.errlog.add(ParseError("Se esperaba literal o identificador en condición", tk.line, tk.col))
-            self.i += 1
+            self.expr()
+            while self.t().code == COMMA:
+                self.eat(TokenType.SYMBOL, {','}, COMMA)
+                self.expr()
+
+    # EXPR: ver expressions.py
+    def expr(self):
+        return parse_expr(self)
 
-    # INSERT_STMT → INSERT INTO IDENT '(' IDENT_LIST ')' VALUES '(' LITERAL_LIST ')'
+    # INSERT_STMT → INSERT INTO IDENT '(' IDENT_LIST ')' VALUES ROWS
     def insert_stmt(self):
-        ins = self.eat(TokenType.RESWORD, {'INSERT'}); self.symtab.add(ins, SymKind.RESWORD)
-        self.eat(TokenType.RESWORD, {'INTO'})
+        ins = self.eat(TokenType.RESWORD, {'INSERT'}, INSERT); self.symtab.add(ins, SymKind.RESWORD)
+        self.eat(TokenType.RESWORD, {'INTO'}, INTO)
         tbl = self.eat(TokenType.IDENT); self.symtab.add(tbl, SymKind.TABLE)
-        self.eat(TokenType.SYMBOL, {'('}); self.ident_list(); self.eat(TokenType.SYMBOL, {')'})
-        self.eat(TokenType.RESWORD, {'VALUES'})
-        self.eat(TokenType.SYMBOL, {'('}); self.literal_list(); self.eat(TokenType.SYMBOL, {')'})
+        self.eat(TokenType.SYMBOL, {'('}, LPAREN); self.ident_list(); self.eat(TokenType.SYMBOL, {')'}, RPAREN)
+        self.eat(TokenType.RESWORD, {'VALUES'}, VALUES)
+        self.rows()
+
+    # ROWS → ROW (',' ROW)*
+    def rows(self):
+        toks, symtab = self.toks, self.symtab
+        node = Rows(self.i) if self.ast is not None else None
+        stats = _Stats() if self.aggregate_literals else None
+        fast = isinstance(toks, TokenBuffer)
+        if fast:
+            types, codes, lines, cols, value = toks.types, toks.codes, toks.lines, toks.cols, toks.value
+        while True:
+            end = _scan_row(types, codes, self.i) if fast and self.i < len(codes) else -1
+            if end >= 0:
+                # fila bien formada: literales en posiciones alternas entre '(' y ')'
+                lits = range(self.i + 1, end, 2)
+                if stats is not None:
+                    for k, i in enumerate(lits):
+                        stats.add(k, i, TYPE_CODES[types[i]], codes[i], value(i))
+                else:
+                    for i in lits:
+                        symtab.add_value(SymKind.LITERAL, value(i), lines[i], cols[i])
+                    if node is not None:
+                        node.values.extend(lits)
+                self.i = end
+            else:
+                items = self.row()
+                lits = [i for i, _ in items]
+                if stats is not None:
+                    for k, (i, tk) in enumerate(items):
+                        stats.add(k, i, tk.type, tk.code, tk.value)
+                else:
+                    for _, tk in items:
+                        symtab.add(tk, SymKind.LITERAL)
+                    if node is not None:
+                        node.values.extend(lits)
+            if node is not None:
+                width = len(lits)
+                last = node.runs[-1] if node.runs else None
+                if last is not None and last.width == width:
+                    last.count += 1
+                else:
+                    node.runs.append(RowRun(lits[0] if width else None, width, 1))
+            if self.t().code != COMMA:
+                break
+            self.i += 1
+        if node is not None and stats is not None:
+            node.stats = [rec[0] for rec in stats]
+        return node
+
+    # ROW → '(' LITERAL (',' LITERAL)* ')'
+    # con recuperación de errores; devuelve [(índice, token)] de los literales
+    def row(self):
+        self.eat(TokenType.SYMBOL, {'('}, LPAREN)
+        items = []
+        self.literal(items)
+        while self.t().code == COMMA:
+            self.eat(TokenType.SYMBOL, {','}, COMMA)
+            self.literal(items)
+        self.eat(TokenType.SYMBOL, {')'}, RPAREN)
+        return items
 
     def ident_list(self):
         idt = self.eat(TokenType.IDENT); self.symtab.add(idt, SymKind.COLUMN)
-        while self.t().value == ',':
-            self.eat(TokenType.SYMBOL, {','})
+        while self.t().code == COMMA:
+            self.eat(TokenType.SYMBOL, {','}, COMMA)
             idt = self.eat(TokenType.IDENT); self.symtab.add(idt, SymKind.COLUMN)
 
-    def literal_list(self):
-        self.literal()
-        while self.t().value == ',':
-            self.eat(TokenType.SYMBOL, {','})
-            self.literal()
-
-    def literal(self):
+    def literal(self, items):
         tk = self.t()
-        if tk.type in (TokenType.NUMBER, TokenType.STRING):
-            self.symtab.add(tk, SymKind.LITERAL); self.i += 1
-        elif tk.value == 'NULL':
-            self.symtab.add(tk, SymKind.LITERAL); self.i += 1
+        if tk.type in (TokenType.NUMBER, TokenType.STRING) or tk.code == NULL:
+            items.append((self.i, tk)); self.i += 1
         else:
-            self.errlog.add(ParseError("Literal inválido (NUMBER/STRING/NULL)", tk.line, tk.col)); self.i += 1
+            self.error("Literal inválido (NUMBER/STRING/NULL)", tk)
 
-    # UPDATE_STMT → UPDATE IDENT SET ASSIGN_LIST (WHERE COND)?
+    # UPDATE_STMT → UPDATE IDENT SET ASSIGN_LIST (WHERE EXPR)?
     def update_stmt(self):
-        up = self.eat(TokenType.RESWORD, {'UPDATE'}); self.symtab.add(up, SymKind.RESWORD)
+        up = self.eat(TokenType.RESWORD, {'UPDATE'}, UPDATE); self.symtab.add(up, SymKind.RESWORD)
         tbl = self.eat(TokenType.IDENT); self.symtab.add(tbl, SymKind.TABLE)
-        self.eat(TokenType.RESWORD, {'SET'})
+        self.eat(TokenType.RESWORD, {'SET'}, SET)
         self.assign_list()
-        if self.t().value == 'WHERE':
-            w = self.eat(TokenType.RESWORD, {'WHERE'}); self.symtab.add(w, SymKind.RESWORD)
-            self.cond()
+        self.where_opt()
 
     def assign_list(self):
         self.assign()
-        while self.t().value == ',':
-            self.eat(TokenType.SYMBOL, {','})
+        while self.t().code == COMMA:
+            self.eat(TokenType.SYMBOL, {','}, COMMA)
             self.assign()
 
+    # ASSIGN → IDENT '=' EXPR
     def assign(self):
         col = self.eat(TokenType.IDENT); self.symtab.add(col, SymKind.COLUMN)
-        self.eat(TokenType.OP, {'='})
-        self.literal()
+        self.eat(TokenType.OP, {'='}, EQ)
+        self.expr()
 
     # CREATE_STMT → CREATE TABLE IDENT '(' COLDEF_LIST ')'
     def create_stmt(self):
-        cr = self.eat(TokenType.RESWORD, {'CREATE'}); self.symtab.add(cr, SymKind.RESWORD)
-        self.eat(TokenType.RESWORD, {'TABLE'})
+        cr = self.eat(TokenType.RESWORD, {'CREATE'}, CREATE); self.symtab.add(cr, SymKind.RESWORD)
+        self.eat(TokenType.RESWORD, {'TABLE'}, TABLE)
         tbl = self.eat(TokenType.IDENT); self.symtab.add(tbl, SymKind.TABLE)
-        self.eat(TokenType.SYMBOL, {'('}); self.coldef_list(); self.eat(TokenType.SYMBOL, {')'})
+        self.eat(TokenType.SYMBOL, {'('}, LPAREN); self.coldef_list(); self.eat(TokenType.SYMBOL, {')'}, RPAREN)
 
     def coldef_list(self):
         self.coldef()
-        while self.t().value == ',':
-            self.eat(TokenType.SYMBOL, {','})
+        while self.t().code == COMMA:
+            self.eat(TokenType.SYMBOL, {','}, COMMA)
             self.coldef()
 
     # COLDEF → IDENT TYPE (PRIMARY KEY)?
     def coldef(self):
         col = self.eat(TokenType.IDENT); self.symtab.add(col, SymKind.COLUMN)
         self.type_spec()
-        if self.t().value == 'PRIMARY':
-            self.eat(TokenType.RESWORD, {'PRIMARY'})
-            self.eat(TokenType.RESWORD, {'KEY'})
+        if self.t().code == PRIMARY:
+            self.eat(TokenType.RESWORD, {'PRIMARY'}, PRIMARY)
+            self.eat(TokenType.RESWORD, {'KEY'}, KEY)
 
     # TYPE → INT | VARCHAR '(' NUMBER ')' | FLOAT
     def type_spec(self):
         tk = self.t()
-        if tk.value == 'INT' or tk.value == 'FLOAT':
+        if tk.code == INT or tk.code == FLOAT:
             self.i += 1; self.symtab.add(tk, SymKind.TYPE); return
-        if tk.value == 'VARCHAR':
+        if tk.code == VARCHAR:
             self.i += 1; self.symtab.add(tk, SymKind.TYPE)
-            self.eat(TokenType.SYMBOL, {'('})
+            self.eat(TokenType.SYMBOL, {'('}, LPAREN)
             num = self.eat(TokenType.NUMBER); self.symtab.add(num, SymKind.TYPEARG)
-            self.eat(TokenType.SYMBOL, {')'})
+            self.eat(TokenType.SYMBOL, {')'}, RPAREN)
             return
-        self.errlog.add(ParseError("Tipo de dato inválido (INT|FLOAT|VARCHAR(n))", tk.line, tk.col)); self.i += 1
+        self.error("Tipo de dato inválido (INT|FLOAT|VARCHAR(n))", tk)
+
+
+_NUMBER, _STRING = TYPE_CODES.index(TokenType.NUMBER), TYPE_CODES.index(TokenType.STRING)
+
+
+def _scan_row(types, codes, j):
+    # índice tras el ')' de la fila bien formada que empieza en `j`, o -1
+    if codes[j] != LPAREN:
+        return -1
+    j += 1
+    while True:
+        code = codes[j]
+        if code != NULL and (code or (types[j] != _NUMBER and types[j] != _STRING)):
+            return -1
+        code = codes[j + 1]
+        if code == RPAREN:
+            return j + 2
+        if code != COMMA:
+            return -1
+        j += 2
+
+
+class _Stats(list):
+    # por posición en la fila: [ColumnStats, menor número, mayor número, longitud del
+    # string más largo] (modo agregado)
+    def add(self, k, i, ttype, code, value):
+        if k == len(self):
+            self.append([ColumnStats(i, 0, 0, 0, 0), None, None, -1])
+        rec = self[k]
+        st = rec[0]
+        if code == NULL:
+            st.nulls += 1
+        elif ttype is TokenType.STRING:
+            st.strings += 1
+            if st.first_string is None:
+                st.first_string = i
+            if len(value) > rec[3]:
+                rec[3], st.longest = len(value), i
+        else:
+            if "." in value:
+                st.floats += 1
+                if st.first_float is None:
+                    st.first_float = i
+            else:
+                st.ints += 1
+                if st.first_int is None:
+                    st.first_int = i
+            x = float(value)
+            if rec[1] is None or x < rec[1]:
+                rec[1], st.min = x, i
+            if rec[2] is None or x > rec[2]:
+                rec[2], st.max = x, i
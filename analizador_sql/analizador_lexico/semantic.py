@@ -0,0 +1,314 @@
+from .lexer import TokenType
+from .errors import ErrorLog, SemanticError
+from .ast_nodes import Name, Literal, Compare, InList
+
+# Validación semántica contra el esquema declarado con CREATE TABLE.
+#
+# Exporta:
+#  - facts(stmts, tokens, failed=()): resume el AST (ast_nodes) en tuplas compactas con los
+#    tokens ya resueltos, independientes del TokenBuffer (se pueden cachear y enviar entre
+#    procesos); omite las sentencias de `failed` (Parser.failed: con errores de sintaxis)
+#  - shift_facts(facts, fn): aplica `fn(línea, col) -> (línea, col)` a cada token (incremental)
+#  - Catalog: {tabla: {columna: Column}} construido a partir de los CREATE TABLE
+#  - SemanticChecker(errlog, catalog=None, strict_tables=False).check(facts)
+#  - SEMANTIC_VERSION: incrementar al cambiar las comprobaciones (forma parte de la
+#    versión de los resultados cacheados, ver analysis.ANALYSIS_VERSION)
+#
+# Comprobaciones (en orden de sentencias, así un CREATE sólo vale para lo que le sigue):
+#  - CREATE: tabla o columna repetida.
+#  - INSERT: columnas existentes y, por fila, nº de columnas = nº de valores y tipo de
+#    cada literal. En modo agregado (Parser `aggregate_literals`) el nº de valores se
+#    comprueba por tramos de filas iguales y el tipo con el resumen de cada columna: un
+#    error por tramo y por clase de literal incompatible, con cuántos más hay.
+#  - UPDATE: columnas asignadas y de las expresiones, y tipo de los literales.
+#  - SELECT: columnas de la lista, de los ON y del WHERE. Con JOIN, `t.col` se resuelve
+#    por nombre de tabla o alias y una columna sin tabla debe estar en exactamente una
+#    de las tablas (si no, no existe o es ambigua).
+#  - Comparaciones e IN entre una columna y literales: tipo de cada literal.
+#  - Tipos: INT sólo enteros, FLOAT cualquier número, VARCHAR(n) strings de hasta n
+#    caracteres; NULL vale para cualquier columna.
+#
+# Notas:
+#  - Los nombres de tabla/columna se comparan sin distinguir mayúsculas (como SQL).
+#  - Una sentencia con errores de sintaxis no se valida: su AST es parcial (faltan
+#    columnas, valores desplazados...) y sólo daría errores en cascada.
+#  - Las sentencias sobre tablas que no se han declarado se ignoran salvo con
+#    `strict_tables=True` (un archivo suelto suele usar tablas definidas en otro).
+#  - Una tabla o alias que no aparece en la sentencia (`x.col`) es error aunque no haya
+#    catálogo; una columna sin tabla con alguna tabla no declarada no se comprueba.
+#  - Cada token es (TokenType, valor, línea, col); la tabla del catálogo es un dict, así
+#    que la pasada es lineal en el nº de tokens de las sentencias.
+#  - Las expresiones se resumen sin recursión en una tupla plana de columnas
+#    (tabla|None, columna, literales con los que se compara), así que ni los hechos ni
+#    shift_facts dependen de la profundidad del AST.
+
+SEMANTIC_VERSION = 4
+
+
+class Column:
+    __slots__ = ("name", "type", "size")
+
+    def __init__(self, name, type, size=None):
+        self.name, self.type, self.size = name, type, size
+
+
+class Catalog:
+    def __init__(self):
+        self.tables = {}  # nombre en minúsculas -> {columna en minúsculas: Column}
+
+    def table(self, name):
+        return self.tables.get(name.lower())
+
+    def __contains__(self, name):
+        return name.lower() in self.tables
+
+
+def _resolver(tokens):
+    # TokenBuffer: leer los arrays directamente, sin materializar un Token por referencia
+    if hasattr(tokens, "lines"):
+        ttype, value, lines, cols = tokens.type, tokens.value, tokens.lines, tokens.cols
+        return lambda i: None if i is None else (ttype(i), value(i), lines[i], cols[i])
+
+    def ref(i):
+        if i is None:
+            return None
+        tk = tokens[i]
+        return (tk.type, tk.value, tk.line, tk.col)
+    return ref
+
+
+def _names(roots, ref):
+    # (tabla|None, columna, (literales comparados)) de cada columna de las expresiones
+    out = []
+    stack = [n for n in reversed(roots) if n is not None]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node = pop()
+        cls = node.__class__
+        if cls is Name:
+            out.append((ref(node.qualifier), ref(node.name), ()))
+            continue
+        if cls is Literal:
+            continue
+        if cls is Compare:
+            left, right = node.left, node.right
+            if left.__class__ is Literal and right.__class__ is Name:
+                left, right = right, left
+            if left.__class__ is Name and right.__class__ is Literal:
+                out.append((ref(left.qualifier), ref(left.name), (ref(right.value),)))
+                continue
+            children = (left, right)
+        elif cls is InList and node.operand.__class__ is Name:
+            col = node.operand
+            out.append((ref(col.qualifier), ref(col.name),
+                        tuple(ref(i.value) for i in node.items if i.__class__ is Literal)))
+            children = [i for i in node.items if i.__class__ is not Literal]
+        else:
+            children = [getattr(node, name) for name, kind in node.FIELDS if kind == "node"]
+            for name, kind in node.FIELDS:
+                if kind == "nodes":
+                    children.extend(getattr(node, name))
+        for child in reversed(children):
+            if child is not None:
+                push(child)
+    return tuple(out)
+
+
+def _rows(node, ncols, ref):
+    # (filas, tramos, stats) de un nodo Rows: con literales, una tupla por fila; en modo
+    # agregado, los tramos con otro nº de valores que columnas y el resumen por columna
+    if node is None:
+        return (), (), ()
+    if node.stats:
+        runs = tuple((ref(r.start), r.width, r.count) for r in node.runs if r.width != ncols)
+        stats = tuple((c.nulls, c.ints, c.floats, c.strings, ref(c.first_int), ref(c.first_float),
+                       ref(c.first_string), ref(c.longest), ref(c.min), ref(c.max)) for c in node.stats)
+        return (), runs, stats
+    values, rows, pos = node.values, [], 0
+    for run in node.runs:
+        width = run.width
+        for _ in range(run.count):
+            rows.append(tuple(map(ref, values[pos:pos + width])))
+            pos += width
+    return tuple(rows), (), ()
+
+
+def facts(stmts, tokens, failed=()):
+    ref = _resolver(tokens)
+    failed = set(failed)
+
+    out = []
+    for k, s in enumerate(stmts):
+        if k in failed:
+            continue
+        name = type(s).__name__
+        table = ref(s.table)
+        if name == "CreateStmt":
+            out.append(("CREATE", table, tuple((ref(c.name), ref(c.type), ref(c.size)) for c in s.coldefs)))
+        elif name == "InsertStmt":
+            out.append(("INSERT", table, tuple(map(ref, s.columns)), *_rows(s.rows, len(s.columns), ref)))
+        elif name == "UpdateStmt":
+            assigns = tuple((ref(a.column), ref(a.value.value) if a.value.__class__ is Literal else None)
+                            for a in s.assigns)
+            exprs = [a.value for a in s.assigns if a.value.__class__ is not Literal] + [s.where]
+            out.append(("UPDATE", table, assigns, _names(exprs, ref)))
+        elif name == "SelectStmt":
+            joins = tuple((ref(j.table), ref(j.alias)) for j in s.joins)
+            exprs = s.columns + [j.on for j in s.joins] + [s.where]
+            out.append(("SELECT", table, ref(s.alias), joins, _names(exprs, ref)))
+    return out
+
+
+def shift_facts(obj, fn):
+    if obj is None or obj.__class__ is str or obj.__class__ is int:
+        return obj
+    if obj and obj[0].__class__ is TokenType:
+        return (obj[0], obj[1], *fn(obj[2], obj[3]))
+    return tuple(shift_facts(o, fn) for o in obj) if obj.__class__ is tuple else [shift_facts(o, fn) for o in obj]
+
+
+class SemanticChecker:
+    def __init__(self, errlog: ErrorLog, catalog: Catalog = None, strict_tables=False):
+        self.errlog = errlog
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.strict_tables = strict_tables
+
+    def error(self, message, ref):
+        self.errlog.add(SemanticError(message, ref[2], ref[3]))
+
+    def check(self, facts):
+        for fact in facts:
+            kind, table = fact[0], fact[1]
+            if table is None:  # error de sintaxis: no hay tabla que comprobar
+                continue
+            if kind == "CREATE":
+                self.create(table, fact[2])
+            elif kind == "INSERT":
+                columns = self.table(table)
+                if columns is not None:
+                    self.insert(table, columns, *fact[2:])
+            elif kind == "UPDATE":
+                scope = self.scope([(table, None)])
+                columns = scope[table[1].lower()][1]
+                if columns is not None:
+                    for col, value in fact[2]:
+                        self.literal(self.column(table, columns, col), value)
+                self.names(scope, fact[3])
+            else:
+                self.names(self.scope([(table, fact[2])] + list(fact[3])), fact[4])
+
+    def table(self, table):
+        columns = self.catalog.table(table[1])
+        if columns is None and self.strict_tables:
+            self.error(f"Tabla '{table[1]}' no definida", table)
+        return columns
+
+    def scope(self, tables):
+        # {nombre o alias en minúsculas: (tabla, columnas | None)}
+        scope = {}
+        for table, alias in tables:
+            if table is None:
+                continue
+            entry = (table, self.table(table))
+            scope.setdefault(table[1].lower(), entry)
+            if alias is not None:
+                scope[alias[1].lower()] = entry
+        return scope
+
+    def names(self, scope, names):
+        tables = list({id(e): e for e in scope.values()}.values())
+        for qualifier, ref, literals in names:
+            if ref is None:
+                continue
+            if qualifier is not None:
+                entry = scope.get(qualifier[1].lower())
+                if entry is None:
+                    self.error(f"'{qualifier[1]}' no es una tabla ni un alias de la sentencia", qualifier)
+                    continue
+                col = None if entry[1] is None else self.column(entry[0], entry[1], ref)
+            else:
+                col = self.unqualified(tables, ref)
+            for lit in literals:
+                self.literal(col, lit)
+
+    def unqualified(self, tables, ref):
+        if len(tables) == 1:
+            table, columns = tables[0]
+            return None if columns is None else self.column(table, columns, ref)
+        key = ref[1].lower()
+        hits = [(t, c[key]) for t, c in tables if c is not None and key in c]
+        if len(hits) > 1:
+            names = ", ".join(f"'{t[1]}'" for t, _ in hits)
+            self.error(f"La columna '{ref[1]}' es ambigua ({names})", ref)
+            return None
+        if hits:
+            return hits[0][1]
+        if tables and all(c is not None for _, c in tables):
+            names = ", ".join(f"'{t[1]}'" for t, _ in tables)
+            self.error(f"La columna '{ref[1]}' no existe en las tablas {names}", ref)
+        return None
+
+    def create(self, table, coldefs):
+        if table[1] in self.catalog:
+            self.error(f"Tabla '{table[1]}' ya definida", table)
+            return
+        columns = {}
+        for name, type_, size in coldefs:
+            if name is None or type_ is None:
+                continue
+            key = name[1].lower()
+            if key in columns:
+                self.error(f"Columna '{name[1]}' repetida en la tabla '{table[1]}'", name)
+                continue
+            columns[key] = Column(name[1], type_[1], int(size[1]) if size and size[1].isdigit() else None)
+        self.catalog.tables[table[1].lower()] = columns
+
+    def column(self, table, columns, ref):
+        if ref is None:
+            return None
+        col = columns.get(ref[1].lower())
+        if col is None:
+            self.error(f"La columna '{ref[1]}' no existe en la tabla '{table[1]}'", ref)
+        return col
+
+    def insert(self, table, columns, cols, rows, runs=(), stats=()):
+        targets = [self.column(table, columns, c) for c in cols]
+        if runs or stats:
+            self.aggregated(targets, cols, runs, stats)
+        for values in rows:
+            if cols and values and len(cols) != len(values):
+                self.error(f"INSERT con {len(cols)} columnas y {len(values)} valores", values[0])
+            for col, value in zip(targets, values):
+                self.literal(col, value)
+
+    def aggregated(self, targets, cols, runs, stats):
+        # INSERT en modo agregado: un error por tramo de filas y por clase de literal
+        for first, width, count in runs:
+            if cols and width:
+                more = f" ({count} filas)" if count > 1 else ""
+                self.error(f"INSERT con {len(cols)} columnas y {width} valores{more}", first)
+        for col, (_, ints, floats, strings, first_int, first_float, first_string, longest, _, _) in zip(targets, stats):
+            if col is None:
+                continue
+            self.literal(col, first_int, ints - 1)
+            self.literal(col, first_float, floats - 1)
+            if col.type == "VARCHAR":
+                self.literal(col, longest)  # sólo puede fallar por longitud
+            else:
+                self.literal(col, first_string, strings - 1)
+
+    def literal(self, col, ref, more=0):
+        # `more`: cuántos literales más de la misma clase representa `ref` (modo agregado)
+        if col is None or ref is None or ref[0] is TokenType.RESWORD:  # NULL
+            return
+        ttype, value = ref[0], ref[1]
+        more = f" (y {more} más)" if more > 0 else ""
+        if col.type == "INT" and not (ttype is TokenType.NUMBER and "." not in value):
+            self.error(f"Valor {value} incompatible con {col.name} INT{more}", ref)
+        elif col.type == "FLOAT" and ttype is not TokenType.NUMBER:
+            self.error(f"Valor {value} incompatible con {col.name} FLOAT{more}", ref)
+        elif col.type == "VARCHAR":
+            if ttype is not TokenType.STRING:
+                self.error(f"Valor {value} incompatible con {col.name} VARCHAR{more}", ref)
+            elif col.size is not None and len(value) - 2 > col.size:
+                self.error(f"El texto {value} excede VARCHAR({col.size}) de {col.name}", ref)
@@ -1,7 +1,10 @@
 import hashlib
-from dataclasses import dataclass
+import sys
+import zlib
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Dict
+from itertools import chain
+from typing import List, Dict, Iterator, Optional
 
 # Implementación simple de tabla de símbolos basada en hashing.
 #
@@ -9,11 +12,23 @@ from typing import List, Dict
 #  - SymKind: Enum con tipos de entrada (RESWORD, TABLE, COLUMN, IDENT, LITERAL, OP, TYPE, TYPEARG, EOF)
 #  - SymEntry: dataclass que representa una entrada de la tabla de símbolos
 #  - SymbolTable: clase con buckets, add(), entries(), stats()
+#  - HASH_STRATEGIES: funciones de hash disponibles para el índice
 #
 # Notas:
-#  - El hash se calcula con md5 de la tupla (kind:value:line:col)
-#  - `add()` incrementa refs si la entrada ya existe en el bucket
-#  - `stats()` devuelve colisiones y recuentos por tipo
+#  - La clave es (kind, value) con `value` internado (`sys.intern`); el hash es no
+#    criptográfico (crc32 por defecto) y se guarda en la entrada para no recalcularlo.
+#  - Los buckets se duplican cuando el factor de carga supera `max_load`, así que
+#    `add()` es O(1) amortizado aunque haya cientos de miles de identificadores.
+#  - `SymEntry.hash` (md5 de kind:value) sólo se usa para mostrar y se calcula
+#    de forma perezosa la primera vez que se consulta.
+#  - `add()` incrementa refs si la entrada ya existe en el bucket; `add_value()` es lo
+#    mismo sin Token (el Parser lo usa leyendo directamente los arrays de un TokenBuffer)
+#  - Colisiones, recuentos por tipo y totales se mantienen al insertar: `stats()`
+#    es O(nº de tipos) y puede consultarse en cualquier momento del análisis.
+#  - `entries(order)` es un iterador sin copia: "insertion" (por defecto), "kind",
+#    "bucket" u "refs" (este último sí ordena, de mayor a menor número de refs).
+#  - `merge()` incorpora entradas de otra tabla (análisis en paralelo): suma refs y
+#    conserva la línea/columna de la primera aparición
 
 class SymKind(Enum):
     RESWORD = "RESWORD"
@@ -26,51 +41,114 @@ class SymKind(Enum):
     TYPEARG = "TYPEARG"
     EOF     = "EOF"
 
+
+def _hash_crc32(kind: SymKind, value: str) -> int:
+    return zlib.crc32(value.encode(), zlib.crc32(kind.value.encode()))
+
+
+def _hash_builtin(kind: SymKind, value: str) -> int:
+    # hash de Python: el más rápido, pero aleatorizado por proceso (PYTHONHASHSEED)
+    return hash((kind.value, value)) & 0xFFFFFFFFFFFFFFFF
+
+
+def _hash_md5(kind: SymKind, value: str) -> int:
+    # estrategia original, conservada para comparar
+    return int(hashlib.md5(f"{kind.value}:{value}".encode()).hexdigest()[:8], 16)
+
+
+HASH_STRATEGIES = {
+    "crc32": _hash_crc32,
+    "builtin": _hash_builtin,
+    "md5": _hash_md5,
+}
+
 @dataclass
 class SymEntry:
-    hash: str
     kind: SymKind
     value: str
     line: int
     col: int
     refs: int = 1
+    _h: int = field(default=0, repr=False, compare=False)
+    _md5: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def hash(self) -> str:
+        if self._md5 is None:
+            self._md5 = hashlib.md5(f"{self.kind.value}:{self.value}".encode()).hexdigest()
+        return self._md5
 
 class SymbolTable:
-    def __init__(self, size=1024):
+    def __init__(self, size=1024, hash_strategy="crc32", max_load=0.75):
         self.size = size
         self.buckets: List[List[SymEntry]] = [[] for _ in range(size)]
         self.total = 0
+        self.max_load = max_load
+        self.hash_strategy = hash_strategy if isinstance(hash_strategy, str) else getattr(hash_strategy, "__name__", "custom")
+        self._hash = HASH_STRATEGIES[hash_strategy] if isinstance(hash_strategy, str) else hash_strategy
+        self.resizes = 0
+        self._used = 0      # buckets no vacíos: colisiones = total - _used
+        self._order: List[SymEntry] = []
+        self._by_kind: Dict[SymKind, List[SymEntry]] = {}
 
-    def _idx(self, code: str) -> int:
-        return int(code[:8], 16) % self.size
-
-    def add(self, token, kind: SymKind):
-        # raw = f"{kind.value}:{token.value}:{token.line}:{token.col}"
-        raw = f"{kind.value}:{token.value}"
-        h = hashlib.md5(raw.encode()).hexdigest()
-        idx = self._idx(h)
-        for e in self.buckets[idx]:
-            if e.hash == h:
-                e.refs += 1
+    def _insert(self, kind: SymKind, value: str, line: int, col: int, refs: int):
+        value = sys.intern(value)
+        h = self._hash(kind, value)
+        bucket = self.buckets[h % self.size]
+        for e in bucket:
+            if e._h == h and e.kind is kind and e.value == value:
+                e.refs += refs
                 return
-        self.buckets[idx].append(SymEntry(hash=h, kind=kind, value=token.value, line=token.line, col=token.col))
+        if not bucket:
+            self._used += 1
+        e = SymEntry(kind=kind, value=value, line=line, col=col, refs=refs, _h=h)
+        bucket.append(e)
+        self._order.append(e)
+        self._by_kind.setdefault(kind, []).append(e)
         self.total += 1
+        if self.total > self.size * self.max_load:
+            self._resize(self.size * 2)
 
-    def entries(self) -> List[SymEntry]:
-        out: List[SymEntry] = []
+    def _resize(self, size: int):
+        buckets: List[List[SymEntry]] = [[] for _ in range(size)]
         for b in self.buckets:
-            out.extend(b)
-        return out
+            for e in b:
+                buckets[e._h % size].append(e)
+        self.buckets = buckets
+        self.size = size
+        self._used = sum(1 for b in buckets if b)
+        self.resizes += 1
+
+    def add(self, token, kind: SymKind):
+        if token is None:  # eat() fallido: no hay símbolo que registrar
+            return
+        self._insert(kind, token.value, token.line, token.col, 1)
+
+    def add_value(self, kind: SymKind, value: str, line: int, col: int):
+        self._insert(kind, value, line, col, 1)
+
+    def merge(self, entries):
+        for src in entries:
+            self._insert(src.kind, src.value, src.line, src.col, src.refs)
+
+    def entries(self, order: str = "insertion") -> Iterator[SymEntry]:
+        if order == "insertion":
+            return iter(self._order)
+        if order == "kind":
+            return chain.from_iterable(self._by_kind[k] for k in SymKind if k in self._by_kind)
+        if order == "bucket":
+            return chain.from_iterable(self.buckets)
+        if order == "refs":
+            return iter(sorted(self._order, key=lambda e: e.refs, reverse=True))
+        raise ValueError(f"Orden desconocido para entries(): {order}")
 
     def stats(self) -> Dict:
-        collisions = sum(max(0, len(b)-1) for b in self.buckets)
-        by_kind: Dict[str,int] = {}
-        for e in self.entries():
-            by_kind[e.kind.value] = by_kind.get(e.kind.value, 0) + 1
         return {
             "size": self.size,
             "total_entries": self.total,
-            "collisions": collisions,
+            "collisions": self.total - self._used,
             "load_factor": round(self.total / self.size, 4),
-            "by_kind": by_kind
+            "hash_strategy": self.hash_strategy,
+            "resizes": self.resizes,
+            "by_kind": {k.value: len(v) for k, v in self._by_kind.items()}
         }
@@ -1,3 +1,1413 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import zlib
+from argparse import Namespace
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError
 from django.test import TestCase
+from django.urls import reverse
+
+from benchmarks.bench_history import make_result
+from benchmarks.corpus import generate, parse_mix
+
+from . import api, cli
+from .analysis import analyze_source, parse_ast
+from .bytelexer import _DIGIT_RANGES, _WS_RANGES, ByteLexer, mapped
+from .cache import result_cache
+from .errors import ErrorLog, ParseError
+from .ast_nodes import (NODE_TYPES, Chain, Compare, InList, Name, Unary, dumps_binary, dumps_json, loads_binary,
+                        to_dict)
+from .grammar import GrammarError, build_tables, parse_bnf
+from .history import record_run, top_values
+from .incremental import IncrementalAnalyzer, split_source
+from .jobs import JobQueue, _Progress, job_queue
+from .lexer import CODE_NAMES, CODES, RESWORDS, Lexer, TokenStream, TokenType, WordPool
+from .lineindex import LineIndex
+from .ll1 import LL1Parser
+from .parser import Parser
+from .semantic import SemanticChecker, facts
+from .metrics import Registry, Stages, run_program
+from .models import AnalysisJob, AnalysisRun, RunError, RunSymbol
+from .parallel import split_statements
+from .symbols import HASH_STRATEGIES, SymbolTable, SymKind
+from .tokenbuffer import CODE_OF
+
+# Pruebas del analizador (python manage.py test analizador_lexico).
+#
+# Notas:
+#  - Los archivos de ejemplo son test_data/validas.sql y test_data/con_errores.sql
+#    (en la raíz del repositorio); SAMPLES los lee una vez.
+#  - Las pruebas comparan implementaciones alternativas entre sí (streaming, DFA, bytes,
+#    LL(1), paralelo, incremental) contra la de referencia, así que no dependen de los
+#    mensajes exactos salvo donde se prueba un error concreto.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test_data")
+SAMPLES = {name: open(os.path.join(DATA_DIR, name), encoding="utf-8").read()
+           for name in ("validas.sql", "con_errores.sql")}
+
+
+def token_tuples(tokens):
+    return [(t.type, t.value, t.line, t.col, t.code) for t in tokens]
+
+
+class StreamingLexerTests(TestCase):
+    # user-001: iter_tokens por bloques == texto completo, corte donde corte el bloque
+
+    TRICKY = ("SELECT a<=b, c<>d, 12.5 FROM t -- coment\n"
+              "WHERE x = 'hola\nmundo' AND ñandú >= 3;\n"
+              "INSERT INTO t VALUES ('a''b', 1.25, 'ünï');")
+
+    def check(self, text, chunk_sizes):
+        ref = token_tuples(Lexer(text).iter_tokens())
+        for size in chunk_sizes:
+            got = token_tuples(Lexer("").iter_tokens(io.StringIO(text), size))
+            self.assertEqual(got, ref, f"texto, bloque {size}")
+            got = token_tuples(Lexer("").iter_tokens(io.BytesIO(text.encode("utf-8")), size))
+            self.assertEqual(got, ref, f"bytes, bloque {size}")
+
+    def test_every_chunk_boundary(self):
+        self.check(self.TRICKY, range(1, 12))
+
+    def test_samples(self):
+        for text in SAMPLES.values():
+            self.check(text, (1, 5, 64, 4096))
+
+    def test_matches_tokenize(self):
+        for text in (self.TRICKY, *SAMPLES.values()):
+            self.assertEqual(token_tuples(Lexer(text).iter_tokens()), token_tuples(Lexer(text).tokenize()))
+
+    def test_pending_token_longer_than_chunk(self):
+        # string sin cerrar y comentario mucho más largos que el bloque: el lector
+        # duplica la lectura y el resultado no cambia
+        text = "SELECT 'abc\n" + "x" * 200_000 + "\n-- " + "c" * 50_000 + "\nSELECT a FROM b;"
+
+        class Reader(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                Reader.reads += 1
+                return super().read(size)
+
+        ref = token_tuples(Lexer(text).iter_tokens())
+        self.assertEqual(token_tuples(Lexer("").iter_tokens(Reader(text), 64)), ref)
+        self.assertLess(Reader.reads, 40)
+        self.assertEqual(ref[-1][0], TokenType.EOF)
+
+    def test_token_stream_window(self):
+        toks = TokenStream(Lexer("").iter_tokens(io.StringIO(self.TRICKY), 3))
+        ref = Lexer(self.TRICKY).tokenize()
+        self.assertEqual([toks[i].value for i in range(len(ref))], [t.value for t in ref])
+        self.assertEqual(toks[len(ref) + 5].type, TokenType.EOF)
+
+
+def fragments(seed, count=300):
+    # textos aleatorios con los casos límite del lexer (comentarios, strings sin cerrar,
+    # no ASCII, operadores pegados, números con punto)
+    pieces = ["SELECT", "select", "FrOm", "a", "_x1", "ñ", "ü", "12", "12.5", "3.", ".5", "'s'", "'",
+              "'a\nb'", "--c\n", "-", "--", "<", "<=", "<>", ">=", ">", "=", ",", ";", "(", ")", "*",
+              ".", "+", "/", " ", "\n", "\t", "\u00a0", "\u2003", "\u0663", "@", "#", "\u00e9t\u00e9"]
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(pieces) for _ in range(rnd.randint(0, 40))) for _ in range(count)]
+
+
+class ByteLexerTests(TestCase):
+    # user-019: ByteLexer sobre bytes/mmap emite los mismos tokens que Lexer sobre el texto
+
+    def check(self, raw):
+        self.assertEqual(token_tuples(ByteLexer(raw).tokenize_buffer()),
+                         token_tuples(Lexer(bytes(raw).decode("utf-8", errors="replace")).tokenize_buffer()), repr(raw))
+
+    def test_samples(self):
+        for text in SAMPLES.values():
+            self.check(text.encode("utf-8"))
+
+    def test_random_fragments(self):
+        for text in fragments(19):
+            self.check(text.encode("utf-8"))
+
+    def test_invalid_utf8(self):
+        for raw in (b"SELECT \xff FROM t;", b"SELECT a\xc3 FROM t;", b"'\xe2\x82' x", b"\xf0\x9f\x98"):
+            self.check(raw)
+
+    def test_mapped_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".sql") as f:
+            f.write(SAMPLES["con_errores.sql"].encode("utf-8"))
+            f.flush()
+            with mapped(f.name) as data:
+                self.check(data)
+        with tempfile.NamedTemporaryFile(suffix=".sql") as f, mapped(f.name) as data:
+            self.assertEqual(data, b"")
+
+    def test_unicode_tables(self):
+        # los rangos precalculados son los \s y \d no ASCII de esta versión de Python
+        every = "".join(map(chr, range(0x80, 0x20000)))
+        for ranges, pattern in ((_WS_RANGES, r"\s"), (_DIGIT_RANGES, r"\d")):
+            self.assertEqual([chr(c) for lo, hi in ranges for c in range(lo, hi + 1)], re.findall(pattern, every))
+
+
+class DFALexerTests(TestCase):
+    # user-003: el backend "dfa" emite los mismos tokens que el regex
+
+    def test_samples(self):
+        for text in SAMPLES.values():
+            self.assertEqual(token_tuples(Lexer(text, backend="dfa").tokenize()),
+                             token_tuples(Lexer(text).tokenize()))
+
+    def test_random_fragments(self):
+        for text in fragments(3):
+            self.assertEqual(token_tuples(Lexer(text, backend="dfa").tokenize()),
+                             token_tuples(Lexer(text).tokenize()), repr(text))
+
+    def test_streaming(self):
+        text = SAMPLES["con_errores.sql"]
+        ref = token_tuples(Lexer(text).tokenize())
+        for size in (1, 7, 4096):
+            self.assertEqual(token_tuples(Lexer("", backend="dfa").iter_tokens(io.StringIO(text), size)), ref)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Lexer("SELECT", backend="nfa")
+
+
+BROKEN = "SELECT a FROM WHERE;\nINSERT INTO t VALUES (1,;\nUPDATE t SET = 1;\n"
+
+
+def comparable(result):
+    # resultado de analyze_source sin lo que depende de cómo se calculó (log, tiempos)
+    return {k: v for k, v in result.items() if k not in ("log", "metrics")}
+
+
+def analyze_in_parallel(text):
+    # fuerza el camino de parallel.parse_parallel aunque el texto sea pequeño o haya 1 CPU
+    with mock.patch("analizador_lexico.analysis.PARALLEL_MIN_CHARS", 0), \
+            mock.patch("os.cpu_count", return_value=2):
+        result = analyze_source(text)
+    assert any("Análisis en paralelo" in line for line in result["log"])
+    return result
+
+
+class ParallelAnalysisTests(TestCase):
+    # user-004: el análisis por bloques en procesos da el mismo resultado que el secuencial
+
+    def test_valid_script(self):
+        text = SAMPLES["validas.sql"] * 5
+        self.assertEqual(comparable(analyze_in_parallel(text)), comparable(analyze_source(text, parallel=False)))
+
+    def test_errors_in_many_chunks(self):
+        text = SAMPLES["validas.sql"] + BROKEN * 20
+        seq = analyze_source(text, parallel=False)
+        self.assertTrue(seq["errors"])
+        self.assertEqual(comparable(analyze_in_parallel(text)), comparable(seq))
+
+    def test_split_statements(self):
+        text = "SELECT a FROM t WHERE x IN (1;2);\nSELECT b\nFROM u;"
+        bounds = split_statements(Lexer(text).tokenize_buffer())
+        self.assertEqual(bounds, [(0, 1, 1), (33, 1, 34), (len(text), 3, 8)])
+
+
+class IncrementalAnalysisTests(TestCase):
+    # user-008: reutilizar sentencias cacheadas da el mismo resultado que analizar todo
+
+    def check(self, analyzer, text):
+        result = analyze_source(text, incremental=analyzer)
+        self.assertEqual(comparable(result), comparable(analyze_source(text, parallel=False)))
+        return next(line for line in result["log"] if line.startswith("Análisis incremental"))
+
+    def test_edits(self):
+        for text in SAMPLES.values():
+            analyzer = IncrementalAnalyzer()
+            self.assertIn("0 de", self.check(analyzer, text))
+            self.check(analyzer, text.replace("INSERT", "INSERT ", 1))
+            # sentencia nueva al principio: las demás se reutilizan desplazadas (la primera
+            # no, porque empieza con el salto de línea que sigue al ';' nuevo)
+            n = len(split_source(text))
+            line = self.check(analyzer, "SELECT z FROM q;\n" + text)
+            self.assertIn(f"{n - 1} de {n + 1} sentencias reutilizadas", line)
+            self.assertIn(f"{n} de {n} sentencias reutilizadas", self.check(analyzer, text))
+
+    def test_lru_limit(self):
+        analyzer = IncrementalAnalyzer(max_statements=3)
+        self.check(analyzer, SAMPLES["validas.sql"])
+        self.assertEqual(len(analyzer._cache), 3)
+
+    def test_split_source(self):
+        text = "SELECT ';' FROM t -- ;\n;INSERT INTO t VALUES (1;2);\n  "
+        self.assertEqual(split_source(text), [(0, 24, 1, 1), (24, 51, 2, 2), (51, len(text), 2, 29)])
+
+
+class IsolatedCacheTestCase(TestCase):
+    # caché de resultados en memoria y vacía en cada prueba, fuentes en un directorio
+    # temporal (no toca .cache_analisis ni .cache_fuentes)
+
+    def setUp(self):
+        patcher = mock.patch.object(result_cache, "_backends", [LocMemCache(f"tests-{id(self)}", {})])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sources = tempfile.TemporaryDirectory()
+        self.addCleanup(sources.cleanup)
+        self.source_dir = sources.name
+        override = self.settings(ANALIZADOR_SOURCE_DIR=sources.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        api._buffers.clear()
+        api._asts.clear()
+
+
+class BatchAnalyzeTests(IsolatedCacheTestCase):
+    # user-009: POST api/analyze/ con varios archivos
+
+    def post(self, *files):
+        uploads = [SimpleUploadedFile(name, text.encode("utf-8")) for name, text in files]
+        return self.client.post(reverse("sql_api_analyze"), {"files": uploads}).json()
+
+    def test_duplicates_analysed_once(self):
+        calls = []
+        real = api.analyze_many
+
+        def counting(sources):
+            sources = list(sources)
+            calls.append(len(sources))
+            return real(sources)
+
+        with mock.patch.object(api, "analyze_many", counting):
+            body = self.post(("a.sql", SAMPLES["con_errores.sql"]), ("b.sql", SAMPLES["validas.sql"]),
+                             ("c.sql", SAMPLES["con_errores.sql"]))
+        self.assertEqual(calls, [2])
+        self.assertEqual(AnalysisRun.objects.count(), 2)
+        a, b, c = body["files"]
+        self.assertEqual((a["name"], b["name"], c["name"]), ("a.sql", "b.sql", "c.sql"))
+        self.assertEqual(a["errors"], c["errors"])
+        self.assertFalse(a["ok"])
+        self.assertTrue(b["ok"])
+        self.assertEqual(body["summary"], {"files": 3, "with_errors": 2, "errors": 2 * a["error_count"], "cached": 0})
+
+        body = self.post(("d.sql", SAMPLES["validas.sql"]))
+        self.assertTrue(body["files"][0]["cached"])
+        self.assertEqual(AnalysisRun.objects.count(), 2)
+
+    def test_no_files(self):
+        response = self.client.post(reverse("sql_api_analyze"))
+        self.assertEqual(response.status_code, 400)
+
+
+def parse_errors(text, parser_class=LL1Parser, **kwargs):
+    # sólo el análisis sintáctico (sin pasada semántica)
+    errlog = ErrorLog()
+    run_program(parser_class(Lexer(text).tokenize_buffer(), SymbolTable(), errlog, [], **kwargs), {})
+    return errlog
+
+
+class StreamTests(TestCase):
+    # user-010: NDJSON en vivo (api/stream/ y api/stream-async/)
+
+    def events(self, lines):
+        return [json.loads(line) for chunk in lines for line in chunk.decode().splitlines()]
+
+    def upload(self, text):
+        return {"sqlfile": SimpleUploadedFile("x.sql", text.encode("utf-8"))}
+
+    def test_sync_stream(self):
+        text = SAMPLES["con_errores.sql"]
+        response = self.client.post(reverse("sql_api_stream"), self.upload(text))
+        events = self.events(response.streaming_content)
+        self.assertEqual(events[0]["event"], "start")
+        self.assertEqual(events[-1]["event"], "end")
+        errlog = parse_errors(text)
+        self.assertEqual([[e["line"], e["col"], e["message"]] for e in events if e["event"] == "error"],
+                         [[e.line, e.col, e.message] for e in errlog.items])
+        self.assertEqual(events[-1]["errors"], len(errlog.items))
+
+    async def test_async_stream_sends_start_first(self):
+        text = SAMPLES["validas.sql"] * 3
+        response = await self.async_client.post(reverse("sql_api_stream_async"), self.upload(text))
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([e["event"] for e in self.events(chunks[:1])], ["start"])
+        events = self.events(chunks)
+        sync = self.events(self.client.post(reverse("sql_api_stream"), self.upload(text)).streaming_content)
+        self.assertEqual(events, sync)
+
+
+class PaginationTests(IsolatedCacheTestCase):
+    # user-011: la página muestra la primera página y api/result/<id>/... sirve el resto
+
+    def setUp(self):
+        super().setUp()
+        self.text = SAMPLES["con_errores.sql"]
+        raw = self.text.encode("utf-8")
+        self.response = self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile("e.sql", raw)})
+        self.result_id = result_cache.result_id(raw)
+        self.tokens = Lexer(self.text).tokenize()
+
+    def get(self, name, **params):
+        return self.client.get(reverse(name, args=[self.result_id]), params)
+
+    def test_first_page_in_context(self):
+        self.assertEqual(self.response.status_code, 200)
+        tokens = self.response.context["tokens"]
+        self.assertEqual(tokens["total"], len(self.tokens))
+        self.assertEqual(tokens["items"][:3], [[i + 1, t.type.name, t.value, t.line, t.col]
+                                               for i, t in enumerate(self.tokens[:3])])
+
+    def test_token_pages(self):
+        body = self.get("sql_api_result_tokens", page=2, size=10).json()
+        self.assertEqual((body["page"], body["size"], body["total"]), (2, 10, len(self.tokens)))
+        self.assertEqual(body["items"], [[i + 1, t.type.name, t.value, t.line, t.col]
+                                         for i, t in enumerate(self.tokens) if 10 <= i < 20])
+        last = self.get("sql_api_result_tokens", page=10_000, size=10).json()
+        self.assertEqual(last["page"], last["pages"])
+        self.assertEqual(last["items"][-1][1], "EOF")
+
+    def test_token_filters(self):
+        body = self.get("sql_api_result_tokens", type="IDENT", line_from=3, line_to=9, size=1000).json()
+        expected = [i + 1 for i, t in enumerate(self.tokens) if t.type == TokenType.IDENT and 3 <= t.line <= 9]
+        self.assertEqual([row[0] for row in body["items"]], expected)
+        self.assertEqual(self.get("sql_api_result_tokens", type="NADA").status_code, 400)
+        self.assertEqual(self.get("sql_api_result_tokens", page="x").status_code, 400)
+
+    def test_symbol_pages(self):
+        symtab = self.response.context["symtab"]
+        body = self.get("sql_api_result_symbols", kind="TABLE", size=1000).json()
+        self.assertTrue(body["items"])
+        self.assertTrue(all(row[1] == "TABLE" for row in body["items"]))
+        self.assertLessEqual(body["total"], symtab["total"])
+
+    def test_missing_result(self):
+        self.result_id = "0" * 32
+        self.assertEqual(self.get("sql_api_result_tokens").status_code, 404)
+        self.assertEqual(self.get("sql_api_result_symbols").status_code, 404)
+
+    def clear_sources(self):
+        api._buffers.clear()
+        api._asts.clear()
+        for name in os.listdir(self.source_dir):
+            os.remove(os.path.join(self.source_dir, name))
+
+    def test_large_upload_source_linked(self):
+        # subida a disco (TemporaryUploadedFile): se guarda el archivo, no una copia en la caché
+        self.clear_sources()
+        with self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0):
+            self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile("e.sql", self.text.encode("utf-8"))})
+        self.assertEqual(len(os.listdir(self.source_dir)), 1)
+        body = self.get("sql_api_result_tokens", page=3, size=7).json()
+        self.assertEqual(body["items"], [[i + 1, t.type.name, t.value, t.line, t.col]
+                                         for i, t in enumerate(self.tokens) if 14 <= i < 21])
+
+    def test_sources_pruned(self):
+        self.clear_sources()
+        with self.settings(ANALIZADOR_SOURCE_MAX_FILES=2):
+            for i in range(4):
+                result_cache.set_source(result_cache.key(f"{i:032x}"), f"SELECT {i};")
+                os.utime(result_cache._source_path(result_cache.key(f"{i:032x}")), (i, i))
+        self.assertEqual(sorted(os.listdir(self.source_dir)),
+                         sorted(os.path.basename(result_cache._source_path(result_cache.key(f"{i:032x}")))
+                                for i in (2, 3)))
+        self.assertEqual(bytes(result_cache.get_source(result_cache.key(f"{3:032x}"))), b"SELECT 3;")
+        self.assertIsNone(result_cache.get_source(result_cache.key(f"{0:032x}")))
+
+    def test_old_result_format_is_a_miss(self):
+        key = result_cache.key(self.result_id)
+        old = dict(result_cache.peek(key))
+        del old["format"], old["token_count"]
+        result_cache.set(key, old)
+        self.assertIsNone(result_cache.get(key))
+        response = self.client.post(reverse("sql_index"),
+                                    {"sqlfile": SimpleUploadedFile("e.sql", self.text.encode("utf-8"))})
+        self.assertEqual(response.context["tokens"]["total"], len(self.tokens))
+
+
+class HistoryTests(IsolatedCacheTestCase):
+    # user-012: histórico de análisis
+
+    def upload(self, name, text):
+        return self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile(name, text.encode("utf-8"))})
+
+    def test_recorded_and_queried(self):
+        self.upload("v.sql", SAMPLES["validas.sql"])
+        run = AnalysisRun.objects.get()
+        self.assertEqual((run.filename, run.error_count), ("v.sql", 0))
+        table = run.symbols.filter(kind="TABLE").values_list("value", flat=True).first()
+        runs = self.client.get(reverse("sql_api_history_runs"), {"table": table}).json()["runs"]
+        self.assertEqual([(r["id"], r["digest"]) for r in runs], [(run.pk, run.digest)])
+        self.assertGreater(runs[0]["refs"], 0)
+
+    def test_database_error_does_not_fail_the_request(self):
+        # p. ej. "no such table" si no se ejecutó migrate
+        with mock.patch.object(AnalysisRun.objects, "create", side_effect=OperationalError("no such table")), \
+                self.assertLogs("analizador_lexico.history", "ERROR"):
+            response = self.upload("e.sql", SAMPLES["con_errores.sql"])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["errors"])
+        self.assertEqual(AnalysisRun.objects.count(), 0)
+
+    def test_large_run(self):
+        # 100k símbolos por ejecución; el tiempo se mide en benchmarks/bench_history.py
+        result = make_result(100_000)
+        run = record_run("big.sql", "0" * 32, result)
+        self.assertEqual((run.symbol_count, run.error_count), (100_000, 1000))
+        self.assertEqual((RunSymbol.objects.filter(run=run).count(), RunError.objects.filter(run=run).count()),
+                         (100_000, 1000))
+        first = RunSymbol.objects.filter(run=run, value="valor_0").values_list("kind", "line", "col", "refs").get()
+        self.assertEqual(first, ("TABLE", 1, 1, 1))
+        self.assertEqual(top_values("TABLE", 1)[0]["refs"], 7)
+
+
+class PanicModeTests(TestCase):
+    # user-013: recuperación en modo pánico y topes de errores
+
+    CASCADE = "UPDATE t SET a = , b = , c = , d = , e = WHERE;\nSELECT a FROM t WHERE;\n"
+
+    def positions(self, text, parser_class, **kwargs):
+        return [(e.line, e.col) for e in parse_errors(text, parser_class, **kwargs).items]
+
+    def test_errors_per_statement_capped(self):
+        for parser_class in (Parser, LL1Parser):
+            uncapped = self.positions(self.CASCADE, parser_class, max_stmt_errors=100)
+            self.assertEqual(len(uncapped), 7)
+            # tras el tope se salta al ';' y la sentencia siguiente se analiza normalmente
+            self.assertEqual(self.positions(self.CASCADE, parser_class), uncapped[:3] + [(2, 22)])
+            self.assertEqual(self.positions(self.CASCADE, parser_class, max_stmt_errors=1), [(1, 18), (2, 22)])
+
+    def test_one_error_per_token(self):
+        # ')' y ';' esperados sobre el mismo token: sólo se informa el primero
+        for parser_class in (Parser, LL1Parser):
+            self.assertEqual(self.positions("INSERT INTO t (a VALUES (1);", parser_class), [(1, 18)])
+
+    def test_error_log_limit(self):
+        errlog = ErrorLog(limit=2)
+        self.assertEqual([errlog.add(ParseError("x", n, 1)) for n in range(5)], [True, True, False, False, False])
+        self.assertEqual((len(errlog.items), errlog.dropped), (2, 3))
+        self.assertIn("Se omitieron 3 errores", errlog.as_list()[-1])
+
+    def test_parallel_dropped_count(self):
+        # cada bloque paralelo supera MAX_ERRORS por su cuenta: el total omitido debe
+        # coincidir con el secuencial
+        text = "SELECT FROM;\n" * 12_000
+        seq = analyze_source(text, parallel=False)
+        self.assertIn("Se omitieron 23000 errores", seq["errors"][-1])
+        self.assertEqual(comparable(analyze_in_parallel(text)), comparable(seq))
+
+
+def mutations(text, seed, count=200):
+    # variantes de las sentencias de `text` con un token borrado, duplicado o cambiado
+    rnd = random.Random(seed)
+    stmts = [text[s:e] for s, e, _, _ in split_source(text) if text[s:e].strip()]
+    out = []
+    for _ in range(count):
+        toks = [t.value for t in Lexer(rnd.choice(stmts)).tokenize()[:-1]]
+        k = rnd.randrange(len(toks))
+        op = rnd.randrange(3)
+        if op == 0:
+            del toks[k]
+        elif op == 1:
+            toks.insert(k, toks[k])
+        else:
+            toks[k] = rnd.choice(["(", ")", ",", ";", "=", "SELECT", "VALUES", "x", "1", "'s'", "NULL", "AND"])
+        out.append(" ".join(toks))
+    return out
+
+
+def parse_result(text, parser_class):
+    symtab, errlog = SymbolTable(), ErrorLog()
+    run_program(parser_class(Lexer(text).tokenize_buffer(), symtab, errlog, []), {})
+    return ([(e.kind, e.value, e.line, e.col, e.refs) for e in symtab.entries()],
+            [(e.line, e.col, e.message) for e in errlog.items])
+
+
+class LL1ParserTests(TestCase):
+    # user-014: el parser por tablas da la misma tabla de símbolos y los mismos errores
+    # que el recursivo
+
+    def test_samples(self):
+        for text in SAMPLES.values():
+            self.assertEqual(parse_result(text, LL1Parser), parse_result(text, Parser))
+
+    def test_mutated_statements(self):
+        for text in mutations(SAMPLES["validas.sql"], 14):
+            self.assertEqual(parse_result(text, LL1Parser), parse_result(text, Parser), text)
+
+    def test_grammar_conflict_detected(self):
+        with self.assertRaises(GrammarError):
+            build_tables(*parse_bnf("stmt → SELECT:RESWORD IDENT:TABLE | SELECT:RESWORD"))
+
+
+class SemanticTests(TestCase):
+    # user-016: validación contra el esquema de los CREATE TABLE del archivo
+
+    SCHEMA = ("CREATE TABLE clientes (id INT PRIMARY KEY, nombre VARCHAR(5), saldo FLOAT);\n"
+              "CREATE TABLE pedidos (id INT, cliente INT, total FLOAT);\n")
+
+    def errors(self, text):
+        return [row for row in analyze_source(self.SCHEMA + text, parallel=False)["error_rows"]]
+
+    def test_schema_errors(self):
+        text = ("CREATE TABLE clientes (x INT);\n"
+                "CREATE TABLE dup (a INT, a FLOAT);\n"
+                "INSERT INTO clientes (id, nombre, saldo) VALUES (1, 'ana', 2.5), (2.5, 'demasiado largo', 'x');\n"
+                "INSERT INTO clientes (id, nombre) VALUES (1, 'a', 3);\n"
+                "INSERT INTO clientes (id, edad) VALUES (1, 2);\n"
+                "UPDATE clientes SET saldo = 'x', nada = 1 WHERE id = 'y';\n"
+                "SELECT id FROM clientes c JOIN pedidos p ON c.id = p.cliente WHERE total > 1;\n"
+                "SELECT x.id FROM clientes;\n"
+                "SELECT id FROM clientes WHERE nombre IN (1, 'b');\n")
+        self.assertEqual(self.errors(text), [
+            [3, 14, "Tabla 'clientes' ya definida"],
+            [4, 26, "Columna 'a' repetida en la tabla 'dup'"],
+            [5, 67, "Valor 2.5 incompatible con id INT"],
+            [5, 72, "El texto 'demasiado largo' excede VARCHAR(5) de nombre"],
+            [5, 91, "Valor 'x' incompatible con saldo FLOAT"],
+            [6, 43, "INSERT con 2 columnas y 3 valores"],
+            [7, 27, "La columna 'edad' no existe en la tabla 'clientes'"],
+            [8, 29, "Valor 'x' incompatible con saldo FLOAT"],
+            [8, 34, "La columna 'nada' no existe en la tabla 'clientes'"],
+            [8, 54, "Valor 'y' incompatible con id INT"],
+            [9, 8, "La columna 'id' es ambigua ('clientes', 'pedidos')"],
+            [10, 8, "'x' no es una tabla ni un alias de la sentencia"],
+            [11, 42, "Valor 1 incompatible con nombre VARCHAR"],
+        ])
+
+    def test_valid_script_has_no_errors(self):
+        self.assertEqual(analyze_source(SAMPLES["validas.sql"], parallel=False)["errors"], [])
+
+    def test_undeclared_tables(self):
+        text = "SELECT a FROM otra WHERE b = 1;"
+        self.assertEqual(self.errors(text), [])
+        tokens = Lexer(text).tokenize_buffer()
+        parser = LL1Parser(tokens, SymbolTable(), ErrorLog(), [], build_ast=True)
+        parser.program()
+        errlog = ErrorLog()
+        SemanticChecker(errlog, strict_tables=True).check(facts(parser.ast, tokens))
+        self.assertEqual(len(errlog.items), 1)
+
+    def test_statements_with_syntax_errors_not_checked(self):
+        # falta '(' antes de las columnas: el AST parcial daría errores de aridad y tipo
+        # en cascada; sólo debe quedar el error de sintaxis
+        text = "INSERT INTO clientes id, nombre) VALUES ('x', 1, 2);\nINSERT INTO clientes (id) VALUES ('y');\n"
+        self.assertEqual(self.errors(text), [[3, 22, "Se esperaba SYMBOL {'('}, se encontró 'id'"],
+                                             [4, 35, "Valor 'y' incompatible con id INT"]])
+        rows = analyze_source(SAMPLES["con_errores.sql"], parallel=False)["error_rows"]
+        self.assertEqual([row for row in rows if row[0] == 29],
+                         [[29, 21, "Se esperaba SYMBOL {'('}, se encontró 'col_5'"]])
+
+    def test_same_result_in_parallel(self):
+        text = SAMPLES["con_errores.sql"] + self.SCHEMA + "INSERT INTO clientes id) VALUES ('x');\n" * 3
+        self.assertEqual(comparable(analyze_in_parallel(text)), comparable(analyze_source(text, parallel=False)))
+
+
+class CorpusTests(TestCase):
+    # user-017: generador de corpus y harness de benchmarks
+
+    def test_reproducible(self):
+        self.assertEqual(generate(60, seed=5, idents=30), generate(60, seed=5, idents=30))
+        self.assertNotEqual(generate(60, seed=5, idents=30), generate(60, seed=6, idents=30))
+
+    def test_test_data_regenerates(self):
+        # comandos del README para test_data/
+        self.assertEqual(generate(40, seed=1, idents=24), SAMPLES["validas.sql"])
+        self.assertEqual(generate(40, seed=2, idents=24, error_rate=0.3), SAMPLES["con_errores.sql"])
+
+    def test_error_rate(self):
+        for mix in (None, parse_mix("select=1"), parse_mix("insert=3,update=1")):
+            self.assertEqual(analyze_source(generate(200, seed=7, mix=mix, idents=50), parallel=False)["errors"], [])
+        self.assertTrue(analyze_source(generate(200, seed=7, error_rate=0.2, idents=50), parallel=False)["errors"])
+        with self.assertRaises(ValueError):
+            parse_mix("delete=1")
+
+    def test_benchmark_harness(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "bench.json")
+            subprocess.run([sys.executable, "-m", "benchmarks.run", "--statements", "30", "--reps", "1",
+                            "--cases", "lexer.tokenize,parser.program", "-o", out],
+                           cwd=settings.BASE_DIR, check=True, capture_output=True)
+            with open(out, encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertEqual(set(report["results"]), {"lexer.tokenize", "parser.program"})
+        self.assertGreater(report["results"]["lexer.tokenize"]["tokens_per_s"], 0)
+
+
+class JobTests(IsolatedCacheTestCase):
+    # user-021: cola de jobs; los hilos no se arrancan, la prueba reclama y ejecuta el job
+
+    def setUp(self):
+        super().setUp()
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+        override = self.settings(ANALIZADOR_JOB_DIR=jobs_dir.name, ANALIZADOR_JOB_MIN_BYTES=1,
+                                 ANALIZADOR_HISTORY=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(JobQueue, "start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.text = SAMPLES["con_errores.sql"] * 3
+
+    def submit(self):
+        response = self.client.post(reverse("sql_api_job_submit"),
+                                    {"sqlfile": SimpleUploadedFile("e.sql", self.text.encode("utf-8"))})
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def status(self, job_id):
+        return self.client.get(reverse("sql_api_job_status", args=[job_id])).json()
+
+    def run_next(self):
+        job = job_queue._claim()
+        # aunque el archivo justifique el análisis en paralelo, el job va en secuencia
+        with mock.patch("analizador_lexico.analysis.PARALLEL_MIN_CHARS", 0), \
+                mock.patch("os.cpu_count", return_value=2):
+            job_queue._run(job)
+        return job
+
+    def test_lifecycle(self):
+        body = self.submit()
+        self.assertEqual((body["status"], body["queue_position"]), (AnalysisJob.QUEUED, 1))
+        job = self.run_next()
+        self.assertFalse(os.path.exists(job.path))
+        body = self.status(job.pk)
+        self.assertEqual(body["status"], AnalysisJob.DONE)
+        ref = analyze_source(self.text, parallel=False)
+        self.assertEqual(body["progress"]["statements"], sum(s["count"] for s in ref["metrics"]["statements"].values()))
+        self.assertGreater(body["progress"]["percent"], 90)
+        self.assertEqual(comparable(result_cache.get(result_cache.key(body["result_id"]))), comparable(ref))
+        tokens = self.client.get(reverse("sql_api_result_tokens", args=[body["result_id"]])).json()
+        self.assertEqual(tokens["total"], len(Lexer(self.text).tokenize()))
+        # ya en caché: no se encola otra vez
+        self.assertEqual(self.client.post(reverse("sql_api_job_submit"), {"sqlfile": SimpleUploadedFile(
+            "e.sql", self.text.encode("utf-8"))}).json(), {"status": AnalysisJob.DONE, "cached": True,
+                                                            "result_id": body["result_id"]})
+
+    def test_cancel_queued(self):
+        body = self.submit()
+        response = self.client.post(reverse("sql_api_job_cancel", args=[body["id"]]))
+        self.assertEqual(response.json()["status"], AnalysisJob.CANCELLED)
+        self.assertFalse(os.path.exists(AnalysisJob.objects.get(pk=body["id"]).path))
+        self.assertIsNone(job_queue._claim())
+
+    def test_cancel_running(self):
+        body = self.submit()
+        statement = _Progress.statement
+
+        def cancel_on_third(progress, line, last_line):
+            if progress.statements == 2:
+                self.client.post(reverse("sql_api_job_cancel", args=[progress.job_id]))
+            statement(progress, line, last_line)
+
+        with mock.patch.object(_Progress, "statement", cancel_on_third):
+            self.run_next()
+        body = self.status(body["id"])
+        self.assertEqual(body["status"], AnalysisJob.CANCELLED)
+        self.assertEqual(body["progress"]["statements"], 3)
+        self.assertEqual(body["progress"]["log"][-1], "Análisis cancelado.")
+        self.assertIsNone(result_cache.peek(result_cache.key(AnalysisJob.objects.get(pk=body["id"]).digest)))
+
+    def test_queue_full(self):
+        with self.settings(ANALIZADOR_JOB_MAX_QUEUED=1):
+            self.submit()
+            self.text += "\n"
+            response = self.client.post(reverse("sql_api_job_submit"),
+                                        {"sqlfile": SimpleUploadedFile("f.sql", self.text.encode("utf-8"))})
+        self.assertEqual(response.status_code, 503)
+
+
+def shape(node, tokens):
+    # expresión del AST con paréntesis explícitos, para comprobar la precedencia
+    if node is None:
+        return "?"
+    if isinstance(node, Chain):
+        text = shape(node.operands[0], tokens)
+        for op, operand in zip(node.ops, node.operands[1:]):
+            text += f" {tokens.value(op)} {shape(operand, tokens)}"
+        return f"({text})"
+    if isinstance(node, Compare):
+        return f"({shape(node.left, tokens)} {tokens.value(node.op)} {shape(node.right, tokens)})"
+    if isinstance(node, Unary):
+        return f"({tokens.value(node.op)} {shape(node.operand, tokens)})"
+    if isinstance(node, InList):
+        negated = " NOT" if node.negated is not None else ""
+        return f"({shape(node.operand, tokens)}{negated} IN {', '.join(shape(x, tokens) for x in node.items)})"
+    if isinstance(node, Name):
+        return ".".join(tokens.value(i) for i in (node.qualifier, node.name) if i is not None)
+    return tokens.value(node.value)
+
+
+class ExpressionTests(TestCase):
+    # user-023: expresiones de WHERE/ON/SELECT/SET, JOIN ... ON y VALUES con varias filas
+
+    VALID = ("SELECT a, t.b + 1, -c * (d - 2) FROM t WHERE a = 1 AND (b <> 'x' OR NOT c IN (1, 2, 3));\n"
+             "SELECT t.a FROM t x INNER JOIN u ON x.id = u.t_id LEFT OUTER JOIN v y ON y.k = u.k AND y.n > 0 "
+             "RIGHT JOIN w ON w.a >= 1 JOIN z ON z.q NOT IN ('a', NULL) WHERE x.a / 2 <= 10;\n"
+             "UPDATE t SET a = a + 1, b = 'x' WHERE NOT (a < 0 OR b = c);\n"
+             "INSERT INTO t (a, b) VALUES (1, 'x'), (2, NULL), (3.5, 'z');\n")
+    BROKEN = ("SELECT a FROM t WHERE a = ;\nSELECT a FROM t WHERE (a = 1;\nSELECT a FROM t WHERE a IN ();\n"
+              "SELECT a FROM t JOIN u WHERE a = 1;\nSELECT a FROM t WHERE a = 1 AND OR b = 2;\n"
+              "SELECT a + FROM t;\nINSERT INTO t (a) VALUES (1), ;\nUPDATE t SET a = (1 + 2 WHERE a = 1;\n")
+
+    def where(self, condition):
+        tokens = Lexer(f"SELECT a FROM t WHERE {condition};").tokenize_buffer()
+        return shape(parse_ast(tokens)[0].where, tokens)
+
+    def test_precedence(self):
+        self.assertEqual(self.where("a OR b AND NOT c = 1 + 2 * 3 AND d NOT IN (1, 2)"),
+                         "(a OR (b AND (NOT (c = (1 + (2 * 3)))) AND (d NOT IN 1, 2)))")
+        self.assertEqual(self.where("(a OR b) AND c - d - e = -f"), "((a OR b) AND ((c - d - e) = (- f)))")
+        self.assertEqual(self.where("t.a * (1 + 2) / 3 > 0"), "((t.a * (1 + 2) / 3) > 0)")
+
+    def test_valid_queries(self):
+        self.assertEqual(parse_errors(self.VALID).items, [])
+        self.assertEqual(parse_errors(self.VALID, Parser).items, [])
+
+    def test_same_as_recursive_parser(self):
+        for text in (self.VALID, self.BROKEN):
+            self.assertEqual(parse_result(text, LL1Parser), parse_result(text, Parser))
+        for text in mutations(self.VALID, 23):
+            self.assertEqual(parse_result(text, LL1Parser), parse_result(text, Parser), text)
+
+    def test_operand_symbols(self):
+        symtab = SymbolTable()
+        run_program(LL1Parser(Lexer("SELECT a FROM t x WHERE x.b = 'v' AND c IN (1);").tokenize_buffer(), symtab,
+                              ErrorLog(), []), {})
+        kinds = {(e.kind.name, e.value) for e in symtab.entries()}
+        self.assertLessEqual({("COLUMN", "a"), ("COLUMN", "b"), ("COLUMN", "c"), ("IDENT", "x"), ("LITERAL", "'v'"),
+                              ("LITERAL", "1"), ("OP", "="), ("RESWORD", "AND"), ("RESWORD", "IN")}, kinds)
+
+    def test_deep_nesting_and_long_chains(self):
+        # el AST anida un nodo por paréntesis, NOT, signo o cambio de nivel: también debe
+        # poder serializarse y compararse a esa profundidad
+        depth = sys.getrecursionlimit() * 3
+        for condition in ("(" * depth + "a = 1" + ")" * depth, " AND ".join(["a = 1"] * depth),
+                          "NOT " * depth + "a = 1", "a = " + "- " * depth + "1",
+                          "a = " + "1 * (2 + " * depth + "3" + ")" * depth,
+                          "a IN (" + ", ".join(["-1"] * depth) + ")"):
+            text = f"SELECT a FROM t WHERE {condition};"
+            self.assertEqual(parse_result(text, LL1Parser), parse_result(text, Parser))
+            self.assertEqual(len(parse_errors(text).items), 0)
+            tokens = Lexer(text).tokenize_buffer()
+            stmts = parse_ast(tokens)
+            self.assertIsNotNone(stmts[0].where)
+            self.assertEqual(loads_binary(dumps_binary(stmts)), stmts)
+            self.assertTrue(dumps_json(stmts, tokens).endswith("}]"))
+
+
+class BulkInsertTests(TestCase):
+    # user-024: VALUES con muchas filas (camino rápido sobre TokenBuffer y modo agregado)
+
+    TEXT = ("CREATE TABLE t (a INT, b VARCHAR(3));\n"
+            "INSERT INTO t (a, b) VALUES (1, 'x'), (NULL, 'abcd'), (2.5, 'yy');\n"
+            "INSERT INTO t (a, b) VALUES (1), (2), (3, 'z'), (4);\n"
+            "INSERT INTO t (a, b) VALUES (1, x), (2 'y'), (3, 'z',), (), (4, 'w');\n")
+
+    def test_fast_path_matches_token_list(self):
+        for text in (self.TEXT, *mutations(self.TEXT, 24)):
+            ref = SymbolTable(), ErrorLog()
+            run_program(Parser(Lexer(text).tokenize(), *ref, []), {})
+            self.assertEqual(parse_result(text, Parser), ([(e.kind, e.value, e.line, e.col, e.refs)
+                                                           for e in ref[0].entries()],
+                                                          [(e.line, e.col, e.message) for e in ref[1].items]), text)
+
+    def test_aggregated_same_parse_errors(self):
+        for text in (self.TEXT, *mutations(self.TEXT, 124)):
+            self.assertEqual(parse_errors(text, aggregate_literals=True).items, parse_errors(text).items, text)
+
+    def test_arity_errors(self):
+        text = self.TEXT.rsplit("INSERT", 1)[0]
+        rows = analyze_source(text, parallel=False, aggregate_literals=False)["errors"]
+        self.assertEqual([e for e in rows if "valores" in e], ["L3:C30 - INSERT con 2 columnas y 1 valores",
+                                                                "L3:C35 - INSERT con 2 columnas y 1 valores",
+                                                                "L3:C50 - INSERT con 2 columnas y 1 valores"])
+        runs = analyze_source(text, parallel=False, aggregate_literals=True)["errors"]
+        self.assertEqual([e for e in runs if "valores" in e], ["L3:C30 - INSERT con 2 columnas y 1 valores (2 filas)",
+                                                               "L3:C50 - INSERT con 2 columnas y 1 valores"])
+        self.assertEqual([e for e in runs if "valores" not in e], [e for e in rows if "valores" not in e])
+
+    def test_literal_stats(self):
+        result = analyze_source(self.TEXT.rsplit("INSERT", 1)[0], parallel=False, aggregate_literals=True)
+        self.assertEqual(result["literal_stats"], [["t", "a", 3, 1, 1, 1, 0, "1", "2.5", None],
+                                                   ["t", "b", 3, 0, 0, 0, 3, None, None, "'abcd'"],
+                                                   ["t", "a", 4, 0, 4, 0, 0, "1", "4", None],
+                                                   ["t", "b", 1, 0, 0, 0, 1, None, None, "'z'"]])
+        self.assertEqual(analyze_source(self.TEXT, parallel=False, aggregate_literals=False)["literal_stats"], [])
+
+    def test_many_rows_bounded(self):
+        # sin agregar hay un símbolo por literal distinto; agregando, ninguno
+        n = 50_000
+        text = "INSERT INTO t (a, b) VALUES " + ", ".join(f"({i}, 'v{i}')" for i in range(n)) + ";"
+        tokens = Lexer(text).tokenize_buffer()
+        for aggregate, literals in ((False, 2 * n), (True, 0)):
+            symtab, errlog = SymbolTable(), ErrorLog()
+            parser = LL1Parser(tokens, symtab, errlog, [], build_ast=True, aggregate_literals=aggregate)
+            run_program(parser, {})
+            self.assertEqual(errlog.items, [])
+            self.assertEqual(sum(e.kind.name == "LITERAL" for e in symtab.entries()), literals)
+            rows = parser.ast[0].rows
+            self.assertEqual([(r.width, r.count) for r in rows.runs], [(2, n)])
+            self.assertEqual(len(rows.values), 0 if aggregate else 2 * n)
+
+
+class CliTests(TestCase):
+    # user-025: análisis por lotes desde la línea de comandos (cli.py y manage.py analyze_sql)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        for name, text in (("a.sql", SAMPLES["validas.sql"]), ("sub/b.sql", SAMPLES["con_errores.sql"]),
+                           (".oculto/c.sql", SAMPLES["con_errores.sql"]), ("sub/notas.txt", "no es SQL")):
+            os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+            with open(self.path(name), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def run_cli(self, *paths, **options):
+        args = Namespace(paths=list(paths), **{"pattern": "*.sql", "workers": 1, "format": "ndjson", "output": None,
+                                               **options})
+        out = io.StringIO()
+        with contextlib.redirect_stderr(io.StringIO()):
+            code = cli.run(args, out)
+        return code, out.getvalue()
+
+    def test_collect(self):
+        self.assertEqual(cli.collect([self.root]), ([self.path("a.sql"), self.path("sub/b.sql")], []))
+        self.assertEqual(cli.collect([os.path.join(self.root, "**", "*.txt"), self.path("a.sql"), self.path("a.sql"),
+                                      self.path("nada.sql")]),
+                         ([self.path("sub/notas.txt"), self.path("a.sql")], [self.path("nada.sql")]))
+        self.assertEqual(cli.collect([self.root], "*.txt")[0], [self.path("sub/notas.txt")])
+
+    def test_exit_codes(self):
+        self.assertEqual(self.run_cli(self.path("a.sql"))[0], cli.EXIT_OK)
+        self.assertEqual(self.run_cli(self.root)[0], cli.EXIT_ERRORS)
+        self.assertEqual(self.run_cli(self.path("a.sql"), self.path("nada.sql"))[0], cli.EXIT_FAILURE)
+        self.assertEqual(self.run_cli(self.path("nada/*.sql"))[0], cli.EXIT_FAILURE)
+        self.assertEqual(self.run_cli(self.path("sub"), pattern="*.txt")[0], cli.EXIT_ERRORS)
+
+    def test_ndjson(self):
+        code, out = self.run_cli(self.root, workers=2)
+        events = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([(e["event"], e.get("path"), e.get("ok")) for e in events],
+                         [("file", self.path("a.sql"), True), ("file", self.path("sub/b.sql"), False),
+                          ("summary", None, None)])
+        ref = analyze_source(SAMPLES["con_errores.sql"], parallel=False)
+        self.assertEqual(events[1]["errors"], ref["error_rows"])
+        self.assertEqual(events[1]["error_count"], len(ref["error_rows"]))
+        self.assertEqual({k: events[2][k] for k in ("files", "with_errors", "failed", "errors", "missing")},
+                         {"files": 2, "with_errors": 1, "failed": 0, "errors": len(ref["error_rows"]), "missing": []})
+        # en procesos (workers=2) igual que en secuencia, salvo los tiempos
+        serial = [json.loads(line) for line in self.run_cli(self.root)[1].splitlines()]
+        self.assertEqual([{**e, "ms": 0} for e in serial[:2]], [{**e, "ms": 0} for e in events[:2]])
+
+    def test_junit(self):
+        output = self.path("informe.xml")
+        code, out = self.run_cli(self.root, format="junit", output=output)
+        self.assertEqual((code, out), (cli.EXIT_ERRORS, ""))
+        suite = ElementTree.parse(output).getroot().find("testsuite")
+        self.assertEqual((suite.get("tests"), suite.get("failures"), suite.get("errors")), ("2", "1", "0"))
+        cases = suite.findall("testcase")
+        self.assertEqual([c.get("name") for c in cases], [self.path("a.sql"), self.path("sub/b.sql")])
+        self.assertIsNone(cases[0].find("failure"))
+        failure = cases[1].find("failure")
+        self.assertTrue(failure.text.startswith("L"))
+        self.assertEqual(failure.get("message"), f"{len(failure.text.splitlines())} errores")
+
+    def test_management_command(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()):
+            call_command("analyze_sql", self.path("a.sql"))
+            with self.assertRaises(SystemExit) as raised:
+                call_command("analyze_sql", self.root, "--format", "junit")
+        self.assertEqual(raised.exception.code, cli.EXIT_ERRORS)
+        self.assertIn('<testsuites name="analizador_sql" tests="2" failures="1"', out.getvalue())
+
+    def test_module_entry_point(self):
+        done = subprocess.run([sys.executable, "-m", "analizador_lexico.cli", self.path("nada.sql")],
+                              cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=60)
+        self.assertEqual(done.returncode, cli.EXIT_FAILURE)
+        self.assertIn("No existe", done.stderr)
+
+
+def node_names(tree):
+    # nombres de nodo de la forma to_dict (lista de dicts) sin recursión
+    names, stack = set(), list(tree)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            names.add(item.get("node"))
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return names - {None}
+
+
+class AstTests(IsolatedCacheTestCase):
+    # user-015: AST de LL1Parser, serialización JSON/binaria y api/result/<id>/ast/
+
+    TEXT = ("CREATE TABLE t (a INT PRIMARY KEY, b VARCHAR(3), c FLOAT);\n"
+            "SELECT * FROM t;\n"
+            "SELECT x.a, -b + 1, NOT c IN (1, 'v', NULL) FROM t x LEFT JOIN u ON u.a = x.a WHERE a <> 2 OR b = c;\n"
+            "INSERT INTO t (a, b) VALUES (1, 'x'), (2, NULL), (3);\n"
+            "UPDATE t SET a = a * 2, b = 'y' WHERE NOT a > 1;\n"
+            "SELECT a, FROM WHERE a = ;\nINSERT INTO (a) VALUES (1, ;\nUPDATE t SET = 1 AND;\n")
+
+    def parse(self, aggregate_literals=False):
+        tokens = Lexer(self.TEXT).tokenize_buffer()
+        parser = LL1Parser(tokens, SymbolTable(), ErrorLog(), [], build_ast=True,
+                           aggregate_literals=aggregate_literals)
+        parser.program()
+        return tokens, parser.ast
+
+    def test_binary_round_trip(self):
+        seen = set()
+        for aggregate in (False, True):
+            tokens, stmts = self.parse(aggregate)
+            seen |= node_names([to_dict(s) for s in stmts])
+            back = loads_binary(dumps_binary(stmts))
+            self.assertEqual(back, stmts)
+            self.assertEqual([to_dict(s) for s in back], [to_dict(s) for s in stmts])
+        self.assertEqual(seen, set(NODE_TYPES))
+        # hijos que faltan (errores de sintaxis) se conservan como None
+        self.assertIsNone(stmts[-1].assigns[0].column)
+        self.assertIsNone(back[-1].assigns[0].column)
+
+    def test_equality_detects_differences(self):
+        _, stmts = self.parse()
+        other = loads_binary(dumps_binary(stmts))
+        other[2].where.operands[1].right.name += 1
+        self.assertNotEqual(other, stmts)
+        self.assertNotEqual(loads_binary(dumps_binary(stmts[:2])), stmts)
+
+    def test_bad_binary(self):
+        blob = dumps_binary(self.parse()[1])
+        for bad in (b"XXXX" + blob[4:], blob[:4] + bytes([0]) + blob[5:]):
+            with self.assertRaises(ValueError):
+                loads_binary(bad)
+
+    def test_json(self):
+        tokens, stmts = self.parse()
+        for values in (None, tokens):
+            self.assertEqual(dumps_json(stmts, values), json.dumps([to_dict(s, values) for s in stmts],
+                                                                   ensure_ascii=False, separators=(",", ":")))
+        select = json.loads(dumps_json(stmts, tokens))[1]
+        self.assertEqual((select["node"], select["star"], select["table"]), ("SelectStmt", [20, "*"], [22, "t"]))
+        self.assertEqual(json.loads(dumps_json(stmts))[1]["table"], 22)
+
+    def test_endpoint(self):
+        raw = self.TEXT.encode("utf-8")
+        self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile("a.sql", raw)})
+        result_id = result_cache.result_id(raw)
+        tokens, stmts = Lexer(self.TEXT).tokenize_buffer(), self.parse()[1]
+        url = reverse("sql_api_result_ast", args=[result_id])
+        with mock.patch("analizador_lexico.api.parse_ast", wraps=parse_ast) as parsed:
+            self.assertEqual(self.client.get(url).json(), [to_dict(s, tokens) for s in stmts])
+            self.assertEqual(self.client.get(url, {"values": "0"}).json(), [to_dict(s) for s in stmts])
+            response = self.client.get(url, {"format": "bin"})
+        self.assertEqual(parsed.call_count, 1)
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        self.assertEqual(loads_binary(response.content), stmts)
+        self.assertEqual(self.client.get(reverse("sql_api_result_ast", args=["0" * 32])).status_code, 404)
+
+    def test_deep_trees(self):
+        for condition in ("NOT " * 3000 + "a = 1", "a = " + "1 * (2 + " * 2000 + "3" + ")" * 2000):
+            tokens = Lexer(f"SELECT a FROM t WHERE {condition};").tokenize_buffer()
+            stmts = parse_ast(tokens)
+            self.assertEqual(loads_binary(dumps_binary(stmts)), stmts)
+            self.assertTrue(dumps_json(stmts, tokens).startswith('[{"node":"SelectStmt","start":0,'))
+
+
+class MetricsTests(IsolatedCacheTestCase):
+    # user-018: medidas por etapa, formato Prometheus, /metrics/ y perfiles por petición
+
+    def test_stages(self):
+        stages = Stages()
+        with stages.stage("crece"):
+            kept = [object() for _ in range(20_000)]
+        with stages.stage("libera"):
+            del kept[:]
+        with stages.stage("crece"):
+            pass
+        stages.add_statements({"SELECT": [2, 0.5]})
+        stages.add_statements({"SELECT": [1, 0.25], "INSERT": [1, 0.1]})
+        out = stages.as_dict()
+        self.assertGreaterEqual(out["stages"]["crece"]["blocks"], 20_000)
+        self.assertLessEqual(out["stages"]["libera"]["blocks"], -20_000)
+        self.assertNotIn("alloc_kb", out["stages"]["crece"])
+        self.assertEqual(out["statements"], {"SELECT": {"count": 3, "ms": 750.0}, "INSERT": {"count": 1, "ms": 100.0}})
+        self.assertEqual(out["total_ms"], round(sum(r["ms"] for r in out["stages"].values()), 3))
+
+    def test_stages_tracemalloc(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        stages = Stages(trace_memory=True)
+        with stages.stage("crece"):
+            kept = bytearray(512 * 1024)
+        self.assertGreaterEqual(stages.as_dict()["stages"]["crece"]["alloc_kb"], 512)
+        self.assertGreaterEqual(stages.as_dict()["stages"]["crece"]["peak_kb"], 512)
+        del kept
+
+    def test_run_program(self):
+        seen = []
+        parser = LL1Parser(Lexer(BROKEN + "SELECT a FROM t; FOO;").tokenize_buffer(), SymbolTable(), ErrorLog(), [])
+        statements = run_program(parser, {}, lambda start: seen.append(start.value))
+        self.assertEqual(seen, ["SELECT", "INSERT", "UPDATE", "SELECT", "FOO"])
+        self.assertEqual({kind: n for kind, (n, _) in statements.items()},
+                         {"SELECT": 2, "INSERT": 1, "UPDATE": 1, "OTRA": 1})
+
+    def test_render(self):
+        registry = Registry()
+        registry.observe({"stages": {"parse": {"ms": 10, "blocks": 500}},
+                          "statements": {"SELECT": {"count": 2, "ms": 4}}})
+        registry.observe({"stages": {"parse": {"ms": 30, "blocks": -200}}, "statements": {}})
+        registry.inc("analizador_requests_total", view="index", method="GET")
+        registry.inc("analizador_requests_total", 2, view='a"b\\c', method="GET")
+        lines = registry.render({"extra_total": ("counter", "Extra", 7)}).splitlines()
+        for line in ("# TYPE analizador_stage_seconds summary", 'analizador_stage_seconds_sum{stage="parse"} 0.04',
+                     'analizador_stage_seconds_count{stage="parse"} 2', "# TYPE analizador_stage_net_blocks gauge",
+                     'analizador_stage_net_blocks{stage="parse"} -200',
+                     'analizador_statement_parse_seconds_sum{type="SELECT"} 0.004',
+                     'analizador_statement_parse_seconds_count{type="SELECT"} 2',
+                     "# TYPE analizador_requests_total counter",
+                     'analizador_requests_total{method="GET",view="index"} 1',
+                     'analizador_requests_total{method="GET",view="a\\"b\\\\c"} 2',
+                     "# TYPE extra_total counter", "extra_total 7"):
+            self.assertIn(line, lines)
+        self.assertFalse(any("alloc_blocks" in line for line in lines))
+
+    def test_metrics_view(self):
+        self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile("v.sql", b"SELECT a FROM t;")})
+        response = self.client.get(reverse("sql_metrics"))
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('analizador_requests_total{method="POST",view="index"}', body)
+        self.assertIn('analizador_stage_seconds_count{stage="parse"}', body)
+        self.assertIn("# TYPE analizador_result_cache_misses_total counter", body)
+
+    def upload(self, **flags):
+        return self.client.post(reverse("sql_index") + "?" + "&".join(f"{k}=1" for k in flags),
+                                {"sqlfile": SimpleUploadedFile("v.sql", SAMPLES["validas.sql"].encode("utf-8"))})
+
+    def test_profiling_flags(self):
+        with self.settings(ANALIZADOR_PROFILING=True):
+            context = self.upload(profile=1, tracemalloc=1).context
+        self.assertIn("function calls", context["profile"])
+        self.assertTrue(context["tracemalloc"])
+        self.assertIn("alloc_kb", context["metrics"]["stages"]["decode"])
+        api._buffers.clear()
+        result_cache._backends[0].clear()
+        with self.settings(ANALIZADOR_PROFILING=False):
+            context = self.upload(profile=1, tracemalloc=1).context
+        self.assertEqual((context["profile"], context["tracemalloc"]), ("", ""))
+        self.assertNotIn("alloc_kb", context["metrics"]["stages"]["decode"])
+
+
+class LineIndexTests(IsolatedCacheTestCase):
+    # user-020: posiciones, offsets y fragmentos de línea para los errores
+
+    def test_positions(self):
+        index = LineIndex.build("ab\ncd\n")
+        self.assertEqual(len(index), 3)
+        self.assertEqual([index.position(i) for i in range(7)],
+                         [(1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (2, 3), (3, 1)])
+        self.assertEqual((index.offset(1, 1), index.offset(2, 2), index.offset(3, 1)), (0, 4, 6))
+        self.assertEqual((index.offset(1, 99), index.offset(99, 1), index.offset(0, 0)), (2, 6, 0))
+        self.assertEqual((index.line_text(1), index.line_text(3)), ("ab", ""))
+
+    def test_no_trailing_newline(self):
+        index = LineIndex.build("ab\r\ncd")
+        self.assertEqual(len(index), 2)
+        self.assertEqual((index.position(6), index.offset(2, 3), index.offset(2, 9)), ((2, 3), 6, 6))
+        self.assertEqual((index.line_text(1), index.line_text(2)), ("ab", "cd"))
+        self.assertEqual(index.snippet(2, 3), ("cd", "  ^"))
+
+    def test_fragment_base(self):
+        index = LineIndex.build("x\ny", line=10, col=5)
+        self.assertEqual((index.position(0), index.position(1), index.position(2)), ((10, 5), (10, 6), (11, 1)))
+        self.assertEqual((index.offset(10, 6), index.offset(11, 1)), (1, 2))
+        self.assertEqual(index.snippet(10, 5), ("x", "^"))
+
+    def test_bytes_and_mmap(self):
+        text = "ñb\nçd€\nz"
+        raw = text.encode("utf-8")
+        with tempfile.NamedTemporaryFile(suffix=".sql") as f:
+            f.write(raw)
+            f.flush()
+            with mapped(f.name) as mm:
+                for source in (raw, mm):
+                    index = LineIndex.build(source)
+                    ref = LineIndex.build(text)
+                    for line, col in ((1, 1), (1, 2), (1, 3), (2, 3), (2, 4), (3, 1), (3, 2)):
+                        self.assertEqual(index.position(index.offset(line, col)), (line, col))
+                        self.assertEqual(index.line_text(line), ref.line_text(line))
+                        self.assertEqual(index.snippet(line, col), ref.snippet(line, col))
+                    self.assertEqual(index.offset(2, 3), len("ñb\nçd".encode("utf-8")))
+                    self.assertEqual(index.position(len(raw)), (3, 2))
+        self.assertEqual(LineIndex.build(b"a\xffb\nc").line_text(1), "a\ufffdb")
+
+    def test_snippet_tabs_and_clipping(self):
+        index = LineIndex.build("\t\tSELECT x\n")
+        self.assertEqual(index.snippet(1, 10), ("\t\tSELECT x", "\t\t       ^"))
+        line = "".join(chr(ord("a") + k % 26) for k in range(500))
+        index = LineIndex.build("SELECT 1;\n" + line)
+        text, caret = index.snippet(2, 300, context=60)
+        self.assertEqual(len(text), 122)
+        self.assertTrue(text.startswith("…") and text.endswith("…"))
+        self.assertEqual(text[len(caret) - 1], line[299])
+        self.assertEqual(index.snippet(2, 3, context=60), (line[:62] + "…", "  ^"))
+        text, caret = index.snippet(2, 501, context=60)
+        self.assertEqual((text, caret), ("…" + line[440:], " " * 61 + "^"))
+
+    def test_token_buffer_index(self):
+        for text in SAMPLES.values():
+            self.assertEqual(Lexer(text).tokenize_buffer().line_index.starts, LineIndex.build(text).starts)
+            raw = text.encode("utf-8")
+            self.assertEqual(ByteLexer(raw).tokenize_buffer().line_index.starts, LineIndex.build(raw).starts)
+
+    def test_error_snippets(self):
+        text = "SELECT a\tFROM WHERE;\nINSERT INTO t VALUES (1,;\nUPDATE t SET = 1"
+        result = analyze_source(text, parallel=False)
+        index = LineIndex.build(text)
+        self.assertEqual(len(result["error_snippets"]), len(result["error_rows"]))
+        for (line, col, _), (snippet, caret) in zip(result["error_rows"], result["error_snippets"]):
+            self.assertEqual((snippet, caret), index.snippet(line, col))
+            self.assertEqual(len(caret), col)
+        response = self.client.post(reverse("sql_index"), {"sqlfile": SimpleUploadedFile("e.sql", text.encode())})
+        details = response.context["error_details"]
+        self.assertEqual([d["snippet"] for d in details][:len(result["error_snippets"])],
+                         result["error_snippets"])
+        self.assertContains(response, "INSERT INTO t VALUES (1,;\n<span")
+
+
+def fill(symtab, n, kinds=(SymKind.IDENT, SymKind.COLUMN, SymKind.LITERAL)):
+    # n símbolos distintos repartidos entre `kinds`; -> {(kind, valor): línea}
+    added = {}
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        symtab.add_value(kind, f"v{i}", i + 1, 1)
+        added[(kind, f"v{i}")] = i + 1
+    return added
+
+
+class SymbolTableTests(TestCase):
+    # user-005: índice por hash no criptográfico con redimensionado
+
+    def test_resize_keeps_lookups(self):
+        symtab = SymbolTable(size=8, max_load=0.75)
+        added = fill(symtab, 1000)
+        stats = symtab.stats()
+        self.assertEqual(stats["size"], 2048)
+        self.assertEqual(symtab.resizes, 8)
+        self.assertEqual(stats["resizes"], 8)
+        self.assertLessEqual(stats["load_factor"], 0.75)
+        self.assertEqual(stats["load_factor"], round(1000 / 2048, 4))
+        for (kind, value), line in added.items():
+            symtab.add_value(kind, value, 99_999, 1)
+        entries = list(symtab.entries())
+        self.assertEqual(len(entries), 1000)
+        self.assertEqual({(e.kind, e.value): (e.line, e.refs) for e in entries},
+                         {key: (line, 2) for key, line in added.items()})
+        for e in entries:
+            self.assertIn(e, symtab.buckets[e._h % symtab.size])
+
+    def test_same_value_different_kind(self):
+        symtab = SymbolTable(size=1)
+        symtab.add_value(SymKind.COLUMN, "a", 1, 1)
+        symtab.add_value(SymKind.TABLE, "a", 1, 5)
+        symtab.add_value(SymKind.COLUMN, "a", 2, 1)
+        self.assertEqual([(e.kind, e.refs) for e in symtab.entries()], [(SymKind.COLUMN, 2), (SymKind.TABLE, 1)])
+
+    def test_hash_strategies(self):
+        tokens = Lexer(SAMPLES["validas.sql"] + SAMPLES["con_errores.sql"]).tokenize()
+        results = {}
+        for name in HASH_STRATEGIES:
+            symtab = SymbolTable(size=16, hash_strategy=name)
+            run_program(Parser(tokens, symtab, ErrorLog(), []), {})
+            self.assertEqual(symtab.stats()["hash_strategy"], name)
+            self.assertGreater(symtab.resizes, 0)
+            results[name] = [(e.kind, e.value, e.line, e.col, e.refs) for e in symtab.entries()]
+        self.assertEqual(results["crc32"], results["builtin"])
+        self.assertEqual(results["crc32"], results["md5"])
+        # crc32 y md5 no dependen de PYTHONHASHSEED
+        self.assertEqual(HASH_STRATEGIES["crc32"](SymKind.IDENT, "abc"), zlib.crc32(b"abc", zlib.crc32(b"IDENT")))
+        self.assertEqual(HASH_STRATEGIES["md5"](SymKind.IDENT, "abc"),
+                         int(hashlib.md5(b"IDENT:abc").hexdigest()[:8], 16))
+
+    def test_custom_strategy(self):
+        symtab = SymbolTable(size=4, hash_strategy=lambda kind, value: 0)
+        fill(symtab, 50)
+        self.assertEqual(symtab.stats()["hash_strategy"], "<lambda>")
+        self.assertEqual(symtab.stats()["collisions"], 49)
+        self.assertEqual(len(list(symtab.entries())), 50)
+        with self.assertRaises(KeyError):
+            SymbolTable(hash_strategy="sha1")
+
+
+def recount(symtab):
+    # stats() recalculadas desde los buckets
+    entries = [e for bucket in symtab.buckets for e in bucket]
+    by_kind = {}
+    for e in entries:
+        by_kind[e.kind.value] = by_kind.get(e.kind.value, 0) + 1
+    return {"size": len(symtab.buckets), "total_entries": len(entries),
+            "collisions": len(entries) - sum(1 for bucket in symtab.buckets if bucket),
+            "load_factor": round(len(entries) / len(symtab.buckets), 4), "hash_strategy": symtab.hash_strategy,
+            "resizes": symtab.resizes, "by_kind": by_kind}
+
+
+class SymbolTableStatsTests(TestCase):
+    # user-006: stats incrementales, entries(order) sin copia y merge
+
+    def test_stats_match_recount(self):
+        symtab = SymbolTable(size=4)
+        tokens = Lexer(SAMPLES["con_errores.sql"]).tokenize()
+        parser = Parser(tokens, symtab, ErrorLog(), [])
+        for _ in parser.iter_program():
+            self.assertEqual(symtab.stats(), recount(symtab))
+        self.assertGreater(symtab.stats()["collisions"], 0)
+
+    def test_entries_orders(self):
+        symtab = SymbolTable(size=8)
+        for kind, value, refs in ((SymKind.LITERAL, "1", 1), (SymKind.TABLE, "t", 3), (SymKind.COLUMN, "a", 2),
+                                  (SymKind.TABLE, "u", 1), (SymKind.RESWORD, "SELECT", 4)):
+            for _ in range(refs):
+                symtab.add_value(kind, value, 1, 1)
+        values = lambda order: [e.value for e in symtab.entries(order)]
+        self.assertEqual(values("insertion"), ["1", "t", "a", "u", "SELECT"])
+        self.assertEqual(values("kind"), ["SELECT", "t", "u", "a", "1"])
+        self.assertEqual(values("refs"), ["SELECT", "t", "a", "1", "u"])
+        self.assertEqual(values("bucket"), [e.value for bucket in symtab.buckets for e in bucket])
+        self.assertEqual(sorted(values("bucket")), sorted(values("insertion")))
+        self.assertIs(next(symtab.entries()), symtab._order[0])  # sin copia
+        with self.assertRaises(ValueError):
+            symtab.entries("alfabético")
+
+    def test_merge(self):
+        a, b = SymbolTable(size=4), SymbolTable(size=4)
+        fill(a, 30)
+        for i in range(20, 50):
+            b.add_value(SymKind.IDENT if i % 3 == 0 else SymKind.TABLE, f"v{i}", 1000 + i, 7)
+        b.add_value(SymKind.IDENT, "v21", 1, 1)
+        merged = {(e.kind, e.value): (e.line, e.col, e.refs) for e in a.entries()}
+        for e in b.entries():
+            line, col, refs = merged.get((e.kind, e.value), (e.line, e.col, 0))
+            merged[(e.kind, e.value)] = (line, col, refs + e.refs)
+        a.merge(b.entries())
+        self.assertEqual({(e.kind, e.value): (e.line, e.col, e.refs) for e in a.entries()}, merged)
+        self.assertEqual(a.stats(), recount(a))
+        self.assertEqual(a.stats()["total_entries"], len(merged))
+
+
+class TokenBufferTests(TestCase):
+    # user-002: TokenBuffer (columnas en array) equivale a la lista de Token
+
+    def test_same_tokens_as_list(self):
+        for text in (*SAMPLES.values(), *fragments(2, 100)):
+            buf, ref = Lexer(text).tokenize_buffer(), Lexer(text).tokenize()
+            self.assertEqual(len(buf), len(ref))
+            self.assertEqual(token_tuples(buf), token_tuples(ref), repr(text))
+            self.assertEqual([buf.type(i) for i in range(len(buf))], [t.type for t in ref])
+            self.assertEqual([buf.value(i) for i in range(len(buf))], [t.value for t in ref])
+
+    def test_indexing_and_slicing(self):
+        text = SAMPLES["validas.sql"]
+        buf, ref = Lexer(text).tokenize_buffer(), token_tuples(Lexer(text).tokenize())
+        self.assertEqual(token_tuples([buf[-1]]), ref[-1:])
+        self.assertEqual(token_tuples(buf[5:40:3]), ref[5:40:3])
+        self.assertEqual(token_tuples(buf[-4:]), ref[-4:])
+        self.assertEqual(buf[len(buf):], [])
+        self.assertIs(buf[7], buf[7])  # el token actual se cachea para el Parser
+        self.assertEqual(token_tuples([buf[8], buf[7]]), ref[8:6:-1])
+        with self.assertRaises(IndexError):
+            buf[len(buf)]
+
+    def test_lazy_values(self):
+        text = "SELECT nombre, 'a b', 12.5 FROM t -- fin\n;"
+        buf = Lexer(text).tokenize_buffer()
+        self.assertEqual([(buf.type(i).name, buf.value(i)) for i in range(len(buf))],
+                         [("RESWORD", "SELECT"), ("IDENT", "nombre"), ("SYMBOL", ","), ("STRING", "'a b'"),
+                          ("SYMBOL", ","), ("NUMBER", "12.5"), ("RESWORD", "FROM"), ("IDENT", "t"), ("SYMBOL", ";"),
+                          ("EOF", "")])
+        self.assertEqual([text[buf.starts[i]:buf.ends[i]] for i in (1, 3, 5)], ["nombre", "'a b'", "12.5"])
+        self.assertEqual((buf.starts[-1], buf.ends[-1]), (len(text), len(text)))
+        self.assertEqual(buf.nbytes(), 18 * len(buf))
+
+    def test_line_and_column_arrays(self):
+        # un string multilínea toma la línea donde termina y una columna negativa
+        text = "SELECT 'abcdefgh\nde' FROM t\n  WHERE x"
+        buf, ref = Lexer(text).tokenize_buffer(), Lexer(text).tokenize()
+        self.assertEqual((buf.lines.typecode, buf.cols.typecode), ("I", "i"))
+        self.assertEqual(list(buf.lines), [t.line for t in ref])
+        self.assertEqual(list(buf.cols), [t.col for t in ref])
+        self.assertEqual((buf.lines[1], buf.cols[1]), (2, -9))
+        self.assertEqual((buf.lines[4], buf.cols[4]), (3, 3))
+
+    def test_parser_on_buffer(self):
+        for text in SAMPLES.values():
+            ref = SymbolTable(), ErrorLog()
+            run_program(LL1Parser(Lexer(text).tokenize(), *ref, []), {})
+            self.assertEqual(parse_result(text, LL1Parser), ([(e.kind, e.value, e.line, e.col, e.refs)
+                                                               for e in ref[0].entries()],
+                                                              [(e.line, e.col, e.message) for e in ref[1].items]))
+
+
+class WordPoolTests(TestCase):
+    # user-022: códigos enteros de palabras reservadas/símbolos e internado de identificadores
+
+    def test_interning(self):
+        text = "select Nombre, nombre FROM t WHERE nombre = 1 AND nombre = 2 OR nombre IN (3);"
+        tokens = Lexer(text).tokenize()
+        names = [t.value for t in tokens if t.value == "nombre"]
+        self.assertEqual(len(names), 4)
+        self.assertTrue(all(v is names[0] for v in names))
+        buf = Lexer(text).tokenize_buffer()
+        values = [buf.value(i) for i in range(len(buf)) if buf.value(i) == "nombre"]
+        self.assertTrue(all(v is values[0] for v in values))
+        self.assertIsNot(names[0], values[0])  # un pool por análisis
+
+    def test_reserved_words(self):
+        pool = WordPool()
+        for word in sorted(RESWORDS):
+            code = CODES[word]
+            for spelling in (word, word.lower(), word.capitalize()):
+                for key in (spelling, spelling.encode("ascii")):
+                    self.assertEqual(pool[key], (code, word))
+                    self.assertIs(pool[key][1], CODE_NAMES[code])
+        self.assertEqual(pool["abc"], (0, "abc"))
+        self.assertIs(pool[b"abc"][1], pool["abc"][1])
+        tk = Lexer("sElEcT").tokenize()[0]
+        self.assertIs(tk.value, CODE_NAMES[CODES["SELECT"]])
+
+    def test_shared_pool(self):
+        pool = WordPool()
+        a = Lexer("SELECT col FROM t;", pool=pool).tokenize()
+        b = ByteLexer(b"UPDATE t SET col = 1;", pool=pool).tokenize_buffer()
+        self.assertIs(a[1].value, b.value(3))
+        self.assertIs(a[3].value, b.value(1))
 
-# Create your tests here.
+    def test_codes_agree(self):
+        coded = {TokenType.RESWORD, TokenType.SYMBOL, TokenType.OP}
+        for text in (*SAMPLES.values(), *fragments(22, 150)):
+            regex = Lexer(text).tokenize()
+            dfa = Lexer(text, backend="dfa").tokenize()
+            raw = ByteLexer(text.encode("utf-8")).tokenize_buffer()
+            self.assertEqual([t.code for t in regex], [t.code for t in dfa], repr(text))
+            self.assertEqual([t.code for t in regex], list(raw.codes), repr(text))
+            self.assertEqual([CODE_OF[t.type] for t in regex], list(raw.types), repr(text))
+            for t in regex:
+                if t.code:
+                    self.assertIn(t.type, coded)
+                    self.assertEqual(CODES[t.value], t.code)
+                    self.assertIs(t.value, CODE_NAMES[t.code])
+                else:
+                    # sin código: identificadores, literales, EOF y caracteres no reconocidos
+                    self.assertTrue(t.type not in coded or t.value not in CODES, t)
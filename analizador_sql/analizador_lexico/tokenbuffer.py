@@ -0,0 +1,84 @@
+from array import array
+from .lexer import Token, TokenType, CODE_NAMES, WordPool
+from .lineindex import LineIndex
+
+# Almacenamiento compacto de tokens (struct-of-arrays).
+#
+# Exporta:
+#  - TokenBuffer: en lugar de un `Token` (dataclass) por token guarda columnas en
+#    `array`: código de tipo, código de palabra/símbolo (lexer.CODES), línea, columna y
+#    offsets (start, end) en el texto fuente.
+#
+# Notas:
+#  - El valor se materializa sólo al pedirlo (`value(i)` o `buf[i]`): si el token tiene
+#    código es la cadena de CODE_NAMES (RESWORD ya en mayúsculas), EOF es "", IDENT pasa
+#    por el WordPool del lexer (identificadores repetidos = misma cadena) y el resto es
+#    `source[start:end]`.
+#  - `buf[i]` devuelve un `Token` temporal, así que el Parser lo usa sin cambios
+#    (`t()`/`eat()` sólo indexan). Se cachea el último token pedido porque el Parser
+#    consulta varias veces el token actual.
+#  - `line_index` (lineindex.py): inicios de línea que el lexer registra al tokenizar,
+#    para pasar de offset a (línea, col) y extraer la línea de un error.
+#  - Offsets y líneas usan enteros sin signo de 32 bits ('I'); la columna es con
+#    signo ('i') porque el lexer puede dar columnas negativas en strings multilínea.
+
+TYPE_CODES = list(TokenType)
+CODE_OF = {t: i for i, t in enumerate(TYPE_CODES)}
+
+
+class TokenBuffer:
+    def __init__(self, source: str, line: int = 1, col: int = 1, pool=None):
+        self.source = source
+        self.line_index = LineIndex(source, line, col)
+        self.pool = WordPool() if pool is None else pool
+        self.types = array('B')
+        self.codes = array('B')
+        self.lines = array('I')
+        self.cols = array('i')
+        self.starts = array('I')
+        self.ends = array('I')
+        self._ci = -1
+        self._ct = None
+
+    def append(self, type_code: int, start: int, end: int, line: int, col: int, code: int = 0):
+        self.types.append(type_code)
+        self.codes.append(code)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.cols.append(col)
+
+    def __len__(self):
+        return len(self.types)
+
+    def type(self, i) -> TokenType:
+        return TYPE_CODES[self.types[i]]
+
+    def value(self, i) -> str:
+        code = self.codes[i]
+        if code:
+            return CODE_NAMES[code]
+        tt = TYPE_CODES[self.types[i]]
+        if tt == TokenType.EOF:
+            return ""
+        val = self.source[self.starts[i]:self.ends[i]]
+        return self.pool[val][1] if tt == TokenType.IDENT else val
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i == self._ci:
+            return self._ct
+        tk = Token(TYPE_CODES[self.types[i]], self.value(i), self.lines[i], self.cols[i], self.codes[i])
+        self._ci, self._ct = i, tk
+        return tk
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        # memoria ocupada por las columnas (sin contar el texto fuente)
+        return sum(a.itemsize * len(a) for a in (self.types, self.codes, self.lines, self.cols, self.starts, self.ends))
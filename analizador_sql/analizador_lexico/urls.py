@@ -1,9 +1,31 @@
 from django.urls import path
-from .views import index
+from .views import index, cache_stats, metrics
+from .api import (batch_analyze, analyze_stream, analyze_stream_async, result_tokens, result_symbols, result_ast,
+                  history_runs, history_top_columns, job_submit, job_status, job_cancel)
 
 # Rutas de la app de análisis léxico.
-# Define la vista principal `index` en la raíz de la app.
+# Define la vista principal `index` en la raíz de la app y `cache/stats/`
+# con los aciertos/fallos de la caché de resultados; `metrics/` expone los tiempos y
+# contadores acumulados en formato de texto de Prometheus (ver metrics.py).
+# `api/analyze/` es el endpoint JSON de análisis por lotes y `api/stream/`
+# (`api/stream-async/` bajo ASGI) el análisis en vivo en NDJSON (ver api.py).
+# `api/result/<id>/tokens|symbols/` paginan un resultado ya analizado, `.../ast/` da su AST y
+# `api/history/...` consulta el histórico persistido y `api/jobs/...` encola, consulta y
+# cancela análisis en segundo plano (jobs.py).
 
 urlpatterns = [
     path("", index, name="sql_index"),
+    path("cache/stats/", cache_stats, name="sql_cache_stats"),
+    path("metrics/", metrics, name="sql_metrics"),
+    path("api/analyze/", batch_analyze, name="sql_api_analyze"),
+    path("api/stream/", analyze_stream, name="sql_api_stream"),
+    path("api/stream-async/", analyze_stream_async, name="sql_api_stream_async"),
+    path("api/result/<slug:result_id>/tokens/", result_tokens, name="sql_api_result_tokens"),
+    path("api/result/<slug:result_id>/symbols/", result_symbols, name="sql_api_result_symbols"),
+    path("api/result/<slug:result_id>/ast/", result_ast, name="sql_api_result_ast"),
+    path("api/history/runs/", history_runs, name="sql_api_history_runs"),
+    path("api/history/columns/top/", history_top_columns, name="sql_api_history_top_columns"),
+    path("api/jobs/", job_submit, name="sql_api_job_submit"),
+    path("api/jobs/<slug:job_id>/", job_status, name="sql_api_job_status"),
+    path("api/jobs/<slug:job_id>/cancel/", job_cancel, name="sql_api_job_cancel"),
 ]
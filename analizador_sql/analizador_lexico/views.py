@@ -1,73 +1,187 @@
-from django.shortcuts import render
+from contextlib import ExitStack, contextmanager
+from itertools import zip_longest
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.core.files.uploadedfile import UploadedFile
-from .lexer import Lexer, TokenType
-from .parser import Parser
-from .symbols import SymbolTable, SymKind
-from .errors import ErrorLog, ParseError
+from .analysis import analyze_source, TOKEN_PAGE_SIZE
+from .bytelexer import mapped
+from .cache import result_cache
+from .history import record_run
+from .incremental import IncrementalAnalyzer
+from .jobs import job_queue, file_digest, QueueFull
+from .models import AnalysisJob
+from .metrics import Stages, REGISTRY, profiled, memory_traced
 
 # Vista principal `index` que procesa subida de archivo .sql:
-#  - Lee el archivo subido y lo pasa al Lexer -> tokens
-#  - Crea SymbolTable y ErrorLog
-#  - Ejecuta Parser para validar y llenar tabla de símbolos
-#  - Prepara contexto para la plantilla index.html
+#  - Lee el archivo subido y busca el resultado en la caché (clave = hash del contenido)
+#  - Si no está: Lexer -> tokens, SymbolTable + ErrorLog, Parser (en paralelo por
+#    bloques de sentencias si el archivo es grande) y guarda el resultado en caché
+#  - Guarda cada análisis nuevo en el histórico (history.record_run, models.py)
+#  - Prepara contexto para la plantilla index.html: sólo la primera página de tokens
+#    y de símbolos; la plantilla pide el resto (y los filtros) a api/result/<id>/...
+#  - No devuelve el texto fuente: cada error lleva su línea y una marca en la columna
+#    (result["error_snippets"], ver lineindex.py)
+# `statement_cache` conserva resultados por sentencia entre subidas: al re-subir un
+# archivo editado sólo se reanalizan las sentencias modificadas (incremental.py).
+# Subidas grandes (TemporaryUploadedFile, ya escritas en disco por Django): se mapean con
+# mmap y se analizan sobre bytes (bytelexer.py) sin leerlas ni decodificarlas enteras; no
+# usan la caché por sentencia.
+# Subidas desde ANALIZADOR_JOB_MIN_BYTES que no estén en caché se encolan (jobs.py) y se
+# redirige a `/?job=<id>`: la página consulta el progreso a api/jobs/<id>/ y, al
+# terminar, la misma URL muestra el resultado. Si la cola está llena se responde 503.
+# Vista `cache_stats`: aciertos/fallos de la caché de resultados en JSON.
+# Instrumentación (metrics.py): cada petición mide decode, cache, las etapas del análisis
+# (si no estaba en caché) y render; se muestran en la página (salvo render, que termina
+# después) y se acumulan en REGISTRY. Con ANALIZADOR_PROFILING activo, `?profile=1` y
+# `?tracemalloc=1` (GET o campo del formulario) añaden el perfil de cProfile / tracemalloc.
+# Vista `metrics`: acumulados del proceso en formato de texto de Prometheus.
 # Referencias importantes en este archivo:
-#  - Lexer: analizador_sql/analizador_lexico/lexer.py
-#  - Parser: analizador_sql/analizador_lexico/parser.py
-#  - SymbolTable: analizador_sql/analizador_lexico/symbols.py
-#  - ErrorLog/ParseError: analizador_sql/analizador_lexico/errors.py
+#  - analyze_source: analizador_sql/analizador_lexico/analysis.py
+#  - result_cache: analizador_sql/analizador_lexico/cache.py
+#  - Lexer/Parser/SymbolTable/ErrorLog: lexer.py, parser.py, symbols.py, errors.py
+
+statement_cache = IncrementalAnalyzer()
+
+
+def _first_page(rows, total, size):
+    return {"page": 1, "pages": max(1, -(-total // size)), "size": size, "total": total, "items": rows}
+
+
+def _flag(request, name):
+    if not getattr(settings, "ANALIZADOR_PROFILING", settings.DEBUG):
+        return False
+    return (request.GET.get(name) or request.POST.get(name)) in ("1", "true", "on")
+
+
+@contextmanager
+def _upload_source(file):
+    # (bytes para el hash, texto o bytes a analizar)
+    if hasattr(file, "temporary_file_path"):
+        with mapped(file.temporary_file_path()) as mm:
+            yield mm, mm
+    else:
+        raw = file.read()
+        yield raw, raw.decode("utf-8", errors="replace")
+
+
+def _show_result(context, result_id, result):
+    context["log"] = result["log"]        # “se muestra durante la evaluación”
+    context["errors"] = result["errors"]
+    # el aviso de errores omitidos (si lo hay) no tiene línea
+    context["error_details"] = [{"message": msg, "snippet": snip}
+                                for msg, snip in zip_longest(result["errors"], result["error_snippets"])]
+    context["stats"] = result["stats"]
+    context["result_id"] = result_id
+    # sólo la primera página: el resto lo pide la plantilla a api/result/<id>/...
+    context["tokens"] = _first_page([[i + 1, *row] for i, row in enumerate(result["tokens"])],
+                                    result["token_count"], TOKEN_PAGE_SIZE)
+    context["symtab"] = _first_page(result["symtab"][:TOKEN_PAGE_SIZE],
+                                    len(result["symtab"]), TOKEN_PAGE_SIZE)
+    context["cache"] = result_cache.stats()
+    context["metrics"] = result.get("metrics")
+    context["literal_stats"] = result.get("literal_stats")
+
+
+def _show_job(context, job_id):
+    job = AnalysisJob.objects.filter(pk=job_id).first()
+    if job is None:
+        context["errors"] = ["El análisis solicitado no existe."]
+        return
+    context["filename"] = job.filename
+    result = result_cache.peek(result_cache.key(job.digest)) if job.status == AnalysisJob.DONE else None
+    if result is not None:
+        _show_result(context, job.digest, result)
+    elif job.status == AnalysisJob.DONE:
+        context["errors"] = ["El resultado ya no está en caché; vuelve a subir el archivo."]
+    else:
+        context["job"] = job_queue.status(job)
+
 
 def index(request):
+    REGISTRY.inc("analizador_requests_total", view="index", method=request.method)
     context = {
         "log": [],
         "errors": [],
-        "tokens": [],
-        "symtab": [],
+        "tokens": None,
+        "symtab": None,
         "stats": {},
-        "source": "",
-        "filename": ""
+        "error_details": [],
+        "filename": "",
+        "result_id": "",
+        "metrics": None,
+        "job": None,
     }
+    stages = Stages()
+
+    if request.method == "GET" and request.GET.get("job"):
+        _show_job(context, request.GET["job"])
 
     if request.method == "POST":
         file: UploadedFile = request.FILES.get("sqlfile")
         if not file:
             context["errors"] = ["Debes seleccionar un archivo .sql"]
-            return render(request, "sql_automata/index.html", context)
-
-        data = file.read().decode("utf-8", errors="replace")
-        context["source"] = data
-        context["filename"] = file.name
-
-        # ETAPA 6: iniciar proceso a partir de archivo
-        log = ["Archivo recibido. Iniciando tokenización…"]
-
-        # LEXER
-        lx = Lexer(data)
-        tokens = lx.tokenize()
-        context["tokens"] = [{"type": t.type.name, "value": t.value, "line": t.line, "col": t.col} for t in tokens[:2000]]
-
-        # SYMBOL TABLE + ERRORS
-        symtab = SymbolTable()
-        errlog = ErrorLog()
-
-        # PARSER
-        log.append("Iniciando parser/validación por gramática…")
-        parser = Parser(tokens, symtab, errlog, log)
-        parser.program()
-
-        # Agregar EOF a tabla
-        eof = next(t for t in tokens if t.type == TokenType.EOF)
-        symtab.add(eof, SymKind.EOF)
-
-        context["log"] = log                  # “se muestra durante la evaluación”
-        context["errors"] = errlog.as_list()  # lista de errores
-        context["symtab"] = [{
-            "hash": e.hash[:8],
-            "kind": e.kind.value,
-            "value": e.value,
-            "line": e.line,
-            "col": e.col,
-            "refs": e.refs
-        } for e in symtab.entries()]
-        context["stats"] = symtab.stats()
-
-    return render(request, "index.html", context)
+            return render(request, "index.html", context)
+
+        # archivos grandes: a la cola, salvo que el resultado ya esté en caché
+        if file.size >= getattr(settings, "ANALIZADOR_JOB_MIN_BYTES", 20 * 1024 * 1024):
+            digest = file_digest(file)
+            if result_cache.peek(result_cache.key(digest)) is None:
+                try:
+                    job = job_queue.submit(file, digest)
+                except QueueFull as exc:
+                    context["errors"] = [str(exc)]
+                    return render(request, "index.html", context, status=503)
+                return redirect(f"{reverse('sql_index')}?job={job.pk}")
+
+        with memory_traced(_flag(request, "tracemalloc")) as mem, profiled(_flag(request, "profile")) as prof, \
+                ExitStack() as upload:
+            stages.trace_memory = mem.enabled
+            with stages.stage("decode"):
+                raw, data = upload.enter_context(_upload_source(file))
+            is_text = isinstance(data, str)
+            context["filename"] = file.name
+
+            # ETAPA 6: iniciar proceso a partir de archivo (o recuperarlo de caché)
+            with stages.stage("cache"):
+                result_id = result_cache.result_id(raw)
+                key = result_cache.key(result_id)
+                result = result_cache.get(key)
+            if result is None:
+                REGISTRY.inc("analizador_analyses_total", view="index")
+                result = analyze_source(data, incremental=statement_cache if is_text else None, stages=stages)
+                with stages.stage("cache"):
+                    result_cache.set(key, result)
+                if getattr(settings, "ANALIZADOR_HISTORY", True):
+                    record_run(file.name, result_id, result)
+            else:
+                result["log"].append("Resultado recuperado de caché (archivo ya analizado).")
+            with stages.stage("cache"):
+                if hasattr(file, "temporary_file_path"):
+                    result_cache.set_source(key, path=file.temporary_file_path())
+                else:
+                    result_cache.set_source(key, raw)
+        context["profile"] = prof.text
+        context["tracemalloc"] = mem.text
+        _show_result(context, result_id, result)
+        context["metrics"] = stages.as_dict()
+
+    with stages.stage("render"):
+        response = render(request, "index.html", context)
+    REGISTRY.observe(stages.as_dict())
+    return response
+
+
+def cache_stats(request):
+    return JsonResponse(result_cache.stats())
+
+
+def metrics(request):
+    stats = result_cache.stats()
+    extra = {
+        "analizador_result_cache_hits_total": ("counter", "Aciertos de la caché de resultados", stats.get("hits", 0)),
+        "analizador_result_cache_misses_total": ("counter", "Fallos de la caché de resultados", stats.get("misses", 0)),
+    }
+    return HttpResponse(REGISTRY.render(extra), content_type="text/plain; version=0.0.4; charset=utf-8")
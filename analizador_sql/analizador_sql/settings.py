@@ -82,6 +82,56 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+#
+# Resultados de análisis (ver analizador_lexico/cache.py): primero en memoria
+# (LocMem, LRU con MAX_ENTRIES + TTL) y después en disco, compartido entre procesos.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "analisis": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "analisis",
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 64},
+    },
+    "analisis_disco": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache_analisis",
+        "TIMEOUT": 24 * 3600,
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+}
+
+ANALIZADOR_CACHE_ALIASES = ["analisis", "analisis_disco"]
+
+# Archivos fuente de los resultados en caché, para paginar tokens (analizador_lexico/cache.py)
+ANALIZADOR_SOURCE_DIR = BASE_DIR / ".cache_fuentes"
+ANALIZADOR_SOURCE_MAX_FILES = 500
+
+# Límites del endpoint JSON de análisis por lotes (analizador_lexico/api.py)
+ANALIZADOR_BATCH_MAX_FILES = 1000
+ANALIZADOR_BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+# Guardar cada análisis nuevo en el histórico (analizador_lexico/models.py)
+ANALIZADOR_HISTORY = True
+
+# Cola de análisis en segundo plano (analizador_lexico/jobs.py): subidas desde
+# ANALIZADOR_JOB_MIN_BYTES se encolan en lugar de analizarse dentro de la petición
+ANALIZADOR_JOB_MIN_BYTES = 20 * 1024 * 1024
+ANALIZADOR_JOB_DIR = BASE_DIR / ".jobs"
+ANALIZADOR_JOB_WORKERS = 2
+ANALIZADOR_JOB_MAX_QUEUED = 16
+ANALIZADOR_JOB_PROGRESS_INTERVAL = 0.5
+ANALIZADOR_JOB_STALE_SECONDS = 300
+
+# Permitir ?profile=1 / ?tracemalloc=1 por petición en la vista principal (metrics.py)
+ANALIZADOR_PROFILING = DEBUG
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,65 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Benchmark del histórico: history.record_run con N símbolos (objetivo de user-012:
+# 100k símbolos muy por debajo de un segundo).
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.bench_history [n_simbolos] [repeticiones]
+#
+# Crea una base de datos SQLite temporal (migrate incluido), genera un resultado
+# sintético con el formato de analysis.analyze_source (filas de símbolos
+# [hash, kind, value, line, col, refs] y un 1% de errores) y reporta el mejor tiempo
+# de N repeticiones, cada una en una ejecución nueva del histórico.
+
+KINDS = ("TABLE", "COLUMN", "IDENT", "NUMBER", "STRING")
+
+
+def make_result(n):
+    symtab = [[i, KINDS[i % len(KINDS)], f"valor_{i}", i // 10 + 1, i % 80 + 1, i % 7 + 1] for i in range(n)]
+    errors = [(i + 1, 1, f"Error sintáctico {i}") for i in range(n // 100)]
+    return {"token_count": n * 4, "error_rows": errors, "symtab": symtab, "stats": {"symbols": n}}
+
+
+def setup_db(tmp):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "analizador_sql.settings")
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.DATABASES["default"]["NAME"] = os.path.join(tmp, "db.sqlite3")
+    from django.core.management import call_command
+    from django.db import connection
+    connection.settings_dict["NAME"] = settings.DATABASES["default"]["NAME"]
+    call_command("migrate", verbosity=0)
+    return connection
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 100_000
+    reps = int(argv[2]) if len(argv) > 2 else 3
+    tmp = tempfile.mkdtemp(prefix="bench_history_")
+    connection = setup_db(tmp)
+    try:
+        from analizador_lexico.history import record_run
+        from analizador_lexico.models import RunSymbol
+        result, best = make_result(n), float("inf")
+        for rep in range(reps):
+            t0 = time.perf_counter()
+            run = record_run("bench.sql", f"{rep:032x}", result)
+            best = min(best, time.perf_counter() - t0)
+            if run is None or RunSymbol.objects.filter(run=run).count() != n:
+                print("ERROR: no se guardaron todos los símbolos")
+                return 1
+        print(f"simbolos={n} errores={len(result['error_rows'])}")
+        print(f"record_run tiempo={best:.3f}s {n / best:12,.0f} simbolos/s")
+    finally:
+        connection.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
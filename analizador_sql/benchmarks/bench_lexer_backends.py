@@ -0,0 +1,43 @@
+import sys
+import time
+
+from analizador_lexico.lexer import Lexer
+from analizador_lexico.dfa import get_dfa
+from benchmarks.bench_token_memory import make_source
+
+# Benchmark de backends del lexer: regex (`token_regex`) vs AFD por tablas (dfa.py).
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.bench_lexer_backends [n_sentencias] [repeticiones]
+#
+# Verifica primero que ambos backends producen exactamente los mismos tokens y
+# después reporta tokens/seg (mejor de N repeticiones) para cada uno.
+
+
+def best_time(source, backend, reps):
+    best, ntok = float("inf"), 0
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        ntok = len(Lexer(source, backend=backend).tokenize())
+        best = min(best, time.perf_counter() - t0)
+    return ntok, best
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 20_000
+    reps = int(argv[2]) if len(argv) > 2 else 3
+    source = make_source(n)
+    if Lexer(source).tokenize() != Lexer(source, backend="dfa").tokenize():
+        print("ERROR: los backends producen tokens distintos")
+        return 1
+    dfa = get_dfa()
+    print(f"sentencias={n} caracteres={len(source)} "
+          f"afd: estados={len(dfa.accept)} clases={dfa.nclasses}")
+    for backend in Lexer.BACKENDS:
+        ntok, secs = best_time(source, backend, reps)
+        print(f"{backend:6} tokens={ntok} tiempo={secs:.3f}s {ntok / secs:12,.0f} tokens/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,58 @@
+import sys
+import time
+
+from analizador_lexico.lexer import Lexer
+from analizador_lexico.parser import Parser
+from analizador_lexico.ll1 import LL1Parser
+from analizador_lexico.symbols import SymbolTable
+from analizador_lexico.errors import ErrorLog
+from benchmarks.bench_token_memory import make_source
+
+# Benchmark de motores del parser: descenso recursivo (parser.Parser) vs LL(1) por
+# tablas (ll1.LL1Parser).
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.bench_parser_engines [n_sentencias] [repeticiones]
+#
+# Verifica primero que ambos motores producen la misma tabla de símbolos y los mismos
+# errores (sobre el texto válido y sobre una versión con errores) y después reporta
+# tokens/seg (mejor de N repeticiones) parseando el mismo TokenBuffer.
+
+ENGINES = {"recursivo": Parser, "ll1": LL1Parser}
+
+
+def parse(cls, tokens):
+    symtab, errlog = SymbolTable(), ErrorLog()
+    cls(tokens, symtab, errlog, []).program()
+    return [(e.kind, e.value, e.line, e.col, e.refs) for e in symtab.entries()], errlog.as_list()
+
+
+def best_time(cls, tokens, reps):
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        cls(tokens, SymbolTable(), ErrorLog(), []).program()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 20_000
+    reps = int(argv[2]) if len(argv) > 2 else 3
+    source = make_source(n)
+    broken = source.replace(" FROM ", " ", n // 10).replace("VALUES (", "VALUES ", n // 10)
+    for text in (source, broken):
+        tokens = Lexer(text).tokenize_buffer()
+        if parse(Parser, tokens) != parse(LL1Parser, tokens):
+            print("ERROR: los motores producen resultados distintos")
+            return 1
+    tokens = Lexer(source).tokenize_buffer()
+    print(f"sentencias={n} tokens={len(tokens)}")
+    for name, cls in ENGINES.items():
+        secs = best_time(cls, tokens, reps)
+        print(f"{name:9} tiempo={secs:.3f}s {len(tokens) / secs:12,.0f} tokens/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,61 @@
+import sys
+import time
+import tracemalloc
+
+from analizador_lexico.lexer import Lexer
+from analizador_lexico.parser import Parser
+from analizador_lexico.symbols import SymbolTable
+from analizador_lexico.errors import ErrorLog
+
+# Benchmark de memoria: lista de `Token` (tokenize) vs TokenBuffer (tokenize_buffer).
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.bench_token_memory [n_sentencias]
+#
+# Mide con tracemalloc el pico de memoria de tokenizar (sin contar el texto fuente)
+# y el tiempo de tokenizar + parsear con cada representación.
+
+STMTS = [
+    "SELECT id, nombre, email FROM clientes WHERE id = {i};",
+    "INSERT INTO pedidos (id, cliente, total) VALUES ({i}, 'cliente_{i}', {i}.5);",
+    "UPDATE productos SET precio = {i}, nombre = 'p{i}' WHERE id >= {i};",
+    "CREATE TABLE t{i} (id INT PRIMARY KEY, nombre VARCHAR(40), precio FLOAT);",
+]
+
+
+def make_source(n):
+    return "\n".join(STMTS[i % len(STMTS)].format(i=i) for i in range(n))
+
+
+def lex(source, compact):
+    lx = Lexer(source)
+    return lx.tokenize_buffer() if compact else lx.tokenize()
+
+
+def measure(source, compact):
+    # el pico se mide en una pasada aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    lex(source, compact)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    tokens = lex(source, compact)
+    t_lex = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    Parser(tokens, SymbolTable(), ErrorLog(), []).program()
+    t_parse = time.perf_counter() - t0
+    return len(tokens), peak, t_lex, t_parse
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 50_000
+    source = make_source(n)
+    print(f"sentencias={n} caracteres={len(source)}")
+    for name, compact in (("list[Token]", False), ("TokenBuffer", True)):
+        ntok, peak, t_lex, t_parse = measure(source, compact)
+        print(f"{name:12} tokens={ntok} pico={peak / 1e6:8.2f} MB "
+              f"({peak / ntok:6.1f} B/token) lex={t_lex:.3f}s parse={t_parse:.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
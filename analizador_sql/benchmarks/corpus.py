@@ -0,0 +1,153 @@
+import argparse
+import random
+import sys
+
+# Generador reproducible de corpus SQL sintéticos para benchmarks y datos de prueba.
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.corpus N [--seed S] [--mix select=40,insert=30,update=20,create=10]
+#                                 [--error-rate 0.05] [--idents 1000] [-o archivo.sql]
+#
+# Exporta:
+#  - generate(statements, seed, mix, error_rate, idents): texto SQL
+#  - DEFAULT_MIX, parse_mix("select=40,...")
+#
+# Notas:
+#  - Misma semilla y parámetros => mismo texto (random.Random propio, sin estado global).
+#  - Empieza con los CREATE TABLE necesarios para que SELECT/INSERT/UPDATE usen tablas y
+#    columnas declaradas (la pasada semántica no da errores salvo los inyectados); `mix`
+#    reparte el resto de sentencias, incluidos CREATE adicionales.
+#  - `idents` es la cardinalidad de identificadores: nº de nombres de columna distintos
+#    (las tablas son ~idents/8). Controla el tamaño de la tabla de símbolos.
+#  - `error_rate` es la fracción de sentencias con un error de sintaxis inyectado
+#    (palabra reservada mal escrita, token borrado o paréntesis sin cerrar).
+
+DEFAULT_MIX = {"select": 40, "insert": 30, "update": 20, "create": 10}
+TYPES = ("INT", "FLOAT", "VARCHAR")
+OPS = ("=", "<", ">", "<=", ">=", "<>")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip().lower() not in DEFAULT_MIX:
+            raise ValueError(f"Tipo de sentencia desconocido en --mix: {kind}")
+        mix[kind.strip().lower()] = float(weight)
+    return mix
+
+
+class _Generator:
+    def __init__(self, rng, idents):
+        self.rng = rng
+        self.columns = [f"col_{i}" for i in range(max(1, idents))]
+        self.tables = {}  # nombre -> [(columna, tipo, tamaño)]
+        self.ntables = max(1, idents // 8)
+
+    def literal(self, ctype, size):
+        rng = self.rng
+        if rng.random() < 0.05:
+            return "NULL"
+        if ctype == "INT":
+            return str(rng.randrange(100_000))
+        if ctype == "FLOAT":
+            return f"{rng.randrange(10_000)}.{rng.randrange(100)}"
+        return "'" + "x" * rng.randrange(1, size + 1) + "'"
+
+    def create(self):
+        rng = self.rng
+        name = f"tabla_{len(self.tables)}"
+        cols = []
+        for col in rng.sample(self.columns, min(len(self.columns), rng.randint(2, 8))):
+            ctype = rng.choice(TYPES)
+            cols.append((col, ctype, rng.choice((10, 20, 40, 255)) if ctype == "VARCHAR" else None))
+        self.tables[name] = cols
+        defs = []
+        for k, (col, ctype, size) in enumerate(cols):
+            spec = f"VARCHAR({size})" if size else ctype
+            defs.append(f"{col} {spec}" + (" PRIMARY KEY" if k == 0 else ""))
+        return f"CREATE TABLE {name} ({', '.join(defs)});"
+
+    def _table(self):
+        name = self.rng.choice(list(self.tables))
+        return name, self.tables[name]
+
+    def where(self, cols):
+        if self.rng.random() < 0.3:
+            return ""
+        col, ctype, size = self.rng.choice(cols)
+        return f" WHERE {col} {self.rng.choice(OPS)} {self.literal(ctype, size or 10)}"
+
+    def select(self):
+        name, cols = self._table()
+        if self.rng.random() < 0.2:
+            listed = "*"
+        else:
+            listed = ", ".join(c for c, _, _ in self.rng.sample(cols, self.rng.randint(1, len(cols))))
+        return f"SELECT {listed} FROM {name}{self.where(cols)};"
+
+    def insert(self):
+        name, cols = self._table()
+        chosen = self.rng.sample(cols, self.rng.randint(1, len(cols)))
+        values = ", ".join(self.literal(t, s) for _, t, s in chosen)
+        return f"INSERT INTO {name} ({', '.join(c for c, _, _ in chosen)}) VALUES ({values});"
+
+    def update(self):
+        name, cols = self._table()
+        chosen = self.rng.sample(cols, self.rng.randint(1, min(3, len(cols))))
+        sets = ", ".join(f"{c} = {self.literal(t, s)}" for c, t, s in chosen)
+        return f"UPDATE {name} SET {sets}{self.where(cols)};"
+
+    def corrupt(self, stmt):
+        rng = self.rng
+        words = stmt.split(" ")
+        fault = rng.randrange(3)
+        if fault == 0:
+            words[0] = words[0][:-1]                       # SELEC, INSER...
+        elif fault == 1 and len(words) > 2:
+            del words[rng.randrange(1, len(words) - 1)]    # token borrado
+        else:
+            stmt = " ".join(words)
+            return stmt[:stmt.rfind(")")] + stmt[stmt.rfind(")") + 1:] if ")" in stmt else stmt + " ("
+        return " ".join(words)
+
+
+def generate(statements, seed=0, mix=None, error_rate=0.0, idents=1000):
+    rng = random.Random(seed)
+    gen = _Generator(rng, idents)
+    mix = mix or DEFAULT_MIX
+    kinds = [k for k in mix if mix[k] > 0]
+    weights = [mix[k] for k in kinds]
+
+    out = []
+    for _ in range(min(statements, gen.ntables)):
+        out.append(gen.create())
+    while len(out) < statements:
+        out.append(getattr(gen, rng.choices(kinds, weights)[0])())
+    if error_rate:
+        for i in range(len(out)):
+            if rng.random() < error_rate:
+                out[i] = gen.corrupt(out[i])
+    return "\n".join(out) + "\n"
+
+
+def main(argv):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.corpus", description="Genera un corpus SQL sintético")
+    ap.add_argument("statements", type=int)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="p. ej. select=40,insert=30,update=20,create=10")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--idents", type=int, default=1000)
+    ap.add_argument("-o", "--output", help="archivo de salida (por defecto stdout)")
+    args = ap.parse_args(argv[1:])
+    text = generate(args.statements, args.seed, args.mix, args.error_rate, args.idents)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.corpus import generate, parse_mix, DEFAULT_MIX
+
+# Harness de benchmarks reproducible: lexer, parser, tabla de símbolos y vista index.
+#
+# Uso (desde analizador_sql/):
+#   python -m benchmarks.run [--statements 20000] [--seed 0] [--mix ...] [--error-rate 0.02]
+#                            [--idents 1000] [--reps 3] [--cases lexer.tokenize,view.index]
+#                            [-o resultados.json]
+#
+# Casos (CASES):
+#  - lexer.tokenize / lexer.tokenize_dfa / lexer.tokenize_buffer
+#  - parser.program (LL1Parser) / parser.program_recursive (Parser) sobre un TokenBuffer
+#  - symtab.add (todos los tokens no EOF) / symtab.stats (una llamada, tabla ya llena)
+#  - analysis.analyze_source (pipeline completo sin Django, sin procesos)
+#  - view.index (POST del archivo con caché vacía) / view.index_cached (mismo archivo otra vez)
+#
+# Salida JSON: versión del análisis, commit de git, Python/plataforma, parámetros y tamaño
+# del corpus y, por caso, mejor tiempo de `reps`, tokens/s, sentencias/s y pico de RSS.
+# Los casos de RETAINED añaden `retained_kb`: memoria que sigue ocupando el resultado
+# (lista de tokens, tabla de símbolos) medida con tracemalloc en una ejecución aparte.
+#
+# Notas:
+#  - Cada caso corre en un proceso nuevo (spawn) que regenera el corpus con la misma
+#    semilla: así el pico de RSS (ru_maxrss) es el del caso y no el de los anteriores.
+#  - view.* usa una base SQLite y un directorio de caché temporales; entre repeticiones
+#    se vacían las cachés de resultados y por sentencia para medir siempre en frío.
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _best(fn, reps, setup=None):
+    best = float("inf")
+    for _ in range(reps):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _lexer_case(source, reps, **opts):
+    from analizador_lexico.lexer import Lexer
+    if opts.get("buffer"):
+        return _best(lambda _: Lexer(source).tokenize_buffer(), reps)
+    return _best(lambda _: Lexer(source, backend=opts.get("backend", "regex")).tokenize(), reps)
+
+
+def _parser_case(source, reps, recursive=False):
+    from analizador_lexico.lexer import Lexer
+    from analizador_lexico.parser import Parser
+    from analizador_lexico.ll1 import LL1Parser
+    from analizador_lexico.symbols import SymbolTable
+    from analizador_lexico.errors import ErrorLog
+    cls = Parser if recursive else LL1Parser
+    tokens = Lexer(source).tokenize_buffer()
+    return _best(lambda _: cls(tokens, SymbolTable(), ErrorLog(), []).program(), reps)
+
+
+def _symtab_case(source, reps, stats=False):
+    from analizador_lexico.lexer import Lexer, TokenType
+    from analizador_lexico.symbols import SymbolTable, SymKind
+    tokens = [t for t in Lexer(source).tokenize() if t.type != TokenType.EOF]
+
+    def fill(_=None):
+        symtab = SymbolTable()
+        for tk in tokens:
+            symtab.add(tk, SymKind.IDENT)
+        return symtab
+    if not stats:
+        return _best(fill, reps)
+    symtab = fill()
+    return _best(lambda _: symtab.stats(), reps)
+
+
+def _analysis_case(source, reps):
+    from analizador_lexico.analysis import analyze_source
+    return _best(lambda _: analyze_source(source, parallel=False), reps)
+
+
+def _view_case(source, reps, cached=False):
+    tmp = tempfile.mkdtemp(prefix="bench_analizador_")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "analizador_sql.settings")
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.ANALIZADOR_CACHE_DIR = os.path.join(tmp, "cache")
+    settings.CACHES["analisis_disco"]["LOCATION"] = settings.ANALIZADOR_CACHE_DIR
+    settings.DATABASES["default"]["NAME"] = os.path.join(tmp, "db.sqlite3")
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.db import connection
+    from django.test import Client
+    from analizador_lexico import views
+    from analizador_lexico.incremental import IncrementalAnalyzer
+    connection.settings_dict["NAME"] = settings.DATABASES["default"]["NAME"]
+    call_command("migrate", verbosity=0)
+    client, raw = Client(), source.encode("utf-8")
+
+    def reset():
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        views.statement_cache = IncrementalAnalyzer()
+        if cached:
+            post()
+
+    def post(_=None):
+        resp = client.post("/", {"sqlfile": SimpleUploadedFile("bench.sql", raw)})
+        assert resp.status_code == 200, resp.status_code
+
+    try:
+        return _best(post, reps, setup=reset)
+    finally:
+        connection.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+CASES = {
+    "lexer.tokenize": lambda src, reps: _lexer_case(src, reps),
+    "lexer.tokenize_dfa": lambda src, reps: _lexer_case(src, reps, backend="dfa"),
+    "lexer.tokenize_buffer": lambda src, reps: _lexer_case(src, reps, buffer=True),
+    "parser.program": lambda src, reps: _parser_case(src, reps),
+    "parser.program_recursive": lambda src, reps: _parser_case(src, reps, recursive=True),
+    "symtab.add": lambda src, reps: _symtab_case(src, reps),
+    "symtab.stats": lambda src, reps: _symtab_case(src, reps, stats=True),
+    "analysis.analyze_source": lambda src, reps: _analysis_case(src, reps),
+    "view.index": lambda src, reps: _view_case(src, reps),
+    "view.index_cached": lambda src, reps: _view_case(src, reps, cached=True),
+}
+
+
+def _retained_tokens(source, **opts):
+    from analizador_lexico.lexer import Lexer
+    return Lexer(source, **opts).tokenize()
+
+
+def _retained_symtab(source):
+    from analizador_lexico.lexer import Lexer, TokenType
+    from analizador_lexico.symbols import SymbolTable, SymKind
+    symtab = SymbolTable()
+    for tk in Lexer(source).tokenize_buffer():
+        if tk.type != TokenType.EOF:
+            symtab.add(tk, SymKind.IDENT)
+    return symtab
+
+
+RETAINED = {
+    "lexer.tokenize": lambda src: _retained_tokens(src),
+    "lexer.tokenize_dfa": lambda src: _retained_tokens(src, backend="dfa"),
+    "symtab.add": lambda src: _retained_symtab(src),
+}
+
+
+def _retained_kb(fn, source):
+    tracemalloc.start()
+    try:
+        keep = fn(source)
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del keep
+    return round(current / 1024, 1)
+
+
+def _run_case(name, corpus, reps):
+    source = generate(**corpus)
+    secs = CASES[name](source, reps)
+    out = {"seconds": round(secs, 6), "peak_rss_mb": _peak_rss_mb()}
+    if name in RETAINED:
+        out["retained_kb"] = _retained_kb(RETAINED[name], source)
+    return out
+
+
+def _corpus_info(corpus):
+    from analizador_lexico.lexer import Lexer
+    source = generate(**corpus)
+    tokens = Lexer(source).tokenize_buffer()
+    return {**corpus, "chars": len(source), "tokens": len(tokens)}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmarks del analizador")
+    ap.add_argument("--statements", type=int, default=20_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    ap.add_argument("--error-rate", type=float, default=0.02)
+    ap.add_argument("--idents", type=int, default=1000)
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--cases", default=",".join(CASES), help="lista separada por comas")
+    ap.add_argument("-o", "--output", help="archivo JSON de salida (por defecto stdout)")
+    args = ap.parse_args(argv[1:])
+
+    names = [n.strip() for n in args.cases.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        ap.error(f"casos desconocidos: {', '.join(unknown)}")
+
+    from analizador_lexico.analysis import ANALYSIS_VERSION
+    corpus = {"statements": args.statements, "seed": args.seed, "mix": args.mix,
+              "error_rate": args.error_rate, "idents": args.idents}
+    info = _corpus_info(corpus)
+    report = {
+        "analysis_version": ANALYSIS_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "reps": args.reps,
+        "corpus": info,
+        "results": {},
+    }
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            res = pool.submit(_run_case, name, corpus, args.reps).result()
+        secs = res["seconds"]
+        if name != "symtab.stats":
+            res["tokens_per_s"] = round(info["tokens"] / secs) if secs else None
+            res["statements_per_s"] = round(info["statements"] / secs) if secs else None
+        report["results"][name] = res
+        kept = f"  retained={res['retained_kb']}KB" if "retained_kb" in res else ""
+        print(f"{name:26} {secs:10.4f}s  rss={res['peak_rss_mb']}MB{kept}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,40 @@
+CREATE TABLE tabla_0 (col_1 VARCHAR(10) PRIMARY KEY, col_2 VARCHAR(20), col_22 FLOAT, col_11 VARCHAR(255), col_5 VARCHAR(40), col_9 VARCHAR(255), col_8 VARCHAR(40), col_6 INT);
+CREATE TABLE tabla_1 (col_0 VARCHAR(20) PRIMARY KEY, col_11 INT, col_14 INT, col_10 INT, col_12 INT, col_13 FLOAT, col_16 INT, col_5 INT);
+CREATE TABLE tabla_2 (col_16 FLOAT PRIMARY KEY, col_11 VARCHAR(40), col_23 VARCHAR(40), col_17 FLOAT, col_5 FLOAT, col_14 INT);
+CREAT TABLE tabla_3 (col_22 INT PRIMARY KEY, col_23 FLOAT, col_14 FLOAT, col_20 FLOAT, col_16 VARCHAR(40));
+INSERT INTO tabla_3 (col_14, col_20, col_23, col_22) VALUES (2720.78, 7860.39, 8261.71, 85382);
+INSERT INTO tabla_3 (col_23, col_20, col_14) VALUES (1234.43, 3135.95, 9411.83;
+SELECT col_14, col_16 FROM tabla_1;
+UPDATE tabla_0 SET col_1 = 'xxx', col_6 = 3072;
+CREATE TABLE tabla_4 (col_1 INT PRIMARY KEY, col_23 FLOAT);
+SELECT col_16 FROM tabla_1 WHERE col_10 < 549;
+SELECT col_23 FROM tabla_4 WHERE col_1 > 79318;
+UPDATE tabla_2 SET col_5 = 3695.11, col_11 = 'xxxxxxxxxxxxxxxxxxxxx' WHERE col_16 <= 2089.66;
+INSERT INTO tabla_3 (col_16, col_14, col_22, col_23) VALUES ('xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx', 295.89, 18424, 4144.4);
+SELECT * FROM tabla_1 WHERE col_0 < 'xxxxxxxxxxxxxxx';
+SELECT col_5, col_9, col_11, col_22, col_1, col_8 FROM tabla_0;
+INSERT INTO tabla_0 (col_11, col_1) VALUES ('xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx', 'xx');
+SELECT col_23, col_1 FROM tabla_4;
+CREATE TABLE tabla_5 (col_23 INT PRIMARY KEY, col_13 VARCHAR(10), col_16 FLOAT);
+CREATE TABLE tabla_6 (col_5 VARCHAR(10) PRIMARY KEY, col_3 VARCHAR(40), col_21 FLOAT, col_15 VARCHAR(40), col_11 FLOAT, col_0 INT);
+UPDATE tabla_3 SET col_22 = 88155 WHERE col_20 = 7960.59;
+SELECT col_23 FROM tabla_4;
+SELECT * FROM tabla_5 WHERE col_23 = 51351; (
+UPDATE tabla_1 SET col_16 = 16116, col_0 = 'xxxxxxxxxxx' WHERE col_10 <> 81026;
+INSERT INTO tabla_6 (col_0) (38109);
+SELECT * FROM tabla_3 WHERE col_20 >= 6864.62;
+UPDATE tabla_2 SET col_11 = 'xxxxxxxxxxxxxxxxx', col_14 = WHERE col_16 >= 9433.12;
+SELECT col_16, col_0, col_5 FROM tabla_1 WHERE col_0 < 'xxxxxxxxxxxxx';
+SELECT col_13, col_23 FROM tabla_5 WHERE col_23 < 99061;
+INSERT INTO tabla_2 col_5, col_23, col_16, col_17) VALUES ('xxxxxxxxxxxxxxxx', 5874.97, 'xxxxxxxxxx', 481.76, 2956.50);
+INSERT INTO tabla_3 (col_20, col_14, col_16) VALUES (6752.90, 5899.70, 'xxxxxx');
+UPDAT tabla_6 SET col_3 = 'xxxxxxxxxxxxxxxxxxxxxxxxx', col_11 = 190.40, col_0 = 93267 WHERE col_15 <> 'xxxxxxx';
+SELECT col_10, col_0, col_5, col_12, col_11, col_13, col_16 FROM tabla_1 WHERE col_14 = 56937;
+INSERT INTO tabla_4 (col_23) VALUES (1193.44);
+SELECT col_16 FROM tabla_3 WHERE col_14 <= 8239.58;
+SELECT col_22, col_8, col_11, col_6, col_2, col_1 FROM tabla_0;
+SELECT col_22, col_14 FROM tabla_3 WHERE col_22 > NULL;
+UPDATE tabla_4 SET col_1 = 17482, col_23 = 8823.91 WHERE col_1 > 39868;
+SELECT col_15, col_11, col_5, col_21, col_0, col_3 FROM tabla_6 WHERE col_3 >= 'xxxxxxxxxxxxxxxxxxxx'; (
+SELECT col_14, col_22, col_20, col_16, col_23 FROM tabla_3 WHERE col_23 > 5483.58;
+SELECT col_20, col_23, col_14 FROM tabla_3 WHERE col_23 > 1631.30; (
@@ -0,0 +1,40 @@
+CREATE TABLE tabla_0 (col_18 INT PRIMARY KEY, col_2 FLOAT, col_8 FLOAT);
+CREATE TABLE tabla_1 (col_20 INT PRIMARY KEY, col_12 FLOAT, col_6 FLOAT, col_3 VARCHAR(10), col_15 VARCHAR(255));
+CREATE TABLE tabla_2 (col_23 FLOAT PRIMARY KEY, col_7 INT, col_18 INT, col_3 INT);
+INSERT INTO tabla_0 (col_8, col_18) VALUES (475.67, 57394);
+CREATE TABLE tabla_3 (col_7 INT PRIMARY KEY, col_11 FLOAT, col_23 VARCHAR(10), col_21 INT, col_14 VARCHAR(40), col_9 INT);
+UPDATE tabla_3 SET col_9 = 65452, col_11 = 8278.50, col_23 = 'x' WHERE col_9 <= 22676;
+SELECT * FROM tabla_2 WHERE col_23 < 6443.47;
+INSERT INTO tabla_0 (col_18, col_2) VALUES (80584, 6448.82);
+SELECT col_15, col_12 FROM tabla_1 WHERE col_6 >= 4411.84;
+INSERT INTO tabla_0 (col_8, col_18) VALUES (9197.26, 7356);
+INSERT INTO tabla_2 (col_3, col_7) VALUES (54319, 70579);
+INSERT INTO tabla_2 (col_23, col_3, col_18, col_7) VALUES (9028.32, NULL, 9234, 2187);
+INSERT INTO tabla_2 (col_18, col_23) VALUES (24197, 1138.21);
+SELECT col_3, col_6, col_12 FROM tabla_1 WHERE col_20 > 55170;
+UPDATE tabla_2 SET col_18 = 66861 WHERE col_3 = 52076;
+SELECT col_3, col_12, col_6, col_15, col_20 FROM tabla_1 WHERE col_20 <= 42106;
+INSERT INTO tabla_3 (col_9) VALUES (27804);
+UPDATE tabla_2 SET col_23 = 4880.95;
+INSERT INTO tabla_1 (col_15) VALUES ('xxxxxxxxxx');
+INSERT INTO tabla_1 (col_3, col_12, col_6, col_20, col_15) VALUES ('xx', 7093.75, 1710.85, 66074, 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx');
+INSERT INTO tabla_3 (col_7, col_11, col_14) VALUES (73838, 5555.54, 'xxxxxxx');
+UPDATE tabla_2 SET col_3 = 5295, col_18 = 22242, col_23 = 8818.27;
+SELECT col_23, col_7, col_3 FROM tabla_2 WHERE col_3 < 13667;
+SELECT * FROM tabla_3 WHERE col_11 < 9624.48;
+SELECT col_6, col_15, col_3 FROM tabla_1 WHERE col_20 <= 14120;
+UPDATE tabla_2 SET col_23 = 1885.5;
+UPDATE tabla_3 SET col_7 = 89245;
+UPDATE tabla_0 SET col_2 = 7815.40, col_8 = 5200.5;
+UPDATE tabla_2 SET col_18 = 8252, col_7 = 41595, col_3 = 59750;
+SELECT col_11, col_14, col_9 FROM tabla_3 WHERE col_11 > 4600.11;
+CREATE TABLE tabla_4 (col_2 FLOAT PRIMARY KEY, col_20 FLOAT, col_18 INT, col_10 FLOAT, col_7 INT);
+SELECT col_20, col_18, col_2 FROM tabla_4 WHERE col_7 >= 28856;
+SELECT col_15, col_20, col_6 FROM tabla_1;
+INSERT INTO tabla_2 (col_3, col_7, col_23) VALUES (43003, 87195, 2450.18);
+UPDATE tabla_2 SET col_23 = 9861.37, col_18 = 27097;
+CREATE TABLE tabla_5 (col_10 VARCHAR(20) PRIMARY KEY, col_19 INT);
+SELECT * FROM tabla_4 WHERE col_20 > 7318.55;
+INSERT INTO tabla_4 (col_7, col_10, col_2, col_20) VALUES (22481, 399.82, 9348.2, 5815.74);
+SELECT * FROM tabla_1 WHERE col_6 <= 2820.78;
+SELECT * FROM tabla_3 WHERE col_14 <> 'xxxxxxxxxxxxxxx';